@@ -76,6 +76,9 @@ INSTALLED_APPS = ADMIN_THEME_APPS + DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 # =============================================================================
 
 DJANGO_MIDDLEWARE = [
+    # Compresses JSON API responses for clients sending Accept-Encoding: gzip;
+    # listed first so it sees the final response body
+    'django.middleware.gzip.GZipMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -360,6 +363,12 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'refresh-admin-dashboard-stats': {
+        'task': 'core.tasks.refresh_admin_dashboard_stats',
+        'schedule': 60.0,
+    },
+}
 DEFAULT_CHANNEL_LAYER_BACKEND = (
     'channels.layers.InMemoryChannelLayer'
     if ENVIRONMENT == 'development'
@@ -810,12 +810,16 @@ class NotificationAdmin(UnfoldModelAdmin):
     actions = ['mark_as_read', 'mark_as_unread']
     
     def mark_as_read(self, request, queryset):
+        user_ids = set(queryset.values_list('user_id', flat=True))
         updated = queryset.update(is_read=True)
+        Notification.sync_unread_count(user_ids)
         self.message_user(request, f'{updated} notifications marked as read.')
     mark_as_read.short_description = "Mark selected notifications as read"
     
     def mark_as_unread(self, request, queryset):
+        user_ids = set(queryset.values_list('user_id', flat=True))
         updated = queryset.update(is_read=False)
+        Notification.sync_unread_count(user_ids)
         self.message_user(request, f'{updated} notifications marked as unread.')
     mark_as_unread.short_description = "Mark selected notifications as unread"
 
@@ -2,6 +2,7 @@ import logging
 from datetime import datetime
 
 from django.db import transaction
+from django.db.models import Max, Min
 from django.utils import timezone
 
 from .models import (
@@ -111,6 +112,68 @@ def resolve_employee_for_punch(device, biometric_id, punch_time, device_user_id=
     return None, 'no_matching_employee'
 
 
+class PunchBatchLookup:
+    """
+    Lookups record_raw_punch runs per punch, prefetched for a batch from one device.
+
+    Existing raw logs, device mappings, biometric assignment history and
+    current biometric/employee IDs are each loaded with one query, so
+    resolving N punches no longer costs several queries per punch.
+    """
+
+    def __init__(self, device, punches):
+        biometric_ids = {punch['biometric_id'] for punch in punches}
+        device_user_ids = {punch['device_user_id'] for punch in punches}
+        employee_ids = {punch['employee_id'] for punch in punches if punch['employee_id']} | device_user_ids
+
+        self.existing_logs = {
+            (log.biometric_id, log.punch_time): log
+            for log in ESSLAttendanceLog.objects.filter(
+                device=device,
+                biometric_id__in=biometric_ids,
+                punch_time__in={punch['punch_time'] for punch in punches},
+            ).defer('raw_payload')
+        }
+        self.device_mappings = {
+            mapping.device_user_id: mapping.system_user
+            for mapping in DeviceUser.objects.filter(
+                device=device,
+                device_user_id__in=device_user_ids,
+                is_mapped=True,
+                system_user__isnull=False,
+            ).select_related('system_user')
+        }
+        self.history = {}
+        for assignment in (
+            BiometricAssignmentHistory.objects.filter(new_biometric_id__in=biometric_ids)
+            .select_related('employee')
+            .order_by('-created_at')
+        ):
+            self.history.setdefault(assignment.new_biometric_id, []).append(assignment)
+        self.by_biometric_id = CustomUser.objects.in_bulk(biometric_ids, field_name='biometric_id')
+        self.by_employee_id = CustomUser.objects.in_bulk(employee_ids, field_name='employee_id')
+
+    def resolve(self, biometric_id, punch_time, device_user_id, employee_id):
+        """Same precedence as resolve_employee_for_punch, answered from the prefetched rows"""
+        if device_user_id in self.device_mappings:
+            return self.device_mappings[device_user_id], 'device_user_mapping'
+
+        for assignment in self.history.get(biometric_id, []):
+            if assignment.created_at <= punch_time:
+                return assignment.employee, 'biometric_assignment_history'
+
+        if biometric_id in self.by_biometric_id:
+            return self.by_biometric_id[biometric_id], 'unique_current_biometric_id'
+
+        if employee_id and employee_id in self.by_employee_id:
+            return self.by_employee_id[employee_id], 'employee_id_fallback'
+
+        if device_user_id in self.by_employee_id:
+            return self.by_employee_id[device_user_id], 'device_user_id_employee_fallback'
+
+        return None, 'no_matching_employee'
+
+
 def create_unmatched_punch(device, biometric_id, punch_time, punch_type, source, device_user_id='', raw_payload=None, reason='no_matching_employee'):
     punch, _ = UnmatchedBiometricPunch.objects.get_or_create(
         device=device,
@@ -135,11 +198,12 @@ def record_raw_punch(device, biometric_id, punch_time, punch_type='in', source='
     biometric_id = str(biometric_id)
     device_user_id = str(device_user_id or biometric_id)
 
+    # The duplicate is only referenced, so leave its raw payload in the database
     existing_log = ESSLAttendanceLog.objects.filter(
         device=device,
         biometric_id=biometric_id,
         punch_time=punch_time,
-    ).first()
+    ).defer('raw_payload').first()
     if existing_log:
         DuplicatePunchAttempt.objects.create(
             existing_log=existing_log,
@@ -197,6 +261,12 @@ def process_raw_log_to_attendance(raw_log, source='zkteco_fetch', changed_by=Non
             'source': source,
         },
     )
+    # Every raw log of the day is settled by this call, so a batch that saves
+    # several punches for one day only needs to process its last one
+    logs = ESSLAttendanceLog.objects.filter(
+        user=raw_log.user,
+        punch_time__date=raw_log.punch_time.date(),
+    )
 
     if attendance.is_locked and not (changed_by and getattr(changed_by, 'is_superuser', False)):
         AttendanceAuditLog.objects.create(
@@ -217,25 +287,19 @@ def process_raw_log_to_attendance(raw_log, source='zkteco_fetch', changed_by=Non
             changed_by=changed_by,
             reason='Raw punch received for locked payroll month; final attendance not changed.',
         )
-        raw_log.is_processed = True
-        raw_log.save(update_fields=['is_processed'])
+        logs.update(is_processed=True)
         return attendance
 
     if attendance.manual_override and source not in ['manual', 'admin_correction']:
         attendance.needs_review = True
         attendance.review_reason = 'manual_override_preserved'
         attendance.save(update_fields=['needs_review', 'review_reason', 'updated_at'])
-        raw_log.is_processed = True
-        raw_log.save(update_fields=['is_processed'])
+        logs.update(is_processed=True)
         return attendance
 
-    logs = ESSLAttendanceLog.objects.filter(
-        user=raw_log.user,
-        punch_time__date=raw_log.punch_time.date(),
-    ).order_by('punch_time')
-
-    first_log = logs.first()
-    last_log = logs.last()
+    # Earliest and latest punch of the day in one query
+    punch_range = logs.aggregate(first=Min('punch_time'), last=Max('punch_time'))
+    first_punch, last_punch = punch_range['first'], punch_range['last']
     old_values = {
         'check_in': attendance.check_in_time,
         'check_out': attendance.check_out_time,
@@ -243,8 +307,8 @@ def process_raw_log_to_attendance(raw_log, source='zkteco_fetch', changed_by=Non
         'day_status': attendance.day_status,
     }
 
-    attendance.check_in_time = first_log.punch_time if first_log else attendance.check_in_time
-    attendance.check_out_time = last_log.punch_time if first_log and last_log and last_log.punch_time != first_log.punch_time else None
+    attendance.check_in_time = first_punch if first_punch else attendance.check_in_time
+    attendance.check_out_time = last_punch if first_punch and last_punch != first_punch else None
     attendance.device = raw_log.device or attendance.device
     attendance.source = source
     attendance.needs_review = bool(attendance.check_in_time and not attendance.check_out_time)
@@ -273,3 +337,95 @@ def process_raw_log_to_attendance(raw_log, source='zkteco_fetch', changed_by=Non
 
     logs.update(is_processed=True)
     return attendance
+
+
+@transaction.atomic
+def record_raw_punches(device, punches, source='zkteco_fetch'):
+    """
+    Batch form of record_raw_punch for many punches from one device.
+
+    punches are dicts with biometric_id, punch_time, punch_type and
+    optionally device_user_id, employee_id and raw_payload. Raw logs and
+    duplicate attempts are bulk inserted, and attendance is recalculated
+    once per employee and day instead of once per punch. Returns one
+    (raw_log, created, result) tuple per punch, in order.
+    """
+    normalized = []
+    for punch in punches:
+        punch_time = normalize_timestamp(punch['punch_time'])
+        raw_payload = punch.get('raw_payload')
+        biometric_id = str(punch['biometric_id'])
+        normalized.append({
+            'biometric_id': biometric_id,
+            'device_user_id': str(punch.get('device_user_id') or biometric_id),
+            'employee_id': str(punch.get('employee_id') or ''),
+            'punch_time': punch_time,
+            'punch_type': normalize_punch_type(
+                punch.get('punch_type', 'in'),
+                raw_payload.get('status') if isinstance(raw_payload, dict) else None,
+                punch_time,
+            ),
+            'raw_payload': raw_payload,
+        })
+    if not normalized:
+        return []
+
+    lookup = PunchBatchLookup(device, normalized)
+    results = []
+    new_logs = []
+    duplicates = []
+    for punch in normalized:
+        key = (punch['biometric_id'], punch['punch_time'])
+        existing_log = lookup.existing_logs.get(key)
+        if existing_log:
+            duplicates.append(DuplicatePunchAttempt(
+                existing_log=existing_log,
+                device=device,
+                source=source,
+                **{field: punch[field] for field in ('biometric_id', 'device_user_id', 'punch_time', 'punch_type', 'raw_payload')},
+            ))
+            results.append((existing_log, False, 'duplicate'))
+            continue
+
+        employee, match_reason = lookup.resolve(
+            punch['biometric_id'], punch['punch_time'], punch['device_user_id'], punch['employee_id']
+        )
+        raw_log = ESSLAttendanceLog(
+            device=device,
+            user=employee,
+            source=source,
+            is_processed=False,
+            **{field: punch[field] for field in ('biometric_id', 'device_user_id', 'punch_time', 'punch_type', 'raw_payload')},
+        )
+        # A repeat of this punch later in the same batch is a duplicate of this log
+        lookup.existing_logs[key] = raw_log
+        new_logs.append(raw_log)
+
+        if not employee:
+            create_unmatched_punch(
+                device=device,
+                biometric_id=punch['biometric_id'],
+                device_user_id=punch['device_user_id'],
+                punch_time=punch['punch_time'],
+                punch_type=punch['punch_type'],
+                source=source,
+                raw_payload=punch['raw_payload'],
+                reason=match_reason,
+            )
+            results.append((raw_log, True, 'unmatched'))
+        else:
+            results.append((raw_log, True, 'processed'))
+
+    ESSLAttendanceLog.objects.bulk_create(new_logs, batch_size=1000)
+    DuplicatePunchAttempt.objects.bulk_create(duplicates, batch_size=1000)
+
+    # Attendance is rebuilt from all of a day's raw logs, so one pass per
+    # employee and day covers every punch in the batch
+    latest_log_per_day = {}
+    for raw_log in new_logs:
+        if raw_log.user:
+            latest_log_per_day[(raw_log.user_id, raw_log.punch_time.date())] = raw_log
+    for raw_log in latest_log_per_day.values():
+        process_raw_log_to_attendance(raw_log, source=source)
+
+    return results
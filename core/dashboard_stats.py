@@ -0,0 +1,149 @@
+"""
+Precomputed dashboard statistics.
+
+The admin/HR dashboard aggregates across every user, attendance, leave and
+device row. Those tables change at human timescales, so the figures are
+computed by a periodic Celery task and served from the cache.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, FloatField, Q
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+
+from .models import CustomUser, Office, Device, Attendance, Leave
+import logging
+
+logger = logging.getLogger(__name__)
+
+ADMIN_DASHBOARD_STATS_CACHE_KEY = 'dashboard:admin_stats'
+# Outlives the 60s refresh schedule so a late beat never leaves a gap
+ADMIN_DASHBOARD_STATS_TIMEOUT = 180
+
+OPERATIONAL_STATUSES = ['active', 'notice_period']
+
+
+def percentage(part, total):
+    """SQL expression for part / total * 100, or 0 when total is zero"""
+    return Coalesce(
+        Cast(part, FloatField()) * 100.0 / NullIf(total, 0),
+        0.0,
+        output_field=FloatField(),
+    )
+
+
+def attendance_summary(queryset):
+    """Present/total counts and attendance rate for an Attendance queryset in one query"""
+    present = Count('id', filter=Q(status='present'))
+    return queryset.aggregate(
+        present=present,
+        total=Count('id'),
+        rate=percentage(present, Count('id')),
+    )
+
+
+def leave_summary(queryset):
+    """Pending/approved/total counts and approval rate for a Leave queryset in one query"""
+    approved = Count('id', filter=Q(status='approved'))
+    return queryset.aggregate(
+        pending=Count('id', filter=Q(status='pending')),
+        approved=approved,
+        total=Count('id'),
+        approval_rate=percentage(approved, Count('id')),
+    )
+
+
+def user_activation_summary(queryset):
+    """Operational/total user counts and activation rate for a CustomUser queryset in one query"""
+    active = Count('id', filter=Q(employment_status__in=OPERATIONAL_STATUSES))
+    return queryset.aggregate(
+        active=active,
+        total=Count('id'),
+        activation_rate=percentage(active, Count('id')),
+    )
+
+
+def compute_admin_dashboard_stats():
+    """Calculate comprehensive statistics for admin - operational employees"""
+    today = timezone.now().date()
+    last_month = today - timedelta(days=30)
+    operational_statuses = OPERATIONAL_STATUSES
+
+    total_employees = CustomUser.objects.filter(role='employee', employment_status__in=operational_statuses).count()
+    total_managers = CustomUser.objects.filter(role='manager', employment_status__in=operational_statuses).count()
+    total_hr = CustomUser.objects.filter(role='hr', employment_status__in=operational_statuses).count()
+    total_accountants = CustomUser.objects.filter(role='accountant', employment_status__in=operational_statuses).count()
+    total_offices = Office.objects.count()
+    total_devices = Device.objects.count()
+    active_devices = Device.objects.filter(is_active=True).count()
+
+    # Attendance statistics - operational employees only
+    attendance = attendance_summary(Attendance.objects.filter(
+        date=today,
+        user__employment_status__in=operational_statuses
+    ))
+    today_attendance = attendance['present']
+    total_today_records = attendance['total']
+
+    # Leave statistics
+    leaves = leave_summary(Leave.objects.all())
+    pending_leaves = leaves['pending']
+    approved_leaves = leaves['approved']
+    total_leaves = leaves['total']
+
+    # User statistics
+    users = user_activation_summary(CustomUser.objects.all())
+    active_users = users['active']
+    total_users = users['total']
+    inactive_users = total_users - active_users
+    lifecycle_counts = {
+        item['employment_status']: item['total']
+        for item in CustomUser.objects.values('employment_status').annotate(total=Count('id'))
+    }
+
+    # Growth statistics (comparing with last month)
+    last_month_employees = CustomUser.objects.filter(
+        role='employee',
+        date_joined__lt=last_month
+    ).count()
+    employee_growth = ((total_employees - last_month_employees) / last_month_employees * 100) if last_month_employees > 0 else 0
+
+    return {
+        'total_employees': total_employees,
+        'total_managers': total_managers,
+        'total_hr': total_hr,
+        'total_accountants': total_accountants,
+        'total_offices': total_offices,
+        'total_devices': total_devices,
+        'active_devices': active_devices,
+        'today_attendance': today_attendance,
+        'total_today_records': total_today_records,
+        'attendance_rate': round(attendance['rate'], 2),
+        'pending_leaves': pending_leaves,
+        'approved_leaves': approved_leaves,
+        'total_leaves': total_leaves,
+        'leave_approval_rate': round(leaves['approval_rate'], 2),
+        'active_users': active_users,
+        'inactive_users': inactive_users,
+        'total_users': total_users,
+        'lifecycle_counts': lifecycle_counts,
+        'employee_growth': round(employee_growth, 2),
+        'user_activation_rate': round(users['activation_rate'], 2),
+    }
+
+
+def refresh_admin_dashboard_stats():
+    """Recompute the admin dashboard statistics and store them in the cache"""
+    stats = compute_admin_dashboard_stats()
+    cache.set(ADMIN_DASHBOARD_STATS_CACHE_KEY, stats, ADMIN_DASHBOARD_STATS_TIMEOUT)
+    return stats
+
+
+def get_admin_dashboard_stats():
+    """Return the cached admin dashboard statistics, computing them on a miss"""
+    stats = cache.get(ADMIN_DASHBOARD_STATS_CACHE_KEY)
+    if stats is None:
+        logger.info("Admin dashboard stats cache miss; computing inline")
+        stats = refresh_admin_dashboard_stats()
+    return stats
@@ -26,23 +26,8 @@ class EmailNotificationService:
             if notification.is_email_sent:
                 return True
             
-            # Prepare email content
-            subject = f"[{notification.priority.upper()}] {notification.title}"
-            
-            # Create HTML email content
-            html_content = EmailNotificationService._create_html_email(notification)
-            text_content = EmailNotificationService._create_text_email(notification)
-            
-            # Create email message
-            msg = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[notification.user.email]
-            )
-            msg.attach_alternative(html_content, "text/html")
-            
             # Send email
+            msg = EmailNotificationService.build_notification_message(notification)
             msg.send()
             
             # Mark email as sent
@@ -55,6 +40,24 @@ class EmailNotificationService:
             logger.error(f"Error sending email for notification {notification.id}: {str(e)}")
             return False
     
+    @staticmethod
+    def build_notification_message(notification):
+        """Build the email message for a notification without sending it"""
+        subject = f"[{notification.priority.upper()}] {notification.title}"
+        
+        # Create HTML and plain text email content
+        html_content = EmailNotificationService._create_html_email(notification)
+        text_content = EmailNotificationService._create_text_email(notification)
+        
+        msg = EmailMultiAlternatives(
+            subject=subject,
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[notification.user.email]
+        )
+        msg.attach_alternative(html_content, "text/html")
+        return msg
+    
     @staticmethod
     def _create_html_email(notification):
         """Create HTML email content"""
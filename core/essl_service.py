@@ -107,56 +107,64 @@ class ESSLDeviceService:
     
     def _process_attendance_data(self, attendance_data):
         """Process raw attendance data from ESSL device"""
-        processed_count = 0
+        punches = []
+        for record in attendance_data.get('attendance_records', []):
+            try:
+                biometric_id = record.get('biometric_id')
+                punch_time_str = record.get('punch_time')
+                punch_type = record.get('punch_type', 'in')
+                
+                if not biometric_id or not punch_time_str:
+                    continue
+                
+                # Parse punch time
+                punch_time = datetime.fromisoformat(punch_time_str.replace('Z', '+00:00'))
+                punch_time = timezone.make_aware(punch_time)
+                
+                punches.append((str(biometric_id), punch_time, punch_type))
+                
+            except Exception as e:
+                logger.error(f"Error processing attendance record: {str(e)}")
+                continue
+        
+        if not punches:
+            return 0
         
         with transaction.atomic():
-            for record in attendance_data.get('attendance_records', []):
-                try:
-                    biometric_id = record.get('biometric_id')
-                    punch_time_str = record.get('punch_time')
-                    punch_type = record.get('punch_type', 'in')
-                    
-                    if not biometric_id or not punch_time_str:
-                        continue
-                    
-                    # Parse punch time
-                    punch_time = datetime.fromisoformat(punch_time_str.replace('Z', '+00:00'))
-                    punch_time = timezone.make_aware(punch_time)
-                    
-                    # Check if record already exists
-                    existing_log = ESSLAttendanceLog.objects.filter(
-                        device=self.device,
-                        biometric_id=biometric_id,
-                        punch_time=punch_time
-                    ).first()
-                    
-                    if existing_log:
-                        continue
-                    
-                    # Find user by biometric ID
-                    user = CustomUser.objects.filter(biometric_id=biometric_id).first()
-                    
-                    # Create ESSL attendance log
-                    essl_log = ESSLAttendanceLog.objects.create(
-                        device=self.device,
-                        biometric_id=biometric_id,
-                        user=user,
-                        punch_time=punch_time,
-                        punch_type=punch_type,
-                        is_processed=False
-                    )
-                    
-                    # Process attendance record
-                    if user:
-                        self._process_user_attendance(user, essl_log)
-                    
-                    processed_count += 1
-                    
-                except Exception as e:
-                    logger.error(f"Error processing attendance record: {str(e)}")
+            # One query each for existing logs and users instead of two per record
+            biometric_ids = {biometric_id for biometric_id, _, _ in punches}
+            seen = set(
+                ESSLAttendanceLog.objects.filter(
+                    device=self.device,
+                    biometric_id__in=biometric_ids,
+                    punch_time__in={punch_time for _, punch_time, _ in punches},
+                ).values_list('biometric_id', 'punch_time')
+            )
+            users = CustomUser.objects.in_bulk(biometric_ids, field_name='biometric_id')
+            
+            new_logs = []
+            for biometric_id, punch_time, punch_type in punches:
+                # Skip records already stored, including repeats within this payload
+                if (biometric_id, punch_time) in seen:
                     continue
+                seen.add((biometric_id, punch_time))
+                new_logs.append(ESSLAttendanceLog(
+                    device=self.device,
+                    biometric_id=biometric_id,
+                    user=users.get(biometric_id),
+                    punch_time=punch_time,
+                    punch_type=punch_type,
+                    is_processed=False
+                ))
+            
+            ESSLAttendanceLog.objects.bulk_create(new_logs, batch_size=500)
+            
+            # Process attendance records
+            for essl_log in new_logs:
+                if essl_log.user:
+                    self._process_user_attendance(essl_log.user, essl_log)
         
-        return processed_count
+        return len(new_logs)
     
     def _process_user_attendance(self, user, essl_log):
         """Process attendance for a specific user"""
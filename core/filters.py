@@ -1,5 +1,8 @@
+import uuid
+
 import django_filters
 from django.db.models import Q
+from django_filters.rest_framework import DjangoFilterBackend
 from .models import (
     CustomUser, Attendance, Leave, Document, Notification, 
     Shift, EmployeeShiftAssignment, DeviceUser, Office, GeneratedDocument
@@ -63,7 +66,6 @@ class CustomUserFilter(django_filters.FilterSet):
             return queryset.filter(office__isnull=True)
         try:
             # Try to parse as UUID
-            import uuid
             office_uuid = uuid.UUID(value)
             return queryset.filter(office__id=office_uuid)
         except (ValueError, TypeError):
@@ -77,7 +79,6 @@ class CustomUserFilter(django_filters.FilterSet):
         
         # First try to filter by department ID (UUID)
         try:
-            import uuid
             department_uuid = uuid.UUID(value)
             # Filter users where department field contains the UUID
             return queryset.filter(department=department_uuid)
@@ -102,13 +103,14 @@ class CustomUserFilter(django_filters.FilterSet):
 class DeviceUserFilter(django_filters.FilterSet):
     """FilterSet for DeviceUser with proper filtering capabilities"""
     device = django_filters.CharFilter(method='filter_device')
+    device_id = django_filters.UUIDFilter(field_name='device_id')
     is_mapped = django_filters.BooleanFilter(field_name='is_mapped')
     device_user_privilege = django_filters.CharFilter(field_name='device_user_privilege')
     search = django_filters.CharFilter(method='filter_search')
     
     class Meta:
         model = DeviceUser
-        fields = ['device', 'is_mapped', 'device_user_privilege', 'search']
+        fields = ['device', 'device_id', 'is_mapped', 'device_user_privilege', 'search']
     
     def filter_device(self, queryset, name, value):
         """Custom device filter to handle UUID values"""
@@ -116,7 +118,6 @@ class DeviceUserFilter(django_filters.FilterSet):
             return queryset
         try:
             # Try to parse as UUID
-            import uuid
             device_uuid = uuid.UUID(value)
             return queryset.filter(device__id=device_uuid)
         except (ValueError, TypeError):
@@ -220,7 +221,6 @@ class ShiftFilter(django_filters.FilterSet):
         if not value:
             return queryset
         try:
-            import uuid
             office_uuid = uuid.UUID(value)
             return queryset.filter(office__id=office_uuid)
         except (ValueError, TypeError):
@@ -262,7 +262,6 @@ class EmployeeShiftAssignmentFilter(django_filters.FilterSet):
         if not value:
             return queryset
         try:
-            import uuid
             office_uuid = uuid.UUID(value)
             return queryset.filter(shift__office__id=office_uuid)
         except (ValueError, TypeError):
@@ -296,7 +295,6 @@ class GeneratedDocumentFilter(django_filters.FilterSet):
         if not value:
             return queryset
         try:
-            import uuid
             employee_uuid = uuid.UUID(value)
             return queryset.filter(employee__id=employee_uuid)
         except (ValueError, TypeError):
@@ -329,7 +327,6 @@ class GeneratedDocumentFilter(django_filters.FilterSet):
         if not value:
             return queryset
         try:
-            import uuid
             generated_by_uuid = uuid.UUID(value)
             return queryset.filter(generated_by__id=generated_by_uuid)
         except (ValueError, TypeError):
@@ -344,7 +341,6 @@ class GeneratedDocumentFilter(django_filters.FilterSet):
         if not value or value == 'all':
             return queryset
         try:
-            import uuid
             office_uuid = uuid.UUID(value)
             return queryset.filter(employee__office__id=office_uuid)
         except (ValueError, TypeError):
@@ -354,7 +350,6 @@ class GeneratedDocumentFilter(django_filters.FilterSet):
         if not value:
             return queryset
         try:
-            import uuid
             template_uuid = uuid.UUID(value)
             return queryset.filter(template__id=template_uuid)
         except (ValueError, TypeError):
@@ -378,3 +373,23 @@ class GeneratedDocumentFilter(django_filters.FilterSet):
             Q(generated_by__last_name__icontains=value) |
             Q(generated_by__username__icontains=value)
         )
+
+
+class SkipUnusedFilterSetMixin:
+    """
+    ViewSet mixin that bypasses DjangoFilterBackend when the request carries
+    none of the filterset's parameters. Building and validating the filterset
+    is pure overhead on unfiltered requests; search and ordering backends
+    still run as usual.
+    """
+
+    def filter_queryset(self, queryset):
+        filterset_class = getattr(self, 'filterset_class', None)
+        if filterset_class is None or self.request.query_params.keys() & filterset_class.base_filters.keys():
+            return super().filter_queryset(queryset)
+
+        for backend in self.filter_backends:
+            if issubclass(backend, DjangoFilterBackend):
+                continue
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
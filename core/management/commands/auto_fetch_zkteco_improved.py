@@ -190,13 +190,18 @@ class ImprovedAutoFetchService:
                 user_date_logs[key] = []
             user_date_logs[key].append(log)
         
+        # Resolve every employee in one query instead of one per user/date group
+        users = CustomUser.objects.in_bulk(
+            {str(user_id) for user_id, _ in user_date_logs},
+            field_name='employee_id'
+        )
+        
         # Process each user's logs for each date
         for (user_id, date), user_logs in user_date_logs.items():
             try:
                 # Find user in database
-                try:
-                    user = CustomUser.objects.get(employee_id=str(user_id))
-                except CustomUser.DoesNotExist:
+                user = users.get(str(user_id))
+                if user is None:
                     logger.warning(f"[WARNING] User with employee_id {user_id} not found")
                     error_count += 1
                     continue
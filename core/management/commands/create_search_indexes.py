@@ -0,0 +1,53 @@
+"""
+Management command to create PostgreSQL trigram indexes for employee search.
+
+Employee search filters with icontains, which PostgreSQL compiles to
+UPPER(column::text) LIKE UPPER('%term%'). A B-tree index cannot serve a
+leading wildcard, but a pg_trgm GIN index on the same UPPER() expression can,
+so these indexes turn the search from a sequential scan into an index lookup
+without changing its results.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.models import CustomUser
+
+SEARCH_FIELDS = ['first_name', 'last_name', 'employee_id', 'email']
+
+
+class Command(BaseCommand):
+    help = 'Create pg_trgm GIN indexes used by employee icontains search (PostgreSQL only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help='Drop the search indexes instead of creating them'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(
+                self.style.WARNING(f'Skipping: trigram indexes need PostgreSQL, not {connection.vendor}')
+            )
+            return
+
+        table = CustomUser._meta.db_table
+        with connection.cursor() as cursor:
+            if not options['drop']:
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+            for field in SEARCH_FIELDS:
+                index_name = f'{table}_{field}_trgm'
+                if options['drop']:
+                    cursor.execute(f'DROP INDEX IF EXISTS {index_name}')
+                    self.stdout.write(f'Dropped {index_name}')
+                else:
+                    cursor.execute(
+                        f'CREATE INDEX IF NOT EXISTS {index_name} ON {table} '
+                        f'USING gin ((UPPER({field}::text)) gin_trgm_ops)'
+                    )
+                    self.stdout.write(f'Created {index_name}')
+
+        self.stdout.write(self.style.SUCCESS('Employee search indexes are up to date'))
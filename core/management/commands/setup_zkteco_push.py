@@ -122,7 +122,7 @@ class Command(BaseCommand):
             
             # Test connectivity
             is_online = improved_zkteco_service.test_device_connectivity(
-                device.ip_address, device.port
+                device.ip_address, device.port, force=True
             )
             
             if is_online:
@@ -0,0 +1,38 @@
+"""
+Management command to backfill the denormalized unread notification counter.
+
+CustomUser.unread_notification_count is kept current by F() updates as
+notifications are created, read and deleted, but users that existed before
+the column was added start at 0. Run this once after deploying the column
+(and any time the counter is suspected to have drifted) to recount it from
+the notifications table.
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.models import CustomUser, Notification
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Recompute unread_notification_count for all users from their notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Number of users to recount per UPDATE (default {BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        user_ids = list(CustomUser.objects.order_by('pk').values_list('pk', flat=True))
+
+        for start in range(0, len(user_ids), batch_size):
+            Notification.sync_unread_count(user_ids[start:start + batch_size])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Synced unread notification counts for {len(user_ids)} users')
+        )
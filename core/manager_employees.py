@@ -0,0 +1,37 @@
+"""
+Cached employee lists for the document upload picker.
+
+Managers see the active employees of their own office; admin and HR see
+every office under the 'all' key. The lists change only when a user's
+office, role, active flag or displayed fields change, which signals.py
+watches to drop the affected entries.
+"""
+from django.core.cache import cache
+
+from .models import CustomUser
+
+MANAGER_EMPLOYEES_CACHE_KEY = 'mgr:emps:{office_id}'
+MANAGER_EMPLOYEES_CACHE_TIMEOUT = 300
+
+# CustomUser fields that decide membership in, or appear in, a cached list
+MANAGER_EMPLOYEES_FIELDS = ['office', 'role', 'is_active', 'first_name', 'last_name', 'employee_id', 'email']
+
+
+def get_manager_employees(office_id):
+    """Active employees of office_id, or of every office when office_id is 'all'"""
+    cache_key = MANAGER_EMPLOYEES_CACHE_KEY.format(office_id=office_id)
+    employees = cache.get(cache_key)
+    if employees is None:
+        queryset = CustomUser.objects.filter(role='employee', is_active=True)
+        if office_id != 'all':
+            queryset = queryset.filter(office_id=office_id)
+        employees = list(queryset.values('id', 'first_name', 'last_name', 'employee_id', 'email'))
+        cache.set(cache_key, employees, MANAGER_EMPLOYEES_CACHE_TIMEOUT)
+    return employees
+
+
+def invalidate_manager_employees_cache(office_ids):
+    """Drop the cached lists of the given offices and the all-offices list"""
+    keys = {MANAGER_EMPLOYEES_CACHE_KEY.format(office_id=office_id) for office_id in office_ids if office_id}
+    keys.add(MANAGER_EMPLOYEES_CACHE_KEY.format(office_id='all'))
+    cache.delete_many(list(keys))
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
@@ -214,6 +216,9 @@ class CustomUser(AbstractUser):
     # System Fields
     is_active = models.BooleanField(default=True)
     last_login_ip = models.GenericIPAddressField(null=True, blank=True)
+    unread_notification_count = models.PositiveIntegerField(
+        default=0, editable=False, help_text="Denormalized count of unread notifications"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -225,7 +230,10 @@ class CustomUser(AbstractUser):
             models.Index(fields=['role']),
             models.Index(fields=['employment_status']),
             models.Index(fields=['office', 'role']),
+            models.Index(fields=['role', 'office']),
+            models.Index(fields=['role', 'is_active']),
             models.Index(fields=['department']),
+            models.Index(fields=['office', 'last_name', 'id']),
         ]
 
     def __str__(self):
@@ -265,6 +273,21 @@ class CustomUser(AbstractUser):
                 })
 
     def save(self, *args, **kwargs):
+        # The unread counter is maintained by Notification.adjust_unread_count /
+        # sync_unread_count with F() updates; a full save from a stale instance
+        # must not write its old value back over them.
+        if (
+            not self._state.adding and not args
+            and not kwargs.get('force_insert') and kwargs.get('update_fields') is None
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name != 'unread_notification_count'
+            ]
+
         old_biometric_id = None
         if self.pk:
             try:
@@ -334,14 +357,19 @@ class CustomUser(AbstractUser):
     
     def get_full_name(self):
         """Return the user's full name"""
-        if self.first_name and self.last_name:
-            return f"{self.first_name} {self.last_name}"
-        elif self.first_name:
-            return self.first_name
-        elif self.last_name:
-            return self.last_name
+        return self.compose_full_name(self.first_name, self.last_name, self.email)
+
+    @staticmethod
+    def compose_full_name(first_name, last_name, email):
+        """get_full_name for column values read without a model instance"""
+        if first_name and last_name:
+            return f"{first_name} {last_name}"
+        elif first_name:
+            return first_name
+        elif last_name:
+            return last_name
         else:
-            return self.email or "Unknown User"
+            return email or "Unknown User"
 
     def set_employment_status(self, new_status, changed_by=None, remarks='', **extra_fields):
         """Change employment lifecycle status and keep an audit trail."""
@@ -724,6 +752,7 @@ class Attendance(models.Model):
             models.Index(fields=['user', 'date']),
             models.Index(fields=['date', 'status']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['-created_at', '-id']),
             models.Index(fields=['device', 'source']),
         ]
 
@@ -979,8 +1008,10 @@ class Leave(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', 'status']),
+            models.Index(fields=['status']),
             models.Index(fields=['start_date']),
             models.Index(fields=['end_date']),
+            models.Index(fields=['-created_at', '-id']),
         ]
 
     def __str__(self):
@@ -1011,6 +1042,12 @@ class Document(models.Model):
         ('other', 'Other'),
     ]
     
+    # Document types grouped by the categories exposed to employees
+    PERSONAL_DOCUMENT_TYPES = frozenset({
+        'aadhar_card', 'pan_card', 'voter_id', 'driving_license', 'passport', 'birth_certificate',
+    })
+    SALARY_DOCUMENT_TYPES = frozenset({'salary_slip', 'offer_letter'})
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     title = models.CharField(max_length=200)
@@ -1028,6 +1065,9 @@ class Document(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['document_type', 'user']),
+        ]
 
     def __str__(self):
         try:
@@ -1107,8 +1147,29 @@ class Notification(models.Model):
     
     def mark_as_read(self):
         """Mark notification as read"""
+        updated = Notification.objects.filter(pk=self.pk, is_read=False).update(
+            is_read=True, updated_at=timezone.now()
+        )
+        if updated:
+            Notification.adjust_unread_count([self.user_id], -1)
         self.is_read = True
-        self.save(update_fields=['is_read', 'updated_at'])
+    
+    @staticmethod
+    def adjust_unread_count(user_ids, delta):
+        """Atomically shift the denormalized unread counter for the given users"""
+        CustomUser.objects.filter(pk__in=user_ids).update(
+            unread_notification_count=Greatest(F('unread_notification_count') + delta, 0)
+        )
+    
+    @staticmethod
+    def sync_unread_count(user_ids):
+        """Recompute the denormalized unread counter from the notifications table"""
+        unread = Notification.objects.filter(
+            user=OuterRef('pk'), is_read=False
+        ).order_by().values('user').annotate(count=Count('pk')).values('count')
+        CustomUser.objects.filter(pk__in=user_ids).update(
+            unread_notification_count=Coalesce(Subquery(unread), 0)
+        )
     
     def mark_email_sent(self):
         """Mark email as sent"""
@@ -1821,6 +1882,10 @@ class Shift(models.Model):
         verbose_name_plural = "Shifts"
         ordering = ['office', 'start_time', 'name']
         unique_together = ['name', 'office']
+        indexes = [
+            # Serves the start_time/name ordering of a single office's shifts
+            models.Index(fields=['office', 'start_time', 'name'], name='shift_ord_idx'),
+        ]
 
     def __str__(self):
         try:
@@ -4,12 +4,54 @@ Notification Service for managing system notifications
 from django.utils import timezone
 from django.db.models import Q
 from django.conf import settings
+from django.core.cache import cache
 from datetime import timedelta
-from .models import Notification, CustomUser, Attendance, Leave, Resignation, Document
+from itertools import islice
+from .models import Notification, CustomUser, Attendance, Leave, Resignation, Document, Office
 import logging
 
 logger = logging.getLogger(__name__)
 
+EMAIL_CHUNK_SIZE = 200
+
+
+def chunked(iterable, size):
+    """Yield successive lists of at most ``size`` items from ``iterable``"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+TARGET_OFFICES_CACHE_KEY = 'notif:offices'
+TARGET_ROLES_CACHE_KEY = 'notif:roles'
+TARGET_OPTIONS_CACHE_TIMEOUT = 600
+
+
+def get_notification_target_offices():
+    """Offices available as notification targets, cached between requests"""
+    return cache.get_or_set(
+        TARGET_OFFICES_CACHE_KEY,
+        lambda: list(Office.objects.values('id', 'name')),
+        TARGET_OPTIONS_CACHE_TIMEOUT
+    )
+
+
+def get_notification_target_roles():
+    """Roles currently assigned to users, cached between requests"""
+    return cache.get_or_set(
+        TARGET_ROLES_CACHE_KEY,
+        lambda: list(CustomUser.objects.values_list('role', flat=True).distinct()),
+        TARGET_OPTIONS_CACHE_TIMEOUT
+    )
+
+
+def invalidate_notification_target_cache():
+    """Drop the cached notification target options"""
+    cache.delete_many([TARGET_OFFICES_CACHE_KEY, TARGET_ROLES_CACHE_KEY])
+
 
 def notification_emails_enabled():
     """Send notification emails only in the production environment."""
@@ -81,44 +123,55 @@ class NotificationService:
             return None
     
     @staticmethod
-    def create_bulk_notifications(users, title, message, **kwargs):
-        """Create notifications for multiple users"""
+    def create_bulk_notifications(user_ids, title, message, **kwargs):
+        """Create notifications for multiple users, given their ids"""
         from django.db import transaction
         
-        notifications = []
         send_email = kwargs.pop('send_email', False)
+        kwargs.setdefault('notification_type', 'system')
+        kwargs['action_text'] = kwargs.get('action_text') or ''
+        
+        notifications = [
+            Notification(user_id=user_id, title=title, message=message, **kwargs)
+            for user_id in user_ids
+        ]
         
-        # Use database transaction for better performance
+        # Insert all notifications in a single transaction with batched INSERTs;
+        # bulk_create skips post_save, so bump the unread counters here
         with transaction.atomic():
-            # Create all notifications first (only for active users)
-            for user in users:
-                # Skip inactive users
-                if not user.is_active:
-                    logger.info(f"Skipping notification for inactive user: {user.get_full_name()} ({user.email})")
-                    continue
-                    
-                notification = NotificationService.create_notification(
-                    user=user,
-                    title=title,
-                    message=message,
-                    send_email=False,
-                    **kwargs
-                )
-                if notification:
-                    notifications.append(notification)
+            Notification.objects.bulk_create(notifications, batch_size=500)
+            Notification.adjust_unread_count(user_ids, 1)
+        
+        logger.info(f"Created {len(notifications)} bulk notifications: {title}")
         
         # Send emails asynchronously if requested (don't block the response)
         if send_email and notifications:
-            try:
-                # Queue email sending as background task
-                from .tasks import send_bulk_notification_emails
-                send_bulk_notification_emails.delay([n.id for n in notifications])
-                logger.info(f"Queued {len(notifications)} emails for background sending")
-            except Exception as e:
-                logger.error(f"Failed to queue email sending: {e}")
+            NotificationService.queue_notification_emails([n.id for n in notifications])
         
         return notifications
     
+    @staticmethod
+    def queue_notification_emails(notification_ids, chunk_size=EMAIL_CHUNK_SIZE):
+        """Queue notification emails as a Celery group of chunked tasks.
+        
+        Returns the group result id, or None if nothing could be queued.
+        """
+        if not notification_ids:
+            return None
+        try:
+            from celery import group
+            from .tasks import send_notification_emails
+            
+            result = group(
+                send_notification_emails.s([str(notification_id) for notification_id in chunk])
+                for chunk in chunked(notification_ids, chunk_size)
+            ).apply_async()
+            logger.info(f"Queued {len(notification_ids)} emails for background sending")
+            return result.id
+        except Exception as e:
+            logger.error(f"Failed to queue email sending: {e}")
+            return None
+    
     @staticmethod
     def get_user_notifications(user, unread_only=False, notification_type=None, limit=None):
         """Get notifications for a user"""
@@ -167,6 +220,8 @@ class NotificationService:
             user=user,
             is_read=False
         ).update(is_read=True, updated_at=timezone.now())
+        if updated:
+            Notification.adjust_unread_count([user.pk], -updated)
         return updated
     
     @staticmethod
@@ -175,6 +230,8 @@ class NotificationService:
         try:
             notification = Notification.objects.get(id=notification_id, user=user)
             notification.delete()
+            if not notification.is_read:
+                Notification.sync_unread_count([notification.user_id])
             return True
         except Notification.DoesNotExist:
             return False
@@ -182,9 +239,12 @@ class NotificationService:
     @staticmethod
     def delete_expired_notifications():
         """Delete expired notifications"""
-        expired_count = Notification.objects.filter(
-            expires_at__lt=timezone.now()
-        ).delete()[0]
+        expired = Notification.objects.filter(expires_at__lt=timezone.now())
+        # Recount once for the affected users instead of per deleted row
+        user_ids = set(expired.filter(is_read=False).values_list('user_id', flat=True))
+        expired_count = expired.delete()[0]
+        if user_ids:
+            Notification.sync_unread_count(user_ids)
         logger.info(f"Deleted {expired_count} expired notifications")
         return expired_count
     
@@ -192,6 +252,7 @@ class NotificationService:
     def cleanup_old_notifications(days=30):
         """Clean up old notifications"""
         cutoff_date = timezone.now() - timedelta(days=days)
+        # Only read notifications are removed, so unread counters are unaffected
         old_count = Notification.objects.filter(
             created_at__lt=cutoff_date,
             is_read=True
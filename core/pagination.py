@@ -1,6 +1,161 @@
+import base64
+import json
+
+from django.core.paginator import Paginator
+from django.db.models import Count, Q, QuerySet, Window
+from django.db.models.query import ModelIterable
+from django.http import StreamingHttpResponse
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import JSONRenderer
+
+
+class WindowCountPaginator(Paginator):
+    """
+    Paginator that reads the total from a COUNT(*) OVER () on the page query.
+
+    Django's Paginator runs COUNT(*) and then the page slice, evaluating the
+    filters twice. Here the page rows carry the total, so a valid page costs
+    one query. Pages past the end, non-numeric pages, distinct querysets and
+    anything that is not a plain model queryset go through the stock Paginator.
+    """
+
+    def page(self, number):
+        if (
+            'count' in self.__dict__
+            or self.orphans
+            or not isinstance(self.object_list, QuerySet)
+            or self.object_list._iterable_class is not ModelIterable
+            or self.object_list.query.is_sliced
+            # The window counts rows before DISTINCT removes duplicates
+            or self.object_list.query.distinct
+        ):
+            return super().page(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            return super().page(number)
+        if number < 1:
+            return super().page(number)
+
+        bottom = (number - 1) * self.per_page
+        rows = list(
+            self.object_list.annotate(_total_count=Window(expression=Count('pk')))[bottom:bottom + self.per_page]
+        )
+        if rows:
+            self.__dict__['count'] = rows[0]._total_count
+        elif number == 1:
+            self.__dict__['count'] = 0
+        else:
+            return super().page(number)
+        return self._get_page(rows, number, self)
+
 
 class StandardResultsSetPagination(PageNumberPagination):
+    django_paginator_class = WindowCountPaginator
     page_size = 25
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+def row_value(row, name):
+    """Read a column from a model instance or a .values() dict"""
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def paginate_with_total(queryset, page, page_size):
+    """
+    Return (rows, total_count) for a page of queryset in a single query.
+
+    The total comes back on every row as a COUNT(*) OVER () window aggregate,
+    so the filters are evaluated once instead of once for COUNT and again for
+    the slice. Only a page past the end needs a separate count.
+    """
+    page = max(page, 1)
+    start = (page - 1) * page_size
+    if queryset.query.distinct:
+        # The window counts rows before DISTINCT removes duplicates
+        return list(queryset[start:start + page_size]), queryset.count()
+    rows = list(
+        queryset.annotate(_total_count=Window(expression=Count('pk')))[start:start + page_size]
+    )
+    if rows:
+        return rows, row_value(rows[0], '_total_count')
+    return rows, (queryset.count() if start else 0)
+
+
+def encode_cursor(values):
+    """Encode the ordering values of the last row on a page as an opaque cursor"""
+    raw = json.dumps([str(value) for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor, length):
+    """Decode a cursor from encode_cursor; raises ValueError if it is malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (TypeError, UnicodeError, json.JSONDecodeError, base64.binascii.Error) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def keyset_paginate(queryset, ordering, cursor, page_size):
+    """
+    Return (rows, next_cursor) for the page after cursor.
+
+    ordering is a (field, tiebreaker) pair such as ('-created_at', '-id');
+    both must share a direction and the tiebreaker must be unique. Rows are
+    fetched with a WHERE on the ordering key instead of OFFSET, so deep pages
+    cost the same as the first. next_cursor is None on the last page.
+    """
+    field, tiebreaker = (name.lstrip('-') for name in ordering)
+    lookup = 'lt' if ordering[0].startswith('-') else 'gt'
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        value, last_id = decode_cursor(cursor, 2)
+        queryset = queryset.filter(
+            Q(**{f'{field}__{lookup}': value}) |
+            Q(**{field: value, f'{tiebreaker}__{lookup}': last_id})
+        )
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor([row_value(last, field), row_value(last, tiebreaker)])
+    return rows, next_cursor
+
+
+def keyset_total(queryset, rows, cursor, next_cursor):
+    """
+    Total row count for a keyset page from keyset_paginate.
+
+    When the first page already holds every row the total is its length and
+    no COUNT query is needed.
+    """
+    if not cursor and next_cursor is None:
+        return len(rows)
+    return queryset.count()
+
+
+def streaming_list_response(queryset, serializer, chunk_size=500):
+    """
+    Stream an unpaginated list as a JSON array, one serialized row at a time.
+
+    Rows are read with QuerySet.iterator(), so neither the model instances
+    nor their representations are all held in memory at once. serializer
+    is a single-object serializer instance whose to_representation renders
+    each row.
+    """
+    renderer = JSONRenderer()
+
+    def render():
+        yield b'['
+        for index, instance in enumerate(queryset.iterator(chunk_size=chunk_size)):
+            if index:
+                yield b','
+            yield renderer.render(serializer.to_representation(instance))
+        yield b']'
+
+    return StreamingHttpResponse(render(), content_type='application/json')
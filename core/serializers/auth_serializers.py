@@ -419,6 +419,47 @@ class ManagerEmployeeListSerializer(serializers.ModelSerializer):
     def get_full_name(self, obj):
         return obj.get_full_name()
 
+    # Columns for .values() on the manager team list, which renders rows with
+    # represent_values instead of instantiating a serializer field per column
+    VALUES_FIELDS = (
+        'id', 'username', 'email', 'first_name', 'last_name', 'role',
+        'employee_id', 'biometric_id', 'phone', 'profile_picture',
+        'office', 'office__name', 'department', 'department__name',
+        'designation', 'designation__name', 'joining_date',
+        'employment_status', 'is_active',
+    )
+
+    @classmethod
+    def represent_values(cls, row, request=None):
+        """Render a VALUES_FIELDS dict with the same keys and values as to_representation"""
+        picture = row['profile_picture']
+        if picture:
+            picture = CustomUser._meta.get_field('profile_picture').storage.url(picture)
+            if request is not None:
+                picture = request.build_absolute_uri(picture)
+        data = {
+            'id': str(row['id']),
+            'username': row['username'],
+            'email': row['email'],
+            'first_name': row['first_name'],
+            'last_name': row['last_name'],
+            'full_name': CustomUser.compose_full_name(row['first_name'], row['last_name'], row['email']),
+            'role': row['role'],
+            'employee_id': row['employee_id'],
+            'biometric_id': row['biometric_id'],
+            'phone': row['phone'],
+            'profile_picture': picture or None,
+            'joining_date': row['joining_date'].isoformat() if row['joining_date'] else None,
+            'employment_status': row['employment_status'],
+            'is_active': row['is_active'],
+        }
+        for relation in ('office', 'department', 'designation'):
+            data[relation] = row[relation]
+            # The serializer skips a dotted-source name when the relation is unset
+            if row[relation] is not None:
+                data[f'{relation}_name'] = row[f'{relation}__name']
+        return data
+
 
 class HREmployeeDetailSerializer(CustomUserSerializer):
     """HR detail serializer with masked government and bank identifiers."""
@@ -588,6 +629,17 @@ class LightweightUserSummarySerializer(serializers.ModelSerializer):
             'email', 'office_name', 'department_name', 'designation_name'
         ]
 
+    # Columns the payload reads, for .only() on querysets that nest this serializer
+    QUERY_FIELDS = (
+        'id', 'first_name', 'last_name', 'employee_id', 'email',
+        'office__name', 'department__name', 'designation__name',
+    )
+
+    @classmethod
+    def only_fields(cls, prefix):
+        """Return QUERY_FIELDS as lookups relative to the given relation"""
+        return [f'{prefix}__{field}' for field in cls.QUERY_FIELDS]
+
 class UserProfileSerializer(serializers.ModelSerializer):
     """Serializer for user profile updates"""
     department_name = serializers.SerializerMethodField()
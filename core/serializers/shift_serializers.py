@@ -58,8 +58,15 @@ class ShiftSerializer(serializers.ModelSerializer):
 
     def get_employee_count(self, obj):
         """Get number of employees assigned to this shift"""
+        if hasattr(obj, 'active_employee_count'):
+            return obj.active_employee_count
         return obj.employee_assignments.filter(is_active=True).count()
 
+# Same output formats as the serializer's own fields, for represent_values
+ASSIGNMENT_DATETIME_FIELD = DateTimeField()
+ASSIGNMENT_TIME_FIELD = serializers.TimeField()
+
+
 class EmployeeShiftAssignmentSerializer(serializers.ModelSerializer):
     """Serializer for EmployeeShiftAssignment model"""
     employee_name = serializers.CharField(source='employee.get_full_name', read_only=True)
@@ -73,3 +80,32 @@ class EmployeeShiftAssignmentSerializer(serializers.ModelSerializer):
         model = EmployeeShiftAssignment
         fields = '__all__'
         read_only_fields = ('id', 'created_at', 'updated_at')
+
+    # Columns for .values() when rendering assignments with represent_values
+    VALUES_FIELDS = (
+        'id', 'employee', 'employee__first_name', 'employee__last_name', 'employee__email',
+        'shift', 'shift__name', 'shift__office', 'shift__office__name',
+        'shift__start_time', 'shift__end_time', 'assigned_by', 'is_active',
+        'created_at', 'updated_at',
+    )
+
+    @classmethod
+    def represent_values(cls, row):
+        """Render a VALUES_FIELDS dict with the same keys and values as to_representation"""
+        return {
+            'id': str(row['id']),
+            'employee_name': CustomUser.compose_full_name(
+                row['employee__first_name'], row['employee__last_name'], row['employee__email']
+            ),
+            'shift_name': row['shift__name'],
+            'office_name': row['shift__office__name'],
+            'office_id': str(row['shift__office']),
+            'shift_start_time': ASSIGNMENT_TIME_FIELD.to_representation(row['shift__start_time']),
+            'shift_end_time': ASSIGNMENT_TIME_FIELD.to_representation(row['shift__end_time']),
+            'is_active': row['is_active'],
+            'created_at': ASSIGNMENT_DATETIME_FIELD.to_representation(row['created_at']),
+            'updated_at': ASSIGNMENT_DATETIME_FIELD.to_representation(row['updated_at']),
+            'employee': row['employee'],
+            'shift': row['shift'],
+            'assigned_by': row['assigned_by'],
+        }
@@ -1,14 +1,16 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 from .models import (
-    CustomUser, Attendance, Leave, Document, Notification, AttendanceLog, Resignation, Device
+    CustomUser, Attendance, Leave, Document, Notification, AttendanceLog, Resignation, Device, Office,
+    Department, Designation
 )
 from .notification_service import (
     notify_attendance_late, notify_employee_absent, notify_leave_request,
     notify_leave_decision, notify_resignation_request, notify_device_offline,
-    notify_system_alert, RoleBasedNotificationService
+    notify_system_alert, RoleBasedNotificationService, invalidate_notification_target_cache
 )
+from .manager_employees import MANAGER_EMPLOYEES_FIELDS, invalidate_manager_employees_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -96,6 +98,55 @@ def create_welcome_notification(sender, instance, created, **kwargs):
             logger.error(f"Error creating welcome notification for {instance.get_full_name()}: {e}")
 
 
+@receiver(post_save, sender=Notification)
+def update_unread_notification_count(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the user's denormalized unread notification counter in step"""
+    if created:
+        if not instance.is_read:
+            Notification.adjust_unread_count([instance.user_id], 1)
+    elif update_fields is None or 'is_read' in update_fields:
+        # The previous read state isn't known here, so recount for this user
+        Notification.sync_unread_count([instance.user_id])
+
+
+@receiver(post_save, sender=Office)
+@receiver(post_delete, sender=Office)
+def invalidate_office_target_options(sender, instance, **kwargs):
+    """Refresh cached notification target offices when offices change"""
+    invalidate_notification_target_cache()
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_role_target_options(sender, instance, update_fields=None, **kwargs):
+    """Refresh cached notification target roles when a user's role may have changed"""
+    if update_fields is not None and 'role' not in update_fields:
+        return
+    invalidate_notification_target_cache()
+
+
+@receiver(pre_save, sender=CustomUser)
+def remember_previous_office(sender, instance, update_fields=None, **kwargs):
+    """Note the office a user is saved away from so both offices' lists are refreshed"""
+    instance._previous_office_id = None
+    if instance._state.adding or (update_fields is not None and 'office' not in update_fields):
+        return
+    instance._previous_office_id = (
+        CustomUser.objects.filter(pk=instance.pk).values_list('office_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_manager_employee_options(sender, instance, update_fields=None, **kwargs):
+    """Drop the cached document-upload employee lists of the user's old and new office"""
+    if update_fields is not None and not set(update_fields) & set(MANAGER_EMPLOYEES_FIELDS):
+        return
+    invalidate_manager_employees_cache([
+        instance.office_id, getattr(instance, '_previous_office_id', None)
+    ])
+
+
 @receiver(post_save, sender=Resignation)
 def create_resignation_notification(sender, instance, created, **kwargs):
     """Create notifications for resignation requests"""
@@ -113,6 +164,34 @@ def create_resignation_notification(sender, instance, created, **kwargs):
         )
 
 
+@receiver(post_save, sender=Resignation)
+@receiver(post_delete, sender=Resignation)
+def invalidate_resignation_stats(sender, instance, **kwargs):
+    """Retire every cached resignation stats entry by bumping the version key"""
+    from django.core.cache import cache
+    from .views.employee_views import RESIGNATION_STATS_VERSION_KEY
+    
+    try:
+        cache.incr(RESIGNATION_STATS_VERSION_KEY)
+    except ValueError:
+        cache.set(RESIGNATION_STATS_VERSION_KEY, 1, None)
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=Designation)
+@receiver(post_delete, sender=Designation)
+def invalidate_dropdown_cache(sender, instance, **kwargs):
+    """Retire cached department/designation dropdown responses by bumping the version key"""
+    from django.core.cache import cache
+    from .views.auth_views import DROPDOWN_CACHE_VERSION_KEY
+    
+    try:
+        cache.incr(DROPDOWN_CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(DROPDOWN_CACHE_VERSION_KEY, 1, None)
+
+
 @receiver(post_save, sender=Device)
 def create_device_notification(sender, instance, created, **kwargs):
     """Create notifications for device status changes"""
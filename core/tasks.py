@@ -2,15 +2,52 @@
 Celery tasks for background processing
 """
 from celery import shared_task
+from django.core.mail import get_connection
 from django.utils import timezone
 
 from .models import AsyncJob, CustomUser, Device, Notification, Salary, SalaryTemplate
 from .email_service import EmailNotificationService
 import logging
+import os
+import smtplib
 from decimal import Decimal
 
 logger = logging.getLogger(__name__)
 
+# One mail connection per worker process, reused across task runs so bulk
+# sends don't pay a TCP/TLS handshake per chunk
+_mail_connection = None
+_mail_connection_pid = None
+
+
+def _get_mail_connection():
+    global _mail_connection, _mail_connection_pid
+    pid = os.getpid()
+    if _mail_connection is None or _mail_connection_pid != pid:
+        _mail_connection = get_connection()
+        _mail_connection_pid = pid
+    _mail_connection.open()
+    return _mail_connection
+
+
+def _reset_mail_connection():
+    global _mail_connection
+    if _mail_connection is not None:
+        try:
+            _mail_connection.close()
+        except Exception:
+            pass
+    _mail_connection = None
+
+
+def _send_mail_message(message):
+    """Send one message over the shared connection, reconnecting once if the server dropped it"""
+    try:
+        return bool(_get_mail_connection().send_messages([message]))
+    except smtplib.SMTPServerDisconnected:
+        _reset_mail_connection()
+        return bool(_get_mail_connection().send_messages([message]))
+
 
 def _get_job(job_id):
     return AsyncJob.objects.get(id=job_id)
@@ -180,6 +217,15 @@ def salary_bulk_create_task(self, job_id):
         raise
 
 
+@shared_task
+def refresh_admin_dashboard_stats():
+    """Periodically recompute the cached admin dashboard statistics"""
+    from .dashboard_stats import refresh_admin_dashboard_stats as refresh
+
+    stats = refresh()
+    return {'total_users': stats['total_users']}
+
+
 @shared_task
 def broadcast_attendance_update_task(attendance_data):
     from .consumers import broadcast_attendance_update_sync
@@ -190,6 +236,26 @@ def broadcast_attendance_update_task(attendance_data):
         logger.warning("Attendance broadcast failed: %s", exc)
 
 
+@shared_task
+def broadcast_resignation_update_task(resignation_id):
+    from .consumers import broadcast_resignation_update_sync
+    from .models import Resignation
+    from .serializers import ResignationSerializer
+
+    try:
+        resignation = Resignation.objects.select_related(
+            'user', 'user__office', 'user__department', 'user__designation', 'approved_by'
+        ).get(pk=resignation_id)
+    except Resignation.DoesNotExist:
+        logger.warning("Resignation broadcast skipped; resignation %s not found", resignation_id)
+        return
+
+    try:
+        broadcast_resignation_update_sync(ResignationSerializer(resignation).data)
+    except Exception:
+        logger.exception("Resignation broadcast failed id=%s", resignation_id)
+
+
 @shared_task
 def send_notification_email(notification_id, urgent=False):
     try:
@@ -215,36 +281,39 @@ def send_notification_email(notification_id, urgent=False):
 
 
 @shared_task
-def send_bulk_notification_emails(notification_ids):
+def send_notification_emails(notification_ids):
     """
-    Send emails for bulk notifications in the background
+    Send emails for one chunk of bulk notifications over the worker's shared mail connection
     """
-    try:
-        notifications = Notification.objects.filter(id__in=notification_ids)
-        sent_count = 0
-        failed_count = 0
-        
-        for notification in notifications:
-            # Only send emails to active users
-            if notification.user.email and not notification.is_email_sent and notification.user.is_active:
-                try:
-                    EmailNotificationService.send_notification_email(notification)
-                    notification.is_email_sent = True
-                    notification.save(update_fields=['is_email_sent'])
-                    sent_count += 1
-                except Exception as e:
-                    logger.error(f"Failed to send email for notification {notification.id}: {e}")
-                    failed_count += 1
-            elif not notification.user.is_active:
-                logger.info(f"Skipping email for inactive user: {notification.user.get_full_name()} ({notification.user.email})")
-        
-        logger.info(f"Email sending completed: {sent_count} sent, {failed_count} failed")
-        return {
-            'sent': sent_count,
-            'failed': failed_count,
-            'total': len(notification_ids)
-        }
-        
-    except Exception as e:
-        logger.error(f"Error in send_bulk_notification_emails task: {e}")
-        return {'error': str(e)}
+    notifications = list(
+        Notification.objects.select_related('user', 'created_by').filter(
+            id__in=notification_ids,
+            is_email_sent=False,
+            user__is_active=True,
+        ).exclude(user__email='')
+    )
+    if not notifications:
+        return {'sent': 0, 'failed': 0, 'total': len(notification_ids)}
+
+    # Send one message at a time so only the notifications the server
+    # actually accepted are marked sent; the rest stay pending for a retry
+    sent_ids = []
+    for notification in notifications:
+        try:
+            message = EmailNotificationService.build_notification_message(notification)
+            if _send_mail_message(message):
+                sent_ids.append(notification.id)
+        except Exception:
+            _reset_mail_connection()
+            logger.exception("Failed to send notification email id=%s", notification.id)
+
+    if sent_ids:
+        Notification.objects.filter(id__in=sent_ids).update(is_email_sent=True, updated_at=timezone.now())
+    sent_count = len(sent_ids)
+
+    logger.info("Notification email chunk completed: %s sent of %s", sent_count, len(notifications))
+    return {
+        'sent': sent_count,
+        'failed': len(notifications) - sent_count,
+        'total': len(notification_ids)
+    }
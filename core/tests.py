@@ -1,11 +1,36 @@
-from datetime import timedelta
+import smtplib
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+from unittest import mock
 
-from django.test import TestCase
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework.test import APIClient
 
-from .models import CustomUser, Resignation
+import fetch_all_devices
+
+from .attendance_processing import record_raw_punches
+from .essl_service import ESSLDeviceService
+from .manager_employees import MANAGER_EMPLOYEES_CACHE_KEY, get_manager_employees
+from .models import (
+    Attendance,
+    AttendanceAuditLog,
+    CustomUser,
+    Device,
+    DuplicatePunchAttempt,
+    ESSLAttendanceLog,
+    Notification,
+    Office,
+    Resignation,
+)
+from .notification_service import NotificationService
+from .pagination import WindowCountPaginator, paginate_with_total
+from .tasks import _reset_mail_connection, send_notification_emails
 
 
 class ResignationSubmissionTests(TestCase):
@@ -80,3 +105,477 @@ class ResignationSubmissionTests(TestCase):
         employee.refresh_from_db()
         self.assertEqual(employee.resignation_date, past_date)
         self.assertEqual(employee.last_working_date, past_date + timedelta(days=30))
+
+
+class RejectingEmailBackend(locmem.EmailBackend):
+    """Test backend whose server refuses mail addressed to reject@ recipients"""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(address.startswith('reject@') for address in message.to):
+                raise smtplib.SMTPRecipientsRefused({message.to[0]: (550, b'Rejected')})
+        return super().send_messages(messages)
+
+
+class BulkNotificationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(
+            username='admin@example.com',
+            email='admin@example.com',
+            password='test-pass-123',
+            role='admin',
+            employee_id='ADM001',
+        )
+
+    def test_create_bulk_targets_only_active_users(self):
+        active = CustomUser.objects.create_user(
+            username='active@example.com',
+            email='active@example.com',
+            password='test-pass-123',
+            role='employee',
+            employee_id='EMP001',
+        )
+        CustomUser.objects.create_user(
+            username='inactive@example.com',
+            email='inactive@example.com',
+            password='test-pass-123',
+            role='employee',
+            employee_id='EMP002',
+            is_active=False,
+        )
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.post(
+            reverse('core:notification-create-bulk'),
+            {
+                'target_type': 'role',
+                'roles': ['employee'],
+                'title': 'Office closed',
+                'message': 'The office is closed tomorrow.',
+            },
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['target_info']['user_count'], 1)
+        self.assertEqual(
+            list(Notification.objects.filter(title='Office closed').values_list('user_id', flat=True)),
+            [active.id],
+        )
+
+    def test_unread_count_tracks_bulk_create_and_mark_read(self):
+        employee = CustomUser.objects.create_user(
+            username='employee@example.com',
+            email='employee@example.com',
+            password='test-pass-123',
+            role='employee',
+            employee_id='EMP001',
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.client.post(
+            reverse('core:notification-create-bulk'),
+            {'target_type': 'users', 'users': [employee.id], 'title': 'Hello', 'message': 'World'},
+            format='json',
+        )
+        employee.refresh_from_db()
+        self.assertEqual(employee.unread_notification_count, 1)
+
+        self.client.force_authenticate(user=employee)
+        response = self.client.get(reverse('core:notification-unread-count'))
+        self.assertEqual(response.data['unread_count'], 1)
+
+        notification = Notification.objects.get(user=employee, title='Hello')
+        self.client.post(reverse('core:notification-mark-read', args=[notification.id]))
+        self.client.post(reverse('core:notification-mark-read', args=[notification.id]))
+        employee.refresh_from_db()
+        self.assertEqual(employee.unread_notification_count, 0)
+
+    @override_settings(EMAIL_BACKEND='core.tests.RejectingEmailBackend')
+    def test_send_notification_emails_marks_only_sent_messages(self):
+        rejected = CustomUser.objects.create_user(
+            username='reject@example.com',
+            email='reject@example.com',
+            password='test-pass-123',
+            role='employee',
+            employee_id='EMP003',
+        )
+        delivered = Notification.objects.create(
+            user=self.admin, title='Payroll', message='Ready', notification_type='system'
+        )
+        refused = Notification.objects.create(
+            user=rejected, title='Payroll', message='Ready', notification_type='system'
+        )
+        _reset_mail_connection()
+        self.addCleanup(_reset_mail_connection)
+
+        result = send_notification_emails([str(refused.id), str(delivered.id)])
+
+        self.assertEqual(result['sent'], 1)
+        self.assertEqual(result['failed'], 1)
+        self.assertEqual([message.to for message in mail.outbox], [['admin@example.com']])
+        delivered.refresh_from_db()
+        refused.refresh_from_db()
+        self.assertTrue(delivered.is_email_sent)
+        self.assertFalse(refused.is_email_sent)
+
+    def test_deletes_resync_unread_count(self):
+        expired = Notification.objects.create(
+            user=self.admin, title='Expired', message='Gone', notification_type='system',
+            expires_at=timezone.now() - timedelta(days=1),
+        )
+        current = Notification.objects.create(
+            user=self.admin, title='Current', message='Stays', notification_type='system'
+        )
+        expected = Notification.objects.filter(user=self.admin, is_read=False).count()
+        self.admin.refresh_from_db()
+        self.assertEqual(self.admin.unread_notification_count, expected)
+
+        self.assertEqual(NotificationService.delete_expired_notifications(), 1)
+        self.admin.refresh_from_db()
+        self.assertEqual(self.admin.unread_notification_count, expected - 1)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.delete(reverse('core:notification-detail', args=[current.id]))
+        self.assertEqual(response.status_code, 200)
+        self.admin.refresh_from_db()
+        self.assertEqual(self.admin.unread_notification_count, expected - 2)
+        self.assertFalse(Notification.objects.filter(pk__in=[expired.pk, current.pk]).exists())
+
+    def test_stale_user_save_keeps_unread_count(self):
+        employee = CustomUser.objects.create_user(
+            username='stale@example.com',
+            email='stale@example.com',
+            password='test-pass-123',
+            role='employee',
+            employee_id='EMP002',
+        )
+        stale = CustomUser.objects.get(pk=employee.pk)
+        Notification.objects.create(user=employee, title='Hi', message='There', notification_type='system')
+
+        stale.first_name = 'Renamed'
+        stale.save()
+
+        employee.refresh_from_db()
+        self.assertEqual(employee.first_name, 'Renamed')
+        self.assertEqual(employee.unread_notification_count, 1)
+
+    def test_sync_unread_notification_counts_command_backfills(self):
+        Notification.objects.create(user=self.admin, title='Old', message='Unread', notification_type='system')
+        CustomUser.objects.filter(pk=self.admin.pk).update(unread_notification_count=0)
+
+        call_command('sync_unread_notification_counts', stdout=StringIO())
+
+        self.admin.refresh_from_db()
+        self.assertEqual(
+            self.admin.unread_notification_count,
+            Notification.objects.filter(user=self.admin, is_read=False).count(),
+        )
+        self.assertGreater(self.admin.unread_notification_count, 0)
+
+    def test_send_notification_emails_sends_chunk_once(self):
+        notification = Notification.objects.create(
+            user=self.admin,
+            title='Payroll ready',
+            message='Salary slips are available.',
+            notification_type='system',
+        )
+
+        result = send_notification_emails([str(notification.id)])
+        second_run = send_notification_emails([str(notification.id)])
+
+        self.assertEqual(result['sent'], 1)
+        self.assertEqual(second_run['sent'], 0)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['admin@example.com'])
+        notification.refresh_from_db()
+        self.assertTrue(notification.is_email_sent)
+
+
+class RawPunchProcessingTests(TestCase):
+    def setUp(self):
+        self.office = Office.objects.create(name='Head Office', address='Main Road')
+        self.device = Device.objects.create(
+            name='Gate', device_type='zkteco', ip_address='10.0.0.5', office=self.office
+        )
+        self.employee = CustomUser.objects.create_user(
+            username='punch@example.com',
+            email='punch@example.com',
+            password='test-pass-123',
+            role='employee',
+            employee_id='EMP100',
+            biometric_id='100',
+            office=self.office,
+        )
+        self.day = date(2024, 3, 4)
+
+    def _punch(self, hour, minute=0):
+        return {
+            'biometric_id': '100',
+            'punch_time': timezone.make_aware(datetime.combine(self.day, time(hour, minute))),
+            'punch_type': 'in' if hour < 12 else 'out',
+        }
+
+    def test_locked_day_marks_every_batch_punch_processed(self):
+        attendance = Attendance.objects.create(user=self.employee, date=self.day, status='absent', is_locked=True)
+
+        results = record_raw_punches(self.device, [self._punch(9), self._punch(13), self._punch(18)])
+
+        self.assertEqual([result for _, _, result in results], ['processed'] * 3)
+        logs = ESSLAttendanceLog.objects.filter(user=self.employee)
+        self.assertEqual(logs.count(), 3)
+        self.assertFalse(logs.filter(is_processed=False).exists())
+        attendance.refresh_from_db()
+        self.assertIsNone(attendance.check_in_time)
+        self.assertEqual(
+            AttendanceAuditLog.objects.filter(attendance=attendance, change_type='locked_modification_attempt').count(),
+            1,
+        )
+
+    def test_duplicate_punches_in_one_batch(self):
+        results = record_raw_punches(self.device, [self._punch(9), self._punch(9), self._punch(18)])
+
+        self.assertEqual([created for _, created, _ in results], [True, False, True])
+        self.assertEqual(results[1][2], 'duplicate')
+        self.assertIs(results[1][0], results[0][0])
+        self.assertEqual(ESSLAttendanceLog.objects.filter(user=self.employee).count(), 2)
+        self.assertEqual(DuplicatePunchAttempt.objects.filter(existing_log=results[0][0]).count(), 1)
+        self.assertFalse(ESSLAttendanceLog.objects.filter(is_processed=False).exists())
+
+        attendance = Attendance.objects.get(user=self.employee, date=self.day)
+        self.assertEqual(attendance.check_in_time, self._punch(9)['punch_time'])
+        self.assertEqual(attendance.check_out_time, self._punch(18)['punch_time'])
+
+
+class ManagerEmployeesCacheTests(TestCase):
+    def setUp(self):
+        self.north = Office.objects.create(name='North', address='North Road')
+        self.south = Office.objects.create(name='South', address='South Road')
+        self.employee = CustomUser.objects.create_user(
+            username='mover@example.com',
+            email='mover@example.com',
+            password='test-pass-123',
+            role='employee',
+            employee_id='EMP200',
+            office=self.north,
+        )
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_office_move_refreshes_old_and_new_office(self):
+        self.assertEqual(len(get_manager_employees(self.north.id)), 1)
+        self.assertEqual(get_manager_employees(self.south.id), [])
+
+        self.employee.office = self.south
+        self.employee.save()
+
+        self.assertEqual(get_manager_employees(self.north.id), [])
+        self.assertEqual([row['id'] for row in get_manager_employees(self.south.id)], [self.employee.id])
+
+    def test_unrelated_partial_save_keeps_cached_list(self):
+        get_manager_employees(self.north.id)
+
+        self.employee.last_login_ip = '10.0.0.9'
+        self.employee.save(update_fields=['last_login_ip'])
+
+        self.assertIsNotNone(cache.get(MANAGER_EMPLOYEES_CACHE_KEY.format(office_id=self.north.id)))
+
+
+class DeviceFetchAttendanceTests(TestCase):
+    def setUp(self):
+        self.office = Office.objects.create(name='Plant', address='Industrial Area')
+        self.device = Device.objects.create(
+            name='Plant Gate', device_type='zkteco', ip_address='10.0.0.6', office=self.office
+        )
+        self.employee = CustomUser.objects.create_user(
+            username='fetch@example.com',
+            email='fetch@example.com',
+            password='test-pass-123',
+            role='employee',
+            employee_id='EMP300',
+            biometric_id='300',
+            office=self.office,
+        )
+        self.day = date(2024, 3, 5)
+
+    def _at(self, hour):
+        return timezone.make_aware(datetime.combine(self.day, time(hour)))
+
+    def test_user_day_folded_across_chunk_boundary(self):
+        punches = [(self.employee, self._at(9)), (self.employee, self._at(13)), (self.employee, self._at(18))]
+
+        with mock.patch.object(fetch_all_devices, 'ATTENDANCE_CHUNK_SIZE', 2):
+            saved, errors = fetch_all_devices.save_daily_attendance(self.device, punches)
+
+        self.assertEqual((saved, errors), (2, 0))
+        attendance = Attendance.objects.get(user=self.employee, date=self.day)
+        self.assertEqual(attendance.check_in_time, self._at(9))
+        self.assertEqual(attendance.check_out_time, self._at(18))
+        self.assertEqual(float(attendance.total_hours), 9.0)
+
+    def test_existing_record_recomputes_hours_and_status(self):
+        Attendance.objects.create(
+            user=self.employee, date=self.day, status='present',
+            check_in_time=self._at(9), check_out_time=self._at(10),
+        )
+        attendance = Attendance.objects.get(user=self.employee, date=self.day)
+        self.assertEqual(attendance.day_status, 'half_day')
+
+        saved, errors = fetch_all_devices.save_daily_attendance(self.device, [(self.employee, self._at(18))])
+
+        self.assertEqual((saved, errors), (1, 0))
+        attendance.refresh_from_db()
+        self.assertEqual(attendance.check_out_time, self._at(18))
+        self.assertEqual(float(attendance.total_hours), 9.0)
+        self.assertEqual(attendance.status, 'present')
+        self.assertEqual(attendance.day_status, 'complete_day')
+        self.assertEqual(attendance.device, self.device)
+
+    def test_essl_payload_bulk_inserts_new_logs_once(self):
+        ESSLAttendanceLog.objects.create(
+            device=self.device, biometric_id='300', user=self.employee,
+            punch_time=timezone.make_aware(datetime(2024, 3, 5, 9, 0)), punch_type='in',
+        )
+        payload = {'attendance_records': [
+            {'biometric_id': '300', 'punch_time': '2024-03-05T09:00:00', 'punch_type': 'in'},
+            {'biometric_id': '300', 'punch_time': '2024-03-05T18:00:00', 'punch_type': 'out'},
+            {'biometric_id': '300', 'punch_time': '2024-03-05T18:00:00', 'punch_type': 'out'},
+            {'biometric_id': '999', 'punch_time': '2024-03-05T10:00:00', 'punch_type': 'in'},
+        ]}
+
+        created = ESSLDeviceService(self.device)._process_attendance_data(payload)
+
+        self.assertEqual(created, 2)
+        self.assertEqual(ESSLAttendanceLog.objects.filter(device=self.device).count(), 3)
+        unknown = ESSLAttendanceLog.objects.get(biometric_id='999')
+        self.assertIsNone(unknown.user)
+        checkout = ESSLAttendanceLog.objects.get(biometric_id='300', punch_type='out')
+        self.assertEqual(checkout.user, self.employee)
+        self.assertTrue(checkout.is_processed)
+        self.assertEqual(
+            Attendance.objects.get(user=self.employee, date=self.day).check_out_time,
+            checkout.punch_time,
+        )
+
+
+class ManagerDashboardTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.office = Office.objects.create(name='Branch', address='High Street')
+        self.manager = CustomUser.objects.create_user(
+            username='manager@example.com',
+            email='manager@example.com',
+            password='test-pass-123',
+            role='manager',
+            employee_id='MGR001',
+            office=self.office,
+        )
+        # Repeated last names make the id tiebreaker decide page boundaries
+        for index, last_name in enumerate(['Shah', 'Iyer', 'Shah', 'Das', 'Iyer', 'Shah', 'Rao']):
+            CustomUser.objects.create_user(
+                username=f'staff{index}@example.com',
+                email=f'staff{index}@example.com',
+                password='test-pass-123',
+                role='employee',
+                employee_id=f'EMP4{index:02d}',
+                last_name=last_name,
+                office=self.office,
+            )
+        self.url = reverse('core:dashboard-manager-employees')
+
+    def test_keyset_pages_have_no_gaps_or_repeats(self):
+        self.client.force_authenticate(user=self.manager)
+        seen = []
+        cursor = ''
+        while cursor is not None:
+            response = self.client.get(self.url, {'cursor': cursor, 'page_size': 3})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['count'], 7)
+            seen.extend(str(row['id']) for row in response.data['results'])
+            cursor = response.data['next_cursor']
+
+        expected = CustomUser.objects.filter(office=self.office, role='employee').order_by('last_name', 'id')
+        self.assertEqual(seen, [str(pk) for pk in expected.values_list('id', flat=True)])
+
+    def test_invalid_cursor_is_rejected(self):
+        self.client.force_authenticate(user=self.manager)
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_attendance_etag_tracks_user_and_resignation_changes(self):
+        employee = CustomUser.objects.get(employee_id='EMP400')
+        Attendance.objects.create(user=employee, date=timezone.now().date(), status='present')
+        url = reverse('core:dashboard-manager-attendance')
+        self.client.force_authenticate(user=self.manager)
+
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        employee.first_name = 'Renamed'
+        employee.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['user']['first_name'], 'Renamed')
+
+        etag = response['ETag']
+        Resignation.objects.create(
+            user=employee, resignation_date=timezone.now().date(), reason='Moving away'
+        )
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_gzipped_attendance_listing_revalidates(self):
+        for employee in CustomUser.objects.filter(role='employee'):
+            Attendance.objects.create(user=employee, date=timezone.now().date(), status='present')
+        url = reverse('core:dashboard-manager-attendance')
+        self.client.force_authenticate(user=self.manager)
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/'))
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_manager_with_office_permission(self):
+        employee = CustomUser.objects.get(employee_id='EMP400')
+        officeless_manager = CustomUser.objects.create_user(
+            username='floating@example.com',
+            email='floating@example.com',
+            password='test-pass-123',
+            role='manager',
+            employee_id='MGR002',
+        )
+
+        self.client.force_authenticate(user=employee)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['detail'], 'Access denied. Only managers can access this endpoint.')
+
+        self.client.force_authenticate(user=officeless_manager)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['detail'], 'Manager not assigned to any office')
+
+        self.client.force_authenticate(user=self.manager)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+
+class WindowCountPaginationTests(TestCase):
+    def test_distinct_queryset_counts_unique_rows(self):
+        user = CustomUser.objects.create_user(
+            username='paged@example.com',
+            email='paged@example.com',
+            password='test-pass-123',
+            role='employee',
+            employee_id='EMP500',
+        )
+        for title in ('One', 'Two', 'Three'):
+            Notification.objects.create(user=user, title=title, message='Unread', notification_type='system')
+        queryset = CustomUser.objects.filter(notifications__is_read=False).distinct()
+
+        page = WindowCountPaginator(queryset, 10).page(1)
+        rows, total = paginate_with_total(queryset, 1, 10)
+
+        self.assertEqual(page.paginator.count, 1)
+        self.assertEqual(list(page), [user])
+        self.assertEqual((rows, total), ([user], 1))
@@ -7,12 +7,14 @@ from django_filters import rest_framework as django_filters
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.shortcuts import get_object_or_404
+from django.core.cache import cache
 from django.utils import timezone
 from django.db.models import Sum, Count, Q, Exists, OuterRef, Subquery
 from django.db import models, transaction, IntegrityError
 from datetime import datetime, timedelta, date
 import calendar
 import logging
+import uuid
 import traceback
 import sys
 from django.core.exceptions import ValidationError
@@ -63,6 +65,11 @@ from ..pagination import StandardResultsSetPagination
 
 # Removed CustomUserFilter class definition as it is now in filters.py
 
+# Department/designation dropdown responses are cached per request path; bumping
+# the version key (see signals.invalidate_dropdown_cache) retires all of them.
+DROPDOWN_CACHE_VERSION_KEY = 'dropdown:version'
+DROPDOWN_CACHE_TIMEOUT = 300
+
 class IsAdminUser(IsAuthenticated):
     """Permission to only allow admin users"""
     def has_permission(self, request, view):
@@ -1103,7 +1110,25 @@ class CustomUserViewSet(viewsets.ModelViewSet):
             'count': len(history_data)
         })
 
-class DepartmentViewSet(viewsets.ReadOnlyModelViewSet):
+class CachedDropdownMixin:
+    """Serve list responses of read-only dropdown viewsets from the cache"""
+    
+    def cached_response(self, request, build):
+        """Return the cached payload for this request path, calling build() on a miss"""
+        version = cache.get_or_set(DROPDOWN_CACHE_VERSION_KEY, 0, None)
+        cache_key = f'dropdown:{version}:{request.get_full_path()}'
+        data = cache.get(cache_key)
+        if data is None:
+            data = build()
+            cache.set(cache_key, data, DROPDOWN_CACHE_TIMEOUT)
+        return Response(data)
+    
+    def list(self, request, *args, **kwargs):
+        parent_list = super().list
+        return self.cached_response(request, lambda: parent_list(request, *args, **kwargs).data)
+
+
+class DepartmentViewSet(CachedDropdownMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for Department model - Read only for dropdowns"""
     queryset = Department.objects.filter(is_active=True)
     serializer_class = DepartmentSerializer
@@ -1117,11 +1142,14 @@ class DepartmentViewSet(viewsets.ReadOnlyModelViewSet):
     def designations(self, request, pk=None):
         """Get all designations for a specific department"""
         department = self.get_object()
-        designations = department.designations.filter(is_active=True)
-        serializer = DesignationSerializer(designations, many=True)
-        return Response(serializer.data)
+        
+        def build():
+            designations = department.designations.filter(is_active=True)
+            return DesignationSerializer(designations, many=True).data
+        
+        return self.cached_response(request, build)
 
-class DesignationViewSet(viewsets.ReadOnlyModelViewSet):
+class DesignationViewSet(CachedDropdownMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for Designation model - Read only for dropdowns"""
     queryset = Designation.objects.filter(is_active=True)
     serializer_class = DesignationSerializer
@@ -1143,16 +1171,17 @@ class DesignationViewSet(viewsets.ReadOnlyModelViewSet):
             department_id = self.request.query_params.get('department')
         
         if department_id:
-            try:
-                # Try to parse as UUID first
-                import uuid
-                department_uuid = uuid.UUID(department_id)
-                queryset = queryset.filter(department_id=department_uuid)
-            except (ValueError, TypeError):
-                # If not a valid UUID, try to filter by department name
-                queryset = queryset.filter(department__name__icontains=department_id)
+            queryset = self._filter_by_department(queryset, department_id)
         return queryset
     
+    @staticmethod
+    def _filter_by_department(queryset, department_id):
+        """Filter by department id, or by exact (case-insensitive) department name"""
+        try:
+            return queryset.filter(department_id=uuid.UUID(str(department_id)))
+        except (ValueError, TypeError):
+            return queryset.filter(department__name__iexact=department_id)
+    
     @action(detail=False, methods=['get'], url_path='by-department/(?P<department_id>[^/.]+)')
     def by_department(self, request, department_id=None):
         """Get designations by department ID"""
@@ -1160,15 +1189,9 @@ class DesignationViewSet(viewsets.ReadOnlyModelViewSet):
         queryset = Designation.objects.filter(is_active=True)
         
         if department_id:
-            try:
-                import uuid
-                department_uuid = uuid.UUID(department_id)
-                queryset = queryset.filter(department_id=department_uuid)
-            except (ValueError, TypeError):
-                queryset = queryset.filter(department__name__icontains=department_id)
+            queryset = self._filter_by_department(queryset, department_id)
         
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.cached_response(request, lambda: self.get_serializer(queryset, many=True).data)
 
 
 # Custom error handlers for production
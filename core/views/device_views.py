@@ -54,7 +54,8 @@ logger = logging.getLogger(__name__)
 
 from ..filters import (
     CustomUserFilter, DeviceUserFilter, AttendanceFilter, LeaveFilter, 
-    DocumentFilter, NotificationFilter, ShiftFilter, EmployeeShiftAssignmentFilter
+    DocumentFilter, NotificationFilter, ShiftFilter, EmployeeShiftAssignmentFilter,
+    SkipUnusedFilterSetMixin
 )
 from ..pagination import StandardResultsSetPagination
 
@@ -162,11 +163,11 @@ class DeviceViewSet(viewsets.ModelViewSet):
         if serializer.is_valid():
             # TODO: Implement device synchronization logic
             device.last_sync = timezone.now()
-            device.save()
+            device.save(update_fields=['last_sync'])
             return Response({'message': 'Device sync initiated successfully'})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class DeviceUserViewSet(viewsets.ModelViewSet):
+class DeviceUserViewSet(SkipUnusedFilterSetMixin, viewsets.ModelViewSet):
     """ViewSet for DeviceUser model"""
     serializer_class = DeviceUserSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -243,17 +244,20 @@ class DeviceUserViewSet(viewsets.ModelViewSet):
             device_users_data = serializer.validated_data['device_users']
             
             try:
+                # Share one Device instance so serializing device_name/device_type
+                # doesn't reload it per row
+                device = Device.objects.get(pk=device_id)
                 with transaction.atomic():
-                    created_users = []
-                    for user_data in device_users_data:
-                        user_data['device_id'] = device_id
-                        device_user = DeviceUser.objects.create(**user_data)
-                        created_users.append(DeviceUserSerializer(device_user).data)
-                    
-                    return Response({
-                        'message': f'Successfully created {len(created_users)} device users',
-                        'data': created_users
-                    }, status=status.HTTP_201_CREATED)
+                    device_users = DeviceUser.objects.bulk_create(
+                        [DeviceUser(device=device, **user_data) for user_data in device_users_data],
+                        batch_size=500
+                    )
+                created_users = DeviceUserSerializer(device_users, many=True).data
+                
+                return Response({
+                    'message': f'Successfully created {len(created_users)} device users',
+                    'data': created_users
+                }, status=status.HTTP_201_CREATED)
             except Exception as e:
                 return Response({
                     'error': 'Failed to create device users',
@@ -294,51 +298,20 @@ class DeviceUserViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
-    @action(detail=False, methods=['get'])
-    def by_device(self, request):
-        """Get device users by device ID"""
-        device_id = request.query_params.get('device_id')
-        
-        if not device_id:
-            return Response({
-                'error': 'device_id parameter is required'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        try:
-            import uuid
-            device_uuid = uuid.UUID(device_id)
-            queryset = self.get_queryset().filter(device_id=device_uuid)
-            
-            # Apply filters
-            queryset = self.filter_queryset(queryset)
-            
-            page = self.paginate_queryset(queryset)
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
-            
-            serializer = self.get_serializer(queryset, many=True)
-            return Response(serializer.data)
-        except ValueError:
-            return Response({
-                'error': 'Invalid device_id format'
-            }, status=status.HTTP_400_BAD_REQUEST)
-
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Get device user statistics"""
         queryset = self.get_queryset()
         
-        total_users = queryset.count()
-        mapped_users = queryset.filter(is_mapped=True).count()
-        unmapped_users = queryset.filter(is_mapped=False).count()
-        
-        # Group by device
-        device_stats = queryset.values('device__name', 'device__id').annotate(
+        # Group by device; the overall totals are the sums of the groups
+        device_stats = list(queryset.values('device__name', 'device__id').annotate(
             total_users=Count('id'),
             mapped_users=Count('id', filter=Q(is_mapped=True)),
             unmapped_users=Count('id', filter=Q(is_mapped=False))
-        )
+        ))
+        total_users = sum(row['total_users'] for row in device_stats)
+        mapped_users = sum(row['mapped_users'] for row in device_stats)
+        unmapped_users = sum(row['unmapped_users'] for row in device_stats)
         
         # Group by privilege
         privilege_stats = queryset.values('device_user_privilege').annotate(
@@ -350,6 +323,6 @@ class DeviceUserViewSet(viewsets.ModelViewSet):
             'mapped_users': mapped_users,
             'unmapped_users': unmapped_users,
             'mapping_percentage': round((mapped_users / total_users * 100) if total_users > 0 else 0, 2),
-            'device_stats': list(device_stats),
+            'device_stats': device_stats,
             'privilege_stats': list(privilege_stats)
         })
@@ -40,7 +40,7 @@ from ..serializers import (
     ResignationCreateSerializer, ResignationAdminUpdateSerializer, ResignationApprovalSerializer, DepartmentSerializer, DesignationSerializer,
     ShiftSerializer, EmployeeShiftAssignmentSerializer, EmployeeStatusAuditLogSerializer,
     BiometricAssignmentHistorySerializer, PasswordChangeHistorySerializer, AttendanceAuditLogSerializer,
-    DuplicatePunchAttemptSerializer, UnmatchedBiometricPunchSerializer
+    DuplicatePunchAttemptSerializer, UnmatchedBiometricPunchSerializer, LightweightUserSummarySerializer
 )
 # Permissions are defined inline in this file
 from ..zkteco_service import zkteco_service
@@ -54,8 +54,10 @@ logger = logging.getLogger(__name__)
 
 from ..filters import (
     CustomUserFilter, DeviceUserFilter, AttendanceFilter, LeaveFilter, 
-    DocumentFilter, NotificationFilter, ShiftFilter, EmployeeShiftAssignmentFilter
+    DocumentFilter, NotificationFilter, ShiftFilter, EmployeeShiftAssignmentFilter,
+    SkipUnusedFilterSetMixin
 )
+from ..manager_employees import get_manager_employees
 from ..pagination import StandardResultsSetPagination
 
 
@@ -122,7 +124,7 @@ class IsSuperuserOrAdminOrManager(IsAuthenticated):
             request.user.is_superuser or request.user.is_admin or request.user.is_manager
         )
 
-class DocumentViewSet(viewsets.ModelViewSet):
+class DocumentViewSet(SkipUnusedFilterSetMixin, viewsets.ModelViewSet):
     """ViewSet for Document model"""
     serializer_class = DocumentSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -135,6 +137,13 @@ class DocumentViewSet(viewsets.ModelViewSet):
         base_queryset = Document.objects.select_related(
             'user', 'user__office', 'user__department', 'user__designation', 'uploaded_by'
         )
+        if self.action in ['list', 'my']:
+            # DocumentListSerializer only needs a summary of the (wide) user rows
+            base_queryset = base_queryset.only(
+                'id', 'title', 'document_type', 'description', 'file', 'created_at', 'updated_at',
+                *LightweightUserSummarySerializer.only_fields('user'),
+                'uploaded_by__first_name', 'uploaded_by__last_name', 'uploaded_by__email',
+            )
         
         if user.is_admin or user.is_hr:
             return base_queryset.all()
@@ -195,9 +204,9 @@ class DocumentViewSet(viewsets.ModelViewSet):
         # Filter by category
         if category:
             if category == 'personal':
-                queryset = queryset.filter(document_type__in=['aadhar_card', 'pan_card', 'voter_id', 'driving_license', 'passport', 'birth_certificate'])
+                queryset = queryset.filter(document_type__in=Document.PERSONAL_DOCUMENT_TYPES)
             elif category == 'salary':
-                queryset = queryset.filter(document_type__in=['salary_slip', 'offer_letter'])
+                queryset = queryset.filter(document_type__in=Document.SALARY_DOCUMENT_TYPES)
             elif category == 'uploaded':
                 queryset = queryset.filter(uploaded_by=user)
         
@@ -221,13 +230,10 @@ class DocumentViewSet(viewsets.ModelViewSet):
         if not (user.is_manager or user.is_hr or user.is_admin):
             return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
 
-        employees = CustomUser.objects.filter(role='employee', is_active=True)
-        if user.is_manager:
-            employees = employees.filter(office=user.office)
-        employees = employees.values('id', 'first_name', 'last_name', 'employee_id', 'email')
+        employees = get_manager_employees(user.office_id if user.is_manager else 'all')
         
         return Response({
-            'employees': list(employees)
+            'employees': employees
         })
 
     @action(detail=True, methods=['get'])
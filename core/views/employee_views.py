@@ -7,6 +7,7 @@ from django_filters import rest_framework as django_filters
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.shortcuts import get_object_or_404
+from django.core.cache import cache
 from django.utils import timezone
 from django.db.models import Sum, Count, Q, Exists, OuterRef, Subquery
 from django.db import models, transaction, IntegrityError
@@ -54,13 +55,23 @@ logger = logging.getLogger(__name__)
 
 from ..filters import (
     CustomUserFilter, DeviceUserFilter, AttendanceFilter, LeaveFilter, 
-    DocumentFilter, NotificationFilter, ShiftFilter, EmployeeShiftAssignmentFilter
+    DocumentFilter, NotificationFilter, ShiftFilter, EmployeeShiftAssignmentFilter,
+    SkipUnusedFilterSetMixin
 )
-from ..pagination import StandardResultsSetPagination
+from ..pagination import StandardResultsSetPagination, streaming_list_response
+from ..notification_service import NotificationService
 
 
 # Removed CustomUserFilter class definition as it is now in filters.py
 
+# Resignation stats are cached per visibility scope; bumping the version key
+# (see signals.invalidate_resignation_stats) retires every scope at once.
+RESIGNATION_STATS_VERSION_KEY = 'resig_stats:version'
+RESIGNATION_STATS_CACHE_TIMEOUT = 90
+
+# Columns written when a resignation is approved or rejected
+RESIGNATION_DECISION_FIELDS = ['status', 'approved_by', 'approved_at', 'rejection_reason', 'updated_at']
+
 class IsAdminUser(IsAuthenticated):
     """Permission to only allow admin users"""
     def has_permission(self, request, view):
@@ -134,24 +145,32 @@ class ResignationViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Get queryset based on user role"""
         user = self.request.user
+        base_queryset = self._with_related(Resignation.objects.all())
         
         if user.is_admin or user.is_hr:
             # Admin can see all resignations
-            return Resignation.objects.select_related('user', 'approved_by').all()
+            return base_queryset
         elif user.is_manager:
             # Manager can see resignations from their office
             if user.office:
-                return Resignation.objects.select_related('user', 'approved_by').filter(
+                return base_queryset.filter(
                     user__office=user.office
                 )
             else:
                 return Resignation.objects.none()
         else:
             # Employee can only see their own resignations
-            return Resignation.objects.select_related('user', 'approved_by').filter(
+            return base_queryset.filter(
                 user=user
             )
 
+    @staticmethod
+    def _with_related(queryset):
+        """Join the relations ResignationSerializer reads for every row"""
+        return queryset.select_related(
+            'user', 'user__office', 'user__department', 'user__designation', 'approved_by'
+        )
+
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
         if self.action == 'create':
@@ -211,12 +230,10 @@ class ResignationViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_403_FORBIDDEN)
         
         # Check if user already has a pending resignation
-        existing_resignation = Resignation.objects.filter(
+        if Resignation.objects.filter(
             user=request.user,
             status='pending'
-        ).first()
-        
-        if existing_resignation:
+        ).exists():
             return Response({
                 'error': 'You already have a pending resignation request'
             }, status=status.HTTP_400_BAD_REQUEST)
@@ -260,13 +277,11 @@ class ResignationViewSet(viewsets.ModelViewSet):
         )
         serializer.is_valid(raise_exception=True)
         
-        # Save the status using the serializer
-        resignation = serializer.save()
-        
-        # Update approval details
+        # Persist status and approval details in a single UPDATE
+        resignation.status = serializer.validated_data['status']
         resignation.approved_by = request.user
         resignation.approved_at = timezone.now()
-        resignation.save()
+        resignation.save(update_fields=RESIGNATION_DECISION_FIELDS)
 
         resignation.user.set_employment_status(
             'notice_period',
@@ -281,15 +296,7 @@ class ResignationViewSet(viewsets.ModelViewSet):
         # Create notification for the employee
         self._create_approval_notification(resignation, 'approved')
         
-        # Broadcast resignation update via WebSocket
-        try:
-            from .consumers import broadcast_resignation_update_sync
-            resignation_data = ResignationSerializer(resignation).data
-            broadcast_resignation_update_sync(resignation_data)
-        except Exception as e:
-            print(f"Error broadcasting resignation update: {e}")
-        
-        return Response(ResignationSerializer(resignation).data)
+        return self._broadcast_decision(resignation)
 
     @action(detail=True, methods=['post'])
     def reject(self, request, pk=None):
@@ -313,7 +320,7 @@ class ResignationViewSet(viewsets.ModelViewSet):
         resignation.approved_at = timezone.now()
         resignation.status = 'rejected'
         resignation.rejection_reason = serializer.validated_data.get('rejection_reason', '')
-        resignation.save()
+        resignation.save(update_fields=RESIGNATION_DECISION_FIELDS)
 
         if not Resignation.objects.filter(user=resignation.user, status__in=['pending', 'approved']).exclude(id=resignation.id).exists():
             resignation.user.set_employment_status(
@@ -325,15 +332,7 @@ class ResignationViewSet(viewsets.ModelViewSet):
         # Create notification for the employee
         self._create_approval_notification(resignation, 'rejected')
         
-        # Broadcast resignation update via WebSocket
-        try:
-            from .consumers import broadcast_resignation_update_sync
-            resignation_data = ResignationSerializer(resignation).data
-            broadcast_resignation_update_sync(resignation_data)
-        except Exception as e:
-            print(f"Error broadcasting resignation update: {e}")
-        
-        return Response(ResignationSerializer(resignation).data)
+        return self._broadcast_decision(resignation)
 
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
@@ -365,7 +364,7 @@ class ResignationViewSet(viewsets.ModelViewSet):
         if is_privileged_user:
             resignation.approved_by = request.user
             resignation.approved_at = timezone.now()
-        resignation.save()
+        resignation.save(update_fields=RESIGNATION_DECISION_FIELDS)
 
         if not Resignation.objects.filter(user=resignation.user, status__in=['pending', 'approved']).exclude(id=resignation.id).exists():
             resignation.user.set_employment_status(
@@ -377,13 +376,7 @@ class ResignationViewSet(viewsets.ModelViewSet):
                 exit_type=None,
             )
         
-        try:
-            from .consumers import broadcast_resignation_update_sync
-            resignation_data = ResignationSerializer(resignation).data
-            broadcast_resignation_update_sync(resignation_data)
-        except Exception as e:
-            print(f"Error broadcasting resignation update: {e}")
-        
+        self._enqueue_broadcast(resignation)
         return Response(ResignationSerializer(resignation).data)
 
     @action(detail=False, methods=['get'])
@@ -401,7 +394,7 @@ class ResignationViewSet(viewsets.ModelViewSet):
                 'error': 'Only employees and accountants can access their resignation requests'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        queryset = Resignation.objects.filter(user=request.user)
+        queryset = self._with_related(Resignation.objects.filter(user=request.user))
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
@@ -413,53 +406,70 @@ class ResignationViewSet(viewsets.ModelViewSet):
         # Get base queryset based on user role
         if user.is_admin or user.is_hr:
             # Admin can see all resignations
+            scope = 'all'
             queryset = Resignation.objects.all()
         elif user.is_manager:
             # Manager can see resignations from their office
+            scope = f'office:{user.office_id}'
             if user.office:
                 queryset = Resignation.objects.filter(user__office=user.office)
             else:
                 queryset = Resignation.objects.none()
         else:
             # Employee can only see their own resignations
+            scope = f'user:{user.id}'
             queryset = Resignation.objects.filter(user=user)
         
-        # Calculate statistics
-        stats = {
-            'total': queryset.count(),
-            'pending': queryset.filter(status='pending').count(),
-            'approved': queryset.filter(status='approved').count(),
-            'rejected': queryset.filter(status='rejected').count(),
-            'cancelled': queryset.filter(status='cancelled').count(),
-        }
-        
-        # Add recent resignations (last 30 days)
-        from datetime import timedelta
+        version = cache.get_or_set(RESIGNATION_STATS_VERSION_KEY, 0, None)
+        cache_key = f'resig_stats:{version}:{scope}'
+        stats = cache.get(cache_key)
+        if stats is not None:
+            return Response(stats)
+        
+        # Calculate statistics, including recent resignations (last 30 days)
         thirty_days_ago = timezone.now().date() - timedelta(days=30)
-        stats['recent'] = queryset.filter(created_at__date__gte=thirty_days_ago).count()
+        stats = queryset.aggregate(
+            total=Count('pk'),
+            pending=Count('pk', filter=Q(status='pending')),
+            approved=Count('pk', filter=Q(status='approved')),
+            rejected=Count('pk', filter=Q(status='rejected')),
+            cancelled=Count('pk', filter=Q(status='cancelled')),
+            recent=Count('pk', filter=Q(created_at__date__gte=thirty_days_ago)),
+        )
         
+        cache.set(cache_key, stats, RESIGNATION_STATS_CACHE_TIMEOUT)
         return Response(stats)
 
+    def _broadcast_decision(self, resignation):
+        """Queue the WebSocket broadcast for a decided resignation and return it"""
+        self._enqueue_broadcast(resignation)
+        return Response(ResignationSerializer(resignation).data)
+
+    def _enqueue_broadcast(self, resignation):
+        """Broadcast the resignation over WebSocket from a Celery worker"""
+        try:
+            from ..tasks import broadcast_resignation_update_task
+            broadcast_resignation_update_task.delay(str(resignation.pk))
+        except Exception:
+            logger.exception("Could not enqueue resignation broadcast id=%s", resignation.pk)
+
     def _create_resignation_notification(self, resignation):
         """Create notification for managers/admins about new resignation"""
-        # Get managers and admins who should be notified
-        if resignation.user.office:
+        # Get managers and admins who should be notified; a single-table OR
+        # yields each user once, so no DISTINCT is needed
+        recipients = Q(role__in=['admin', 'hr'])
+        if resignation.user.office_id:
             # Notify office manager and admins
-            managers = CustomUser.objects.filter(
-                Q(role='manager', office=resignation.user.office) | 
-                Q(role__in=['admin', 'hr'])
-            ).distinct()
-        else:
-            # Notify all admins if user has no office
-            managers = CustomUser.objects.filter(role__in=['admin', 'hr'])
-        
-        for manager in managers:
-            Notification.objects.create(
-                user=manager,
-                title='New Resignation Request',
-                message=f'{resignation.user.get_full_name()} has submitted a resignation request with last working date {resignation.resignation_date}.',
-                notification_type='system'
-            )
+            recipients |= Q(role='manager', office_id=resignation.user.office_id)
+        manager_ids = list(CustomUser.objects.filter(recipients).values_list('id', flat=True))
+        
+        # One multi-row INSERT rather than one per recipient
+        NotificationService.create_bulk_notifications(
+            manager_ids,
+            title='New Resignation Request',
+            message=f'{resignation.user.get_full_name()} has submitted a resignation request with last working date {resignation.resignation_date}.',
+            notification_type='system'
+        )
 
     def _create_approval_notification(self, resignation, action):
         """Create notification for employee about resignation approval/rejection"""
@@ -476,7 +486,7 @@ class ResignationViewSet(viewsets.ModelViewSet):
             notification_type='system'
         )
 
-class ShiftViewSet(viewsets.ModelViewSet):
+class ShiftViewSet(SkipUnusedFilterSetMixin, viewsets.ModelViewSet):
     """ViewSet for Shift model"""
     queryset = Shift.objects.all()
     serializer_class = ShiftSerializer
@@ -502,19 +512,25 @@ class ShiftViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Get queryset based on user role"""
         user = self.request.user
+        queryset = Shift.objects.select_related('office')
+        if self.action == 'list':
+            # Read by ShiftSerializer.get_employee_count instead of a COUNT per shift
+            queryset = queryset.annotate(active_employee_count=Count(
+                'employee_assignments', filter=Q(employee_assignments__is_active=True)
+            ))
         
         if user.is_admin or user.is_hr:
             # Admin can see all shifts
-            return Shift.objects.all()
+            return queryset
         elif user.is_manager:
             # Manager can only see shifts from their office
-            if user.office:
-                return Shift.objects.filter(office=user.office)
+            if user.office_id:
+                return queryset.filter(office_id=user.office_id)
             else:
                 return Shift.objects.none()
         elif user.is_accountant:
             # Accountant can see all shifts (read-only)
-            return Shift.objects.all()
+            return queryset
         else:
             return Shift.objects.none()
 
@@ -542,7 +558,7 @@ class ShiftViewSet(viewsets.ModelViewSet):
         else:
             serializer.save(created_by=user)
 
-class EmployeeShiftAssignmentViewSet(viewsets.ModelViewSet):
+class EmployeeShiftAssignmentViewSet(SkipUnusedFilterSetMixin, viewsets.ModelViewSet):
     """ViewSet for EmployeeShiftAssignment model"""
     queryset = EmployeeShiftAssignment.objects.all()
     serializer_class = EmployeeShiftAssignmentSerializer
@@ -562,12 +578,9 @@ class EmployeeShiftAssignmentViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         """Override list method to ensure all assignments are returned"""
         queryset = self.filter_queryset(self.get_queryset())
-        logger.info(f"EmployeeShiftAssignmentViewSet.list - Final queryset count: {queryset.count()}")
         
-        serializer = self.get_serializer(queryset, many=True)
-        logger.info(f"EmployeeShiftAssignmentViewSet.list - Returning {len(serializer.data)} assignments")
-        
-        return Response(serializer.data)
+        # Unpaginated, so stream rows instead of building the whole list in memory
+        return streaming_list_response(queryset, self.get_serializer())
 
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy', 'bulk_assign']:
@@ -579,28 +592,29 @@ class EmployeeShiftAssignmentViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Get queryset based on user role"""
         user = self.request.user
+        # The serializer reads employee name and shift/office details on every row
+        queryset = EmployeeShiftAssignment.objects.select_related('employee', 'shift__office')
+        if self.action == 'list':
+            # Skip the wide user and shift rows beyond what the list renders
+            queryset = queryset.only(
+                'id', 'employee', 'shift', 'assigned_by', 'is_active', 'created_at', 'updated_at',
+                'employee__first_name', 'employee__last_name', 'employee__email',
+                'shift__name', 'shift__start_time', 'shift__end_time', 'shift__office__name',
+            )
         
         if user.is_admin or user.is_hr:
             # Admin can see all assignments
-            queryset = EmployeeShiftAssignment.objects.all()
-            logger.info(f"EmployeeShiftAssignmentViewSet - Admin/HR: returning {queryset.count()} assignments")
             return queryset
         elif user.is_manager:
             # Manager can only see assignments from their office
-            if user.office:
-                queryset = EmployeeShiftAssignment.objects.filter(shift__office=user.office)
-                logger.info(f"EmployeeShiftAssignmentViewSet - Manager: office={user.office}, returning {queryset.count()} assignments")
-                # Log some details about the assignments
-                for assignment in queryset[:5]:  # Log first 5 assignments
-                    logger.info(f"Assignment: {assignment.employee.get_full_name()} -> {assignment.shift.name} (Office: {assignment.shift.office.name})")
-                return queryset
+            if user.office_id:
+                logger.info(f"EmployeeShiftAssignmentViewSet - Manager: office_id={user.office_id}")
+                return queryset.filter(shift__office_id=user.office_id)
             else:
                 logger.info("EmployeeShiftAssignmentViewSet - Manager: no office assigned")
                 return EmployeeShiftAssignment.objects.none()
         elif user.is_accountant:
             # Accountant can see all assignments (read-only)
-            queryset = EmployeeShiftAssignment.objects.all()
-            logger.info(f"EmployeeShiftAssignmentViewSet - Accountant: returning {queryset.count()} assignments")
             return queryset
         else:
             logger.info("EmployeeShiftAssignmentViewSet - No permission")
@@ -662,32 +676,34 @@ class EmployeeShiftAssignmentViewSet(viewsets.ModelViewSet):
             
             # Get the shift
             try:
-                shift = Shift.objects.get(id=shift_id)
+                shift = Shift.objects.select_related('office').get(id=shift_id)
             except Shift.DoesNotExist:
                 return Response({
                     'error': True,
                     'message': 'Shift not found'
                 }, status=status.HTTP_404_NOT_FOUND)
             
-            # Get employees
-            employees = CustomUser.objects.filter(id__in=employee_ids, role='employee')
+            # Get employees; only the columns get_full_name reads
+            employees = list(CustomUser.objects.filter(
+                id__in=employee_ids, role='employee'
+            ).only('id', 'first_name', 'last_name', 'email'))
             
-            if not employees.exists():
+            if not employees:
                 return Response({
                     'error': True,
                     'message': 'No valid employees found'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Check for existing assignments
-            existing_assignments = EmployeeShiftAssignment.objects.filter(
+            # Check for existing assignments, with the names the conflict list reports
+            existing_assignments = list(EmployeeShiftAssignment.objects.filter(
                 employee__in=employees,
                 is_active=True
-            )
+            ).select_related('employee', 'shift'))
             
-            if existing_assignments.exists():
+            if existing_assignments:
                 conflicting_employees = []
                 for assignment in existing_assignments:
-                    if assignment.shift == shift:
+                    if assignment.shift_id == shift.id:
                         conflicting_employees.append(f"{assignment.employee.get_full_name()} (already assigned to this shift)")
                     else:
                         conflicting_employees.append(f"{assignment.employee.get_full_name()} (assigned to {assignment.shift.name})")
@@ -698,21 +714,33 @@ class EmployeeShiftAssignmentViewSet(viewsets.ModelViewSet):
                     'conflicts': conflicting_employees
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Create assignments
-            created_assignments = []
-            for employee in employees:
-                assignment = EmployeeShiftAssignment.objects.create(
-                    employee=employee,
-                    shift=shift,
-                    assigned_by=request.user,
-                    is_active=True
-                )
-                created_assignments.append(assignment)
+            # Create assignments in one multi-row INSERT
+            with transaction.atomic():
+                created_assignments = EmployeeShiftAssignment.objects.bulk_create([
+                    EmployeeShiftAssignment(
+                        employee=employee,
+                        shift=shift,
+                        assigned_by=request.user,
+                        is_active=True
+                    )
+                    for employee in employees
+                ], batch_size=500)
+            
+            # Render from .values() rows rather than serializing each new instance
+            rows = {
+                row['id']: row
+                for row in EmployeeShiftAssignment.objects.filter(
+                    id__in=[assignment.id for assignment in created_assignments]
+                ).values(*EmployeeShiftAssignmentSerializer.VALUES_FIELDS)
+            }
             
             return Response({
                 'success': True,
                 'message': f'Successfully assigned {len(created_assignments)} employees to shift {shift.name}',
-                'assignments': EmployeeShiftAssignmentSerializer(created_assignments, many=True).data
+                'assignments': [
+                    EmployeeShiftAssignmentSerializer.represent_values(rows[assignment.id])
+                    for assignment in created_assignments
+                ]
             }, status=status.HTTP_201_CREATED)
             
         except Exception as e:
@@ -40,7 +40,7 @@ from ..serializers import (
     ResignationCreateSerializer, ResignationAdminUpdateSerializer, ResignationApprovalSerializer, DepartmentSerializer, DesignationSerializer,
     ShiftSerializer, EmployeeShiftAssignmentSerializer, EmployeeStatusAuditLogSerializer,
     BiometricAssignmentHistorySerializer, PasswordChangeHistorySerializer, AttendanceAuditLogSerializer,
-    DuplicatePunchAttemptSerializer, UnmatchedBiometricPunchSerializer
+    DuplicatePunchAttemptSerializer, UnmatchedBiometricPunchSerializer, LightweightUserSummarySerializer
 )
 # Permissions are defined inline in this file
 from ..zkteco_service import zkteco_service
@@ -122,6 +122,10 @@ class IsSuperuserOrAdminOrManager(IsAuthenticated):
             request.user.is_superuser or request.user.is_admin or request.user.is_manager
         )
 
+# Columns touched when a leave request is approved or rejected
+LEAVE_DECISION_FIELDS = ['status', 'rejection_reason', 'approved_by', 'approved_at', 'updated_at']
+
+
 class LeaveViewSet(viewsets.ModelViewSet):
     """ViewSet for Leave model"""
     serializer_class = LeaveSerializer
@@ -147,6 +151,14 @@ class LeaveViewSet(viewsets.ModelViewSet):
             'user__office',
             'approved_by'
         )
+        if self.action == 'list':
+            # LeaveListSerializer only needs a summary of the (wide) user rows
+            base_queryset = base_queryset.only(
+                'id', 'leave_type', 'start_date', 'end_date', 'total_days', 'reason', 'status',
+                'approved_at', 'rejection_reason', 'created_at', 'updated_at',
+                *LightweightUserSummarySerializer.only_fields('user'),
+                'approved_by__first_name', 'approved_by__last_name', 'approved_by__email',
+            )
         
         if user.is_admin or user.is_hr:
             return base_queryset
@@ -192,8 +204,9 @@ class LeaveViewSet(viewsets.ModelViewSet):
             leave.rejection_reason = ''
             leave.approved_by = request.user
             leave.approved_at = timezone.now()
-            leave.save()
-            # Return full leave payload
+            # Write only the decision columns; post_save still notifies the employee
+            leave.save(update_fields=LEAVE_DECISION_FIELDS)
+            # Return full leave payload (relations already joined by get_queryset)
             return Response(LeaveSerializer(leave, context={'request': request}).data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -208,8 +221,9 @@ class LeaveViewSet(viewsets.ModelViewSet):
             leave.rejection_reason = request.data.get('rejection_reason', serializer.validated_data.get('rejection_reason', ''))
             leave.approved_by = request.user
             leave.approved_at = timezone.now()
-            leave.save()
-            # Return full leave payload
+            # Write only the decision columns; post_save still notifies the employee
+            leave.save(update_fields=LEAVE_DECISION_FIELDS)
+            # Return full leave payload (relations already joined by get_queryset)
             return Response(LeaveSerializer(leave, context={'request': request}).data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
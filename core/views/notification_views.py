@@ -8,6 +8,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.db.models import Sum, Count, Q, Exists, OuterRef, Subquery
 from django.db import models, transaction, IntegrityError
 from datetime import datetime, timedelta, date
@@ -44,6 +45,9 @@ from ..serializers import (
 )
 # Permissions are defined inline in this file
 from ..zkteco_service import zkteco_service
+from ..notification_service import (
+    NotificationService, get_notification_target_offices, get_notification_target_roles
+)
 from ..db_manager import DatabaseConnectionManager
 from ..auth_logging import log_auth_event
 from ..auth_views import set_refresh_cookie
@@ -54,7 +58,8 @@ logger = logging.getLogger(__name__)
 
 from ..filters import (
     CustomUserFilter, DeviceUserFilter, AttendanceFilter, LeaveFilter, 
-    DocumentFilter, NotificationFilter, ShiftFilter, EmployeeShiftAssignmentFilter
+    DocumentFilter, NotificationFilter, ShiftFilter, EmployeeShiftAssignmentFilter,
+    SkipUnusedFilterSetMixin
 )
 from ..pagination import StandardResultsSetPagination
 
@@ -122,7 +127,7 @@ class IsSuperuserOrAdminOrManager(IsAuthenticated):
             request.user.is_superuser or request.user.is_admin or request.user.is_manager
         )
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(SkipUnusedFilterSetMixin, viewsets.ModelViewSet):
     """Enhanced ViewSet for Notification model"""
     serializer_class = NotificationSerializer
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter, filters.SearchFilter]
@@ -132,9 +137,13 @@ class NotificationViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'message']
 
     def get_queryset(self):
-        """Get notifications for current user, filtering out expired ones"""
-        from django.utils import timezone
-        from django.db.models import Q
+        """Get notifications for current user, filtering out expired ones.
+        
+        The queryset is built once per request so the COUNT and page queries
+        share the same expiry cutoff.
+        """
+        if hasattr(self, '_queryset_cache'):
+            return self._queryset_cache
         
         if self.request.user.is_hr:
             queryset = Notification.objects.all()
@@ -147,6 +156,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
             Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now())
         )
         
+        self._queryset_cache = queryset
         return queryset
 
     def get_serializer_class(self):
@@ -167,8 +177,6 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
         """Mark notification as read"""
-        from ..notification_service import NotificationService
-        
         success = NotificationService.mark_as_read(pk, request.user)
         if success:
             return Response({'message': 'Notification marked as read'})
@@ -177,8 +185,6 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
         """Mark all notifications as read"""
-        from ..notification_service import NotificationService
-        
         updated_count = NotificationService.mark_all_as_read(request.user)
         return Response({
             'message': f'{updated_count} notifications marked as read'
@@ -187,18 +193,16 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
         """Get unread notification count"""
-        queryset = Notification.objects.filter(is_read=False)
         if not request.user.is_hr:
-            queryset = queryset.filter(user=request.user)
-        count = queryset.count()
+            return Response({'unread_count': request.user.unread_notification_count})
+        # HR sees every notification, so there is no per-user counter to read
+        count = Notification.objects.filter(is_read=False).count()
         return Response({'unread_count': count})
 
     def destroy(self, request, pk=None):
         """Delete a notification"""
         if request.user.is_hr:
             return Response({'error': 'HR users cannot delete notifications'}, status=status.HTTP_403_FORBIDDEN)
-        from ..notification_service import NotificationService
-        
         success = NotificationService.delete_notification(pk, request.user)
         if success:
             return Response({'message': 'Notification deleted'})
@@ -209,8 +213,6 @@ class NotificationViewSet(viewsets.ModelViewSet):
         """Delete expired notifications"""
         if request.user.is_hr:
             return Response({'error': 'HR users cannot delete notifications'}, status=status.HTTP_403_FORBIDDEN)
-        from ..notification_service import NotificationService
-        
         deleted_count = NotificationService.delete_expired_notifications()
         return Response({
             'message': f'{deleted_count} expired notifications deleted'
@@ -221,8 +223,6 @@ class NotificationViewSet(viewsets.ModelViewSet):
         """Clean up old notifications (admin only)"""
         if request.user.is_hr:
             return Response({'error': 'HR users cannot delete notifications'}, status=status.HTTP_403_FORBIDDEN)
-        from ..notification_service import NotificationService
-        
         days = request.data.get('days', 30)
         deleted_count = NotificationService.cleanup_old_notifications(days)
         return Response({
@@ -232,8 +232,6 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Get notification statistics"""
-        from django.db.models import Count, Q
-        
         user = request.user
         qs = self.get_queryset()
         
@@ -252,11 +250,6 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def create_bulk(self, request):
         """Create notifications for multiple users (admin/manager only)"""
-        import logging
-        from ..notification_service import NotificationService
-        
-        logger = logging.getLogger(__name__)
-        
         # Get target type and parameters
         target_type = request.data.get('target_type', 'users')  # 'users', 'office', 'role', 'all'
         users = request.data.get('users', [])
@@ -278,23 +271,25 @@ class NotificationViewSet(viewsets.ModelViewSet):
                 'error': 'title and message are required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get user objects based on target type
-        user_objects = []
-        
+        # Resolve target users to a list of ids once, up front
         if target_type == 'users' and users:
-            user_objects = CustomUser.objects.filter(id__in=users, is_active=True)
+            user_filter = Q(id__in=users)
         elif target_type == 'office' and office_ids:
-            user_objects = CustomUser.objects.filter(office__in=office_ids, is_active=True)
+            user_filter = Q(office__in=office_ids)
         elif target_type == 'role' and roles:
-            user_objects = CustomUser.objects.filter(role__in=roles, is_active=True)
+            user_filter = Q(role__in=roles)
         elif target_type == 'all':
-            user_objects = CustomUser.objects.filter(is_active=True)
+            user_filter = Q()
         else:
             return Response({
                 'error': 'Invalid target type or missing target parameters'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        if not user_objects.exists():
+        user_ids = list(
+            CustomUser.objects.filter(user_filter, is_active=True).values_list('id', flat=True)
+        )
+        
+        if not user_ids:
             return Response({
                 'error': 'No users found for the specified criteria'
             }, status=status.HTTP_400_BAD_REQUEST)
@@ -303,8 +298,6 @@ class NotificationViewSet(viewsets.ModelViewSet):
         expires_at_parsed = None
         if expires_at:
             try:
-                from django.utils.dateparse import parse_datetime
-                from django.utils import timezone
                 expires_at_parsed = parse_datetime(expires_at)
                 # Make timezone-aware if it's naive
                 if expires_at_parsed and expires_at_parsed.tzinfo is None:
@@ -316,7 +309,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
         
         try:
             notifications = NotificationService.create_bulk_notifications(
-                user_objects, title, message,
+                user_ids, title, message,
                 notification_type=notification_type,
                 category=category,
                 priority=priority,
@@ -324,17 +317,26 @@ class NotificationViewSet(viewsets.ModelViewSet):
                 action_text=action_text,
                 expires_at=expires_at_parsed,
                 created_by=request.user,
-                send_email=send_email
+                send_email=False
             )
             
+            # Emails are fanned out to chunked background tasks so the request
+            # doesn't wait on SMTP for every recipient
+            email_task_group_id = None
+            if send_email:
+                email_task_group_id = NotificationService.queue_notification_emails(
+                    [n.id for n in notifications]
+                )
+            
             return Response({
                 'message': f'{len(notifications)} notifications created successfully',
-                'notifications': NotificationSerializer(notifications, many=True).data,
+                'notification_ids': [n.id for n in notifications],
                 'target_info': {
                     'target_type': target_type,
-                    'user_count': len(user_objects),
+                    'user_count': len(user_ids),
                     'email_sent': send_email,
-                    'email_queued': send_email  # Emails are queued for background processing
+                    'email_queued': len(notifications) if email_task_group_id else 0,
+                    'task_group_id': email_task_group_id
                 }
             })
             
@@ -348,14 +350,9 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def get_target_options(self, request):
         """Get available target options for notifications (offices, roles, etc.)"""
-        from ..models import Office
-        
-        offices = Office.objects.all().values('id', 'name')
-        roles = CustomUser.objects.values_list('role', flat=True).distinct()
-        
         return Response({
-            'offices': list(offices),
-            'roles': list(roles),
+            'offices': get_notification_target_offices(),
+            'roles': get_notification_target_roles(),
             'role_choices': [
                 {'value': 'admin', 'label': 'Admin'},
                 {'value': 'hr', 'label': 'HR'},
@@ -7,11 +7,14 @@ from django_filters import rest_framework as django_filters
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.shortcuts import get_object_or_404
+from django.core.cache import cache
 from django.utils import timezone
-from django.db.models import Sum, Count, Q, Exists, OuterRef, Subquery
+from django.utils.http import http_date, parse_etags, quote_etag
+from django.db.models import Sum, Count, Max, Q, Exists, OuterRef, Subquery
 from django.db import models, transaction, IntegrityError
 from datetime import datetime, timedelta, date
 import calendar
+import hashlib
 import logging
 import traceback
 import sys
@@ -57,11 +60,69 @@ from ..filters import (
     CustomUserFilter, DeviceUserFilter, AttendanceFilter, LeaveFilter, 
     DocumentFilter, NotificationFilter, ShiftFilter, EmployeeShiftAssignmentFilter
 )
-from ..pagination import StandardResultsSetPagination
+from ..pagination import StandardResultsSetPagination, paginate_with_total, keyset_paginate, keyset_total
+from .leave_views import LEAVE_DECISION_FIELDS
+from ..dashboard_stats import (
+    get_admin_dashboard_stats, attendance_summary, leave_summary, user_activation_summary,
+)
 
 
 # Removed CustomUserFilter class definition as it is now in filters.py
 
+# Office figures for manager_stats, matching the admin dashboard's refresh interval
+MANAGER_STATS_CACHE_TIMEOUT = 60
+
+
+def listing_validators(request, queryset, *scope):
+    """
+    ETag and Last-Modified for a polled manager listing.
+
+    The tag combines the newest updated_at and the row count of the filtered
+    queryset with the request's query string, so edits, inserts and deletes
+    all change it while repeated polls of an unchanged page do not. Rows are
+    rendered with the nested user and that user's resignation state, so the
+    newest user and resignation changes for the listed users are hashed too.
+    """
+    state = queryset.order_by().aggregate(
+        last_modified=Max('updated_at'), total=Count('pk'), user_modified=Max('user__updated_at')
+    )
+    resignations = Resignation.objects.filter(
+        user_id__in=queryset.order_by().values('user_id')
+    ).aggregate(last_modified=Max('updated_at'), total=Count('pk'))
+    raw = ':'.join(str(part) for part in (
+        state['last_modified'], state['total'], state['user_modified'],
+        resignations['last_modified'], resignations['total'], request.get_full_path(), *scope
+    ))
+    last_modified = max(
+        (value for value in (state['last_modified'], state['user_modified'], resignations['last_modified']) if value),
+        default=None,
+    )
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest()), last_modified
+
+
+def with_listing_validators(response, etag, last_modified):
+    """Attach the validators from listing_validators to a response"""
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Clients may store the listing but must revalidate it on every poll
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def weak_etag(etag):
+    """The opaque part of an ETag; GZipMiddleware marks compressed tags weak with W/"""
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def not_modified_response(request, etag, last_modified):
+    """A 304 response when If-None-Match already holds the current tag, else None"""
+    # Weak comparison, as ConditionalGetMiddleware does, so a tag the client
+    # received gzipped still matches the uncompressed one computed here
+    if weak_etag(etag) in {weak_etag(tag) for tag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))}:
+        return with_listing_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+    return None
+
 class IsAdminUser(IsAuthenticated):
     """Permission to only allow admin users"""
     def has_permission(self, request, view):
@@ -76,6 +137,18 @@ class IsAdminOrManager(IsAuthenticated):
         return super().has_permission(request, view) and (
             request.user.is_admin or request.user.is_manager
         )
+class IsManagerWithOffice(IsAuthenticated):
+    """Permission to only allow managers who are assigned to an office"""
+    def has_permission(self, request, view):
+        if not super().has_permission(request, view):
+            return False
+        if not request.user.is_manager:
+            self.message = 'Access denied. Only managers can access this endpoint.'
+            return False
+        if not request.user.office_id:
+            self.message = 'Manager not assigned to any office'
+            return False
+        return True
 class IsAdminOrManagerOrHR(IsAuthenticated):
     """Permission to allow admin, manager, or HR users."""
     def has_permission(self, request, view):
@@ -831,72 +904,8 @@ class DashboardViewSet(viewsets.ViewSet):
             last_month = today - timedelta(days=30)
             
             if user.is_admin or user.is_hr:
-                operational_statuses = ['active', 'notice_period']
-                # Calculate comprehensive statistics for admin - operational employees
-                total_employees = CustomUser.objects.filter(role='employee', employment_status__in=operational_statuses).count()
-                total_managers = CustomUser.objects.filter(role='manager', employment_status__in=operational_statuses).count()
-                total_hr = CustomUser.objects.filter(role='hr', employment_status__in=operational_statuses).count()
-                total_accountants = CustomUser.objects.filter(role='accountant', employment_status__in=operational_statuses).count()
-                total_offices = Office.objects.count()
-                total_devices = Device.objects.count()
-                active_devices = Device.objects.filter(is_active=True).count()
-                
-                # Attendance statistics - operational employees only
-                today_attendance = Attendance.objects.filter(
-                    date=today, 
-                    status='present',
-                    user__employment_status__in=operational_statuses
-                ).count()
-                total_today_records = Attendance.objects.filter(
-                    date=today,
-                    user__employment_status__in=operational_statuses
-                ).count()
-                attendance_rate = (today_attendance / total_today_records * 100) if total_today_records > 0 else 0
-                
-                # Leave statistics
-                pending_leaves = Leave.objects.filter(status='pending').count()
-                approved_leaves = Leave.objects.filter(status='approved').count()
-                total_leaves = Leave.objects.count()
-                leave_approval_rate = (approved_leaves / total_leaves * 100) if total_leaves > 0 else 0
-                
-                # User statistics
-                active_users = CustomUser.objects.filter(employment_status__in=operational_statuses).count()
-                total_users = CustomUser.objects.count()
-                inactive_users = total_users - active_users
-                lifecycle_counts = {
-                    item['employment_status']: item['total']
-                    for item in CustomUser.objects.values('employment_status').annotate(total=Count('id'))
-                }
-                
-                # Growth statistics (comparing with last month)
-                last_month_employees = CustomUser.objects.filter(
-                    role='employee',
-                    date_joined__lt=last_month
-                ).count()
-                employee_growth = ((total_employees - last_month_employees) / last_month_employees * 100) if last_month_employees > 0 else 0
-                
-                stats = {
-                    'total_employees': total_employees,
-                    'total_managers': total_managers,
-                    'total_hr': total_hr,
-                    'total_accountants': total_accountants,
-                    'total_offices': total_offices,
-                    'total_devices': total_devices,
-                    'active_devices': active_devices,
-                    'today_attendance': today_attendance,
-                    'total_today_records': total_today_records,
-                    'attendance_rate': round(attendance_rate, 2),
-                    'pending_leaves': pending_leaves,
-                    'approved_leaves': approved_leaves,
-                    'total_leaves': total_leaves,
-                    'leave_approval_rate': round(leave_approval_rate, 2),
-                    'active_users': active_users,
-                    'inactive_users': inactive_users,
-                    'total_users': total_users,
-                    'lifecycle_counts': lifecycle_counts,
-                    'employee_growth': round(employee_growth, 2),
-                    'user_activation_rate': round((active_users / total_users * 100), 2) if total_users > 0 else 0,
-                }
+                # Precomputed every minute by the refresh_admin_dashboard_stats task
+                stats = get_admin_dashboard_stats()
             elif user.is_manager:
                 # Calculate office-specific statistics for manager
                 office = user.office
@@ -909,37 +918,17 @@ class DashboardViewSet(viewsets.ViewSet):
                 active_devices = Device.objects.filter(office=office, is_active=True).count()
                 
                 # Office attendance statistics - operational employees only
-                today_attendance = Attendance.objects.filter(
-                    user__office=office,
-                    user__employment_status__in=['active', 'notice_period'],
-                    date=today, 
-                    status='present'
-                ).count()
-                total_today_records = Attendance.objects.filter(
+                attendance = attendance_summary(Attendance.objects.filter(
                     user__office=office,
                     user__employment_status__in=['active', 'notice_period'],
                     date=today
-                ).count()
-                attendance_rate = (today_attendance / total_today_records * 100) if total_today_records > 0 else 0
+                ))
                 
                 # Office leave statistics
-                pending_leaves = Leave.objects.filter(
-                    user__office=office, 
-                    status='pending'
-                ).count()
-                approved_leaves = Leave.objects.filter(
-                    user__office=office,
-                    status='approved'
-                ).count()
-                total_leaves = Leave.objects.filter(user__office=office).count()
-                leave_approval_rate = (approved_leaves / total_leaves * 100) if total_leaves > 0 else 0
+                leaves = leave_summary(Leave.objects.filter(user__office=office))
                 
                 # Office user statistics
-                active_users = CustomUser.objects.filter(
-                    office=office, 
-                    employment_status__in=['active', 'notice_period']
-                ).count()
-                total_users = CustomUser.objects.filter(office=office).count()
+                users = user_activation_summary(CustomUser.objects.filter(office=office))
                 lifecycle_counts = {
                     item['employment_status']: item['total']
                     for item in CustomUser.objects.filter(office=office).values('employment_status').annotate(total=Count('id'))
@@ -951,17 +940,17 @@ class DashboardViewSet(viewsets.ViewSet):
                     'total_offices': 1,
                     'total_devices': total_devices,
                     'active_devices': active_devices,
-                    'today_attendance': today_attendance,
-                    'total_today_records': total_today_records,
-                    'attendance_rate': round(attendance_rate, 2),
-                    'pending_leaves': pending_leaves,
-                    'approved_leaves': approved_leaves,
-                    'total_leaves': total_leaves,
-                    'leave_approval_rate': round(leave_approval_rate, 2),
-                    'active_users': active_users,
-                    'total_users': total_users,
+                    'today_attendance': attendance['present'],
+                    'total_today_records': attendance['total'],
+                    'attendance_rate': round(attendance['rate'], 2),
+                    'pending_leaves': leaves['pending'],
+                    'approved_leaves': leaves['approved'],
+                    'total_leaves': leaves['total'],
+                    'leave_approval_rate': round(leaves['approval_rate'], 2),
+                    'active_users': users['active'],
+                    'total_users': users['total'],
                     'lifecycle_counts': lifecycle_counts,
-                    'user_activation_rate': round((active_users / total_users * 100), 2) if total_users > 0 else 0,
+                    'user_activation_rate': round(users['activation_rate'], 2),
                     'employee_growth': 0,  # Not applicable for managers
                 }
             elif user.is_accountant:
@@ -970,16 +959,7 @@ class DashboardViewSet(viewsets.ViewSet):
                     user=user,
                     date=today
                 ).count()
-                pending_leaves = Leave.objects.filter(
-                    user=user, 
-                    status='pending'
-                ).count()
-                approved_leaves = Leave.objects.filter(
-                    user=user,
-                    status='approved'
-                ).count()
-                total_leaves = Leave.objects.filter(user=user).count()
-                leave_approval_rate = (approved_leaves / total_leaves * 100) if total_leaves > 0 else 0
+                leaves = leave_summary(Leave.objects.filter(user=user))
                 
                 stats = {
                     'total_employees': 1,
@@ -990,10 +970,10 @@ class DashboardViewSet(viewsets.ViewSet):
                     'today_attendance': today_attendance,
                     'total_today_records': today_attendance,
                     'attendance_rate': 100 if today_attendance > 0 else 0,
-                    'pending_leaves': pending_leaves,
-                    'approved_leaves': approved_leaves,
-                    'total_leaves': total_leaves,
-                    'leave_approval_rate': round(leave_approval_rate, 2),
+                    'pending_leaves': leaves['pending'],
+                    'approved_leaves': leaves['approved'],
+                    'total_leaves': leaves['total'],
+                    'leave_approval_rate': round(leaves['approval_rate'], 2),
                     'active_users': 1,
                     'total_users': 1,
                     'user_activation_rate': 100,
@@ -1004,16 +984,7 @@ class DashboardViewSet(viewsets.ViewSet):
                     user=user,
                     date=today
                 ).count()
-                pending_leaves = Leave.objects.filter(
-                    user=user, 
-                    status='pending'
-                ).count()
-                approved_leaves = Leave.objects.filter(
-                    user=user,
-                    status='approved'
-                ).count()
-                total_leaves = Leave.objects.filter(user=user).count()
-                leave_approval_rate = (approved_leaves / total_leaves * 100) if total_leaves > 0 else 0
+                leaves = leave_summary(Leave.objects.filter(user=user))
                 
                 stats = {
                     'total_employees': 1,
@@ -1024,10 +995,10 @@ class DashboardViewSet(viewsets.ViewSet):
                     'today_attendance': today_attendance,
                     'total_today_records': today_attendance,
                     'attendance_rate': 100 if today_attendance > 0 else 0,
-                    'pending_leaves': pending_leaves,
-                    'approved_leaves': approved_leaves,
-                    'total_leaves': total_leaves,
-                    'leave_approval_rate': round(leave_approval_rate, 2),
+                    'pending_leaves': leaves['pending'],
+                    'approved_leaves': leaves['approved'],
+                    'total_leaves': leaves['total'],
+                    'leave_approval_rate': round(leaves['approval_rate'], 2),
                     'active_users': 1,
                     'total_users': 1,
                     'user_activation_rate': 100,
@@ -1043,102 +1014,65 @@ class DashboardViewSet(viewsets.ViewSet):
                 'details': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], permission_classes=[IsManagerWithOffice])
     def manager_stats(self, request):
         """Get manager-specific dashboard statistics"""
-        user = request.user
-        
-        if not user.is_manager:
-            return Response({
-                'error': 'Access denied. Only managers can access this endpoint.'
-            }, status=status.HTTP_403_FORBIDDEN)
+        office = request.user.office
         
-        office = user.office
-        if not office:
-            return Response({
-                'error': 'Manager not assigned to any office'
-            }, status=status.HTTP_400_BAD_REQUEST)
+        cache_key = f'manager_stats:{office.id}'
+        stats = cache.get(cache_key)
+        if stats is not None:
+            return Response(stats)
         
         today = timezone.now().date()
-        
-        # Office-specific statistics
-        total_employees = CustomUser.objects.filter(
-            office=office, 
-            role='employee'
-        ).count()
-        
-        # Today's attendance for the office
-        today_attendance = Attendance.objects.filter(
-            user__office=office,
-            date=today,
-            status='present'
-        ).count()
-        
-        # Pending leave requests for the office
-        pending_leaves = Leave.objects.filter(
-            user__office=office, 
-            status='pending'
-        ).count()
-        
-        # Active employees in the office
-        active_employees = CustomUser.objects.filter(
-            office=office, 
-            is_active=True,
-            role='employee'
-        ).count()
-        
-        # Office devices
-        total_devices = Device.objects.filter(office=office).count()
-        active_devices = Device.objects.filter(office=office, is_active=True).count()
-        
-        # Recent activity (last 7 days)
         week_ago = today - timedelta(days=7)
-        recent_attendance = Attendance.objects.filter(
-            user__office=office,
-            date__gte=week_ago
-        ).count()
         
-        recent_leaves = Leave.objects.filter(
-            user__office=office,
-            created_at__gte=week_ago
-        ).count()
+        # One conditional aggregate per table instead of a COUNT per figure
+        employees = CustomUser.objects.filter(office=office, role='employee').aggregate(
+            total=Count('pk'),
+            active=Count('pk', filter=Q(is_active=True)),
+        )
+        attendance = Attendance.objects.filter(user__office=office, date__gte=week_ago).aggregate(
+            today_present=Count('pk', filter=Q(date=today, status='present')),
+            recent=Count('pk'),
+        )
+        leaves = Leave.objects.filter(user__office=office).aggregate(
+            pending=Count('pk', filter=Q(status='pending')),
+            recent=Count('pk', filter=Q(created_at__gte=week_ago)),
+        )
+        devices = Device.objects.filter(office=office).aggregate(
+            total=Count('pk'),
+            active=Count('pk', filter=Q(is_active=True)),
+        )
+        total_employees = employees['total']
+        today_attendance = attendance['today_present']
         
         stats = {
             'office_name': office.name,
             'office_id': str(office.id),
             'total_employees': total_employees,
             'today_attendance': today_attendance,
-            'pending_leaves': pending_leaves,
-            'active_employees': active_employees,
-            'total_devices': total_devices,
-            'active_devices': active_devices,
-            'recent_attendance': recent_attendance,
-            'recent_leaves': recent_leaves,
+            'pending_leaves': leaves['pending'],
+            'active_employees': employees['active'],
+            'total_devices': devices['total'],
+            'active_devices': devices['active'],
+            'recent_attendance': attendance['recent'],
+            'recent_leaves': leaves['recent'],
             'attendance_rate': round((today_attendance / total_employees * 100), 2) if total_employees > 0 else 0,
         }
         
+        cache.set(cache_key, stats, MANAGER_STATS_CACHE_TIMEOUT)
         return Response(stats)
 
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], permission_classes=[IsManagerWithOffice])
     def manager_employees(self, request):
         """Get employees from manager's office"""
-        user = request.user
-        
-        if not user.is_manager:
-            return Response({
-                'error': 'Access denied. Only managers can access this endpoint.'
-            }, status=status.HTTP_403_FORBIDDEN)
-        
-        office = user.office
-        if not office:
-            return Response({
-                'error': 'Manager not assigned to any office'
-            }, status=status.HTTP_400_BAD_REQUEST)
+        office = request.user.office
         
         # Get query parameters
         search = request.query_params.get('search', '')
         department = request.query_params.get('department', '')
-        status = request.query_params.get('status', '')
+        status_filter = request.query_params.get('status', '')
         is_active = request.query_params.get('is_active')
         page = int(request.query_params.get('page', 1))
         page_size = min(int(request.query_params.get('page_size', 10)), 100)
@@ -1147,7 +1081,7 @@ class DashboardViewSet(viewsets.ViewSet):
         queryset = CustomUser.objects.filter(
             office=office,
             role='employee'
-        ).select_related('office', 'department', 'designation')
+        ).values(*ManagerEmployeeListSerializer.VALUES_FIELDS)
         
         # Apply filters used by the manager dashboard.
         if search:
@@ -1166,10 +1100,10 @@ class DashboardViewSet(viewsets.ViewSet):
             inactive_count=Count('id', filter=Q(is_active=False)),
         )
         
-        if status:
-            if status == 'active':
+        if status_filter:
+            if status_filter == 'active':
                 queryset = queryset.filter(is_active=True)
-            elif status == 'inactive':
+            elif status_filter == 'inactive':
                 queryset = queryset.filter(is_active=False)
         elif is_active in ['true', '1', 'yes']:
             queryset = queryset.filter(is_active=True)
@@ -1177,41 +1111,41 @@ class DashboardViewSet(viewsets.ViewSet):
             queryset = queryset.filter(is_active=False)
         
         # Pagination
-        total_count = queryset.count()
-        start = (page - 1) * page_size
-        end = start + page_size
-        employees = queryset[start:end]
+        cursor = request.query_params.get('cursor')
+        if cursor is not None:
+            # Keyset pagination: cost no longer grows with page depth
+            try:
+                employees, next_cursor = keyset_paginate(queryset, ('last_name', 'id'), cursor, page_size)
+            except ValueError:
+                return Response({
+                    'error': 'Invalid cursor'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            total_count = keyset_total(queryset, employees, cursor, next_cursor)
+        else:
+            employees, total_count = paginate_with_total(queryset, page, page_size)
+            next_cursor = None
         
-        # Serialize data
-        serializer = ManagerEmployeeListSerializer(employees, many=True, context={'request': request})
+        # Rows are plain dicts; render them without per-field serializer overhead
+        results = [ManagerEmployeeListSerializer.represent_values(row, request) for row in employees]
         
         return Response({
-            'results': serializer.data,
+            'results': results,
             'count': total_count,
             'page': page,
             'page_size': page_size,
             'total_pages': (total_count + page_size - 1) // page_size,
+            'next_cursor': next_cursor,
             'active_count': counts['active_count'],
             'inactive_count': counts['inactive_count'],
             'office_name': office.name,
             'office_id': str(office.id)
         })
 
-    @action(detail=True, methods=['put'])
+    @action(detail=True, methods=['put'], permission_classes=[IsManagerWithOffice])
     def manager_approve_leave(self, request, pk=None):
         """Approve or reject leave request (manager only)"""
         user = request.user
-        
-        if not user.is_manager:
-            return Response({
-                'error': 'Access denied. Only managers can approve leaves.'
-            }, status=status.HTTP_403_FORBIDDEN)
-        
         office = user.office
-        if not office:
-            return Response({
-                'error': 'Manager not assigned to any office'
-            }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
             leave = Leave.objects.get(pk=pk)
@@ -1235,18 +1169,15 @@ class DashboardViewSet(viewsets.ViewSet):
                 'error': 'Invalid action. Must be "approve" or "reject".'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Update leave status
-        if action == 'approve':
-            leave.status = 'approved'
-            leave.approved_by = user
-            leave.approved_at = timezone.now()
-        else:
-            leave.status = 'rejected'
-            leave.rejected_by = user
-            leave.rejected_at = timezone.now()
+        # Update leave status; Leave records the decider in approved_by/approved_at
+        # for both outcomes, which is also what the decision notification keys on
+        leave.status = 'approved' if action == 'approve' else 'rejected'
+        leave.approved_by = user
+        leave.approved_at = timezone.now()
+        if action == 'reject':
             leave.rejection_reason = reason
         
-        leave.save()
+        leave.save(update_fields=LEAVE_DECISION_FIELDS)
         
         # Serialize and return updated leave
         serializer = LeaveSerializer(leave, context={'request': request})
@@ -1255,38 +1186,25 @@ class DashboardViewSet(viewsets.ViewSet):
             'leave': serializer.data
         })
 
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], permission_classes=[IsManagerWithOffice])
     def manager_attendance(self, request):
         """Get attendance data for manager's office"""
-        user = request.user
-        
-        if not user.is_manager:
-            return Response({
-                'error': 'Access denied. Only managers can access this endpoint.'
-            }, status=status.HTTP_403_FORBIDDEN)
-        
-        office = user.office
-        if not office:
-            return Response({
-                'error': 'Manager not assigned to any office'
-            }, status=status.HTTP_400_BAD_REQUEST)
+        office = request.user.office
         
         # Get query parameters
-        date = request.query_params.get('date', timezone.now().date().isoformat())
+        date_param = request.query_params.get('date', timezone.now().date().isoformat())
         user_id = request.query_params.get('user', '')
-        status = request.query_params.get('status', '')
+        status_filter = request.query_params.get('status', '')
         page = int(request.query_params.get('page', 1))
         page_size = int(request.query_params.get('page_size', 10))
         
         try:
-            target_date = timezone.datetime.strptime(date, '%Y-%m-%d').date()
+            target_date = date.fromisoformat(date_param)
         except ValueError:
             target_date = timezone.now().date()
         
         # Build queryset for office attendance
-        queryset = Attendance.objects.filter(
-            user__office=office
-        ).select_related('user', 'user__office', 'device')
+        queryset = Attendance.objects.filter(user__office=office)
         
         # Apply filters
         if target_date:
@@ -1295,50 +1213,74 @@ class DashboardViewSet(viewsets.ViewSet):
         if user_id:
             queryset = queryset.filter(user_id=user_id)
         
-        if status:
-            queryset = queryset.filter(status=status)
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        
+        # Dashboards poll this endpoint; skip the page query and serialization
+        # when the client already holds the current listing
+        etag, last_modified = listing_validators(request, queryset, office.id, target_date)
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        queryset = queryset.select_related(
+            'user', 'user__office', 'user__department', 'user__designation', 'device'
+        ).annotate(
+            # Resignation fields of the nested CustomUserSerializer, which would
+            # otherwise run two queries per row
+            user_has_active_resignation=Exists(Resignation.objects.filter(
+                user=OuterRef('user_id'),
+                status__in=['pending', 'approved']
+            )),
+            user_latest_resignation_status=Subquery(Resignation.objects.filter(
+                user=OuterRef('user_id')
+            ).order_by('-created_at').values('status')[:1]),
+        )
         
         # Order by most recent
         queryset = queryset.order_by('-created_at')
         
         # Pagination
-        total_count = queryset.count()
-        start = (page - 1) * page_size
-        end = start + page_size
-        attendance_records = queryset[start:end]
+        cursor = request.query_params.get('cursor')
+        if cursor is not None:
+            # Keyset pagination: cost no longer grows with page depth
+            try:
+                attendance_records, next_cursor = keyset_paginate(queryset, ('-created_at', '-id'), cursor, page_size)
+            except ValueError:
+                return Response({
+                    'error': 'Invalid cursor'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            total_count = keyset_total(queryset, attendance_records, cursor, next_cursor)
+        else:
+            attendance_records, total_count = paginate_with_total(queryset, page, page_size)
+            next_cursor = None
+        
+        for record in attendance_records:
+            record.user.has_active_resignation = record.user_has_active_resignation
+            record.user.latest_resignation_status = record.user_latest_resignation_status
         
         # Serialize data
         serializer = AttendanceSerializer(attendance_records, many=True)
         
-        return Response({
+        return with_listing_validators(Response({
             'results': serializer.data,
             'count': total_count,
             'page': page,
             'page_size': page_size,
             'total_pages': (total_count + page_size - 1) // page_size,
+            'next_cursor': next_cursor,
             'office_name': office.name,
             'office_id': str(office.id),
             'date': target_date.isoformat()
-        })
+        }), etag, last_modified)
 
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], permission_classes=[IsManagerWithOffice])
     def manager_leaves(self, request):
         """Get leave requests for manager's office"""
-        user = request.user
-        
-        if not user.is_manager:
-            return Response({
-                'error': 'Access denied. Only managers can access this endpoint.'
-            }, status=status.HTTP_403_FORBIDDEN)
-        
-        office = user.office
-        if not office:
-            return Response({
-                'error': 'Manager not assigned to any office'
-            }, status=status.HTTP_400_BAD_REQUEST)
+        office = request.user.office
         
         # Get query parameters
-        status = request.query_params.get('status', '')
+        status_filter = request.query_params.get('status', '')
         start_date = request.query_params.get('start_date', '')
         end_date = request.query_params.get('end_date', '')
         user_id = request.query_params.get('user', '')
@@ -1351,19 +1293,19 @@ class DashboardViewSet(viewsets.ViewSet):
         ).select_related('user', 'user__office')
         
         # Apply filters
-        if status:
-            queryset = queryset.filter(status=status)
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
         
         if start_date:
             try:
-                start = timezone.datetime.strptime(start_date, '%Y-%m-%d').date()
+                start = date.fromisoformat(start_date)
                 queryset = queryset.filter(start_date__gte=start)
             except ValueError:
                 pass
         
         if end_date:
             try:
-                end = timezone.datetime.strptime(end_date, '%Y-%m-%d').date()
+                end = date.fromisoformat(end_date)
                 queryset = queryset.filter(end_date__lte=end)
             except ValueError:
                 pass
@@ -1371,27 +1313,64 @@ class DashboardViewSet(viewsets.ViewSet):
         if user_id:
             queryset = queryset.filter(user_id=user_id)
         
+        # Dashboards poll this endpoint; skip the page query and serialization
+        # when the client already holds the current listing
+        etag, last_modified = listing_validators(request, queryset, office.id)
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        
         # Order by most recent
         queryset = queryset.order_by('-created_at')
         
         # Pagination
-        total_count = queryset.count()
-        start = (page - 1) * page_size
-        end = start + page_size
-        leave_requests = queryset[start:end]
+        cursor = request.query_params.get('cursor')
+        if cursor is not None:
+            # Keyset pagination: cost no longer grows with page depth
+            try:
+                leave_requests, next_cursor = keyset_paginate(queryset, ('-created_at', '-id'), cursor, page_size)
+            except ValueError:
+                return Response({
+                    'error': 'Invalid cursor'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            total_count = keyset_total(queryset, leave_requests, cursor, next_cursor)
+        else:
+            leave_requests, total_count = paginate_with_total(queryset, page, page_size)
+            next_cursor = None
         
         # Serialize data
         serializer = LeaveSerializer(leave_requests, many=True, context={'request': request})
         
-        return Response({
+        return with_listing_validators(Response({
             'results': serializer.data,
             'count': total_count,
             'page': page,
             'page_size': page_size,
             'total_pages': (total_count + page_size - 1) // page_size,
+            'next_cursor': next_cursor,
             'office_name': office.name,
             'office_id': str(office.id)
-        })
+        }), etag, last_modified)
+
+NO_SALARY_PERMISSIONS = {
+    'can_create_salary': False,
+    'can_update_salary': False,
+    'can_delete_salary': False,
+    'can_view_salary': False,
+}
+
+# Salary permissions reported by debug_user_permissions, keyed by role
+ROLE_SALARY_PERMISSIONS = {
+    'admin': {**NO_SALARY_PERMISSIONS, 'can_create_salary': True, 'can_update_salary': True,
+              'can_delete_salary': True, 'can_view_salary': True},
+    'manager': {**NO_SALARY_PERMISSIONS, 'can_create_salary': True, 'can_update_salary': True,
+                'can_delete_salary': True, 'can_view_salary': True},
+    'accountant': {**NO_SALARY_PERMISSIONS, 'can_create_salary': True, 'can_update_salary': True,
+                   'can_delete_salary': True},
+    'employee': {**NO_SALARY_PERMISSIONS, 'can_view_salary': True},
+    'hr': NO_SALARY_PERMISSIONS,
+}
+
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
@@ -1421,12 +1400,7 @@ def debug_user_permissions(request):
         'is_authenticated': user.is_authenticated,
         'is_active': user.is_active,
         'has_office': bool(user.office),
-        'permissions': {
-            'can_create_salary': user.role in ['admin', 'manager', 'accountant'],
-            'can_update_salary': user.role in ['admin', 'manager', 'accountant'],
-            'can_delete_salary': user.role in ['admin', 'manager', 'accountant'],
-            'can_view_salary': user.role in ['admin', 'manager', 'employee'],
-        }
+        'permissions': ROLE_SALARY_PERMISSIONS.get(user.role, NO_SALARY_PERMISSIONS),
     })
 
 def custom_404(request, exception=None):
@@ -5,25 +5,58 @@ Handles real-time attendance data pushing from ZKTeco devices
 """
 
 import logging
-import json
+import threading
 import time
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List, Dict, Optional
 from django.utils import timezone
-from django.db import transaction
 from django.conf import settings
 
-from .attendance_processing import record_raw_punch
-from .models import Device, CustomUser, Attendance, ESSLAttendanceLog
+from .attendance_processing import record_raw_punches
+from .models import Device
 
 logger = logging.getLogger(__name__)
 
+# Punches recorded per transaction when processing a push payload
+PUSH_CHUNK_SIZE = 200
+
+# Minimum seconds between Device.last_sync writes for a pushing device
+LAST_SYNC_FLUSH_INTERVAL = 30
+
+# Device timestamp layouts that datetime.fromisoformat may reject
+TIMESTAMP_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S.%f')
+
+# Punch directions accepted verbatim from a record's type field
+PUNCH_TYPES = frozenset({'in', 'out', 'check_in', 'check_out'})
+
+# Numeric device status -> punch direction; other integers are check-ins
+STATUS_TO_PUNCH = {1: 'out'}
+
+
+def parse_push_timestamp(value: str) -> datetime:
+    """Parse a pushed punch time, trying the C-implemented ISO parser first"""
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        pass
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised timestamp format: {value}")
+
+
 class ZKTecoPushService:
     """Service for handling ZKTeco device push data"""
     
     def __init__(self):
         self.active_devices = {}
         self.push_endpoints = {}
+        # Request threads share this singleton; guards push_endpoints
+        self._lock = threading.RLock()
+        # device id -> monotonic time of the last last_sync write
+        self._last_sync_flush = {}
         
     def register_device_for_push(self, device: Device, push_url: str = None):
         """Register a ZKTeco device for push data"""
@@ -36,28 +69,31 @@ class ZKTecoPushService:
             server_url = getattr(settings, 'SERVER_URL', 'http://localhost:8000')
             push_url = f"{server_url}/api/device/push-attendance/"
             
-        self.push_endpoints[device.id] = {
-            'device': device,
-            'push_url': push_url,
-            'last_push': None,
-            'push_count': 0
-        }
+        with self._lock:
+            self.push_endpoints[device.id] = {
+                'device': device,
+                'push_url': push_url,
+                'last_push': None,
+                'push_count': 0
+            }
         
         logger.info(f"Registered ZKTeco device {device.name} for push data at {push_url}")
         return True
     
     def unregister_device(self, device_id):
         """Unregister a device from push service"""
-        if device_id in self.push_endpoints:
-            device_name = self.push_endpoints[device_id]['device'].name
-            del self.push_endpoints[device_id]
-            logger.info(f"Unregistered ZKTeco device {device_name} from push service")
+        with self._lock:
+            endpoint_info = self.push_endpoints.pop(device_id, None)
+            self._last_sync_flush.pop(device_id, None)
+        if endpoint_info:
+            logger.info(f"Unregistered ZKTeco device {endpoint_info['device'].name} from push service")
             return True
         return False
     
     def get_registered_devices(self):
         """Get all registered devices"""
-        return list(self.push_endpoints.values())
+        with self._lock:
+            return [dict(endpoint_info) for endpoint_info in self.push_endpoints.values()]
     
     def process_push_data(self, device: Device, attendance_data: List[Dict]) -> Dict:
         """Process pushed attendance data from ZKTeco device"""
@@ -67,25 +103,49 @@ class ZKTecoPushService:
             
             logger.info(f"Processing {len(attendance_data)} attendance records from {device.name}")
             
-            with transaction.atomic():
-                for record in attendance_data:
-                    try:
-                        if self._process_single_record(device, record):
-                            processed_count += 1
-                        else:
-                            error_count += 1
-                    except Exception as e:
-                        logger.error(f"Error processing record: {str(e)}")
-                        error_count += 1
-                
-                # Update device last sync time
+            punches = []
+            for record in attendance_data:
+                try:
+                    punch = self._build_punch(record)
+                except Exception as e:
+                    logger.error(f"Error processing record: {str(e)}")
+                    punch = None
+                if punch:
+                    punches.append(punch)
+                else:
+                    error_count += 1
+            
+            # Each chunk commits on its own (record_raw_punches is atomic), so locks
+            # are held for one chunk and a failing chunk keeps the earlier ones
+            for start in range(0, len(punches), PUSH_CHUNK_SIZE):
+                chunk = punches[start:start + PUSH_CHUNK_SIZE]
+                try:
+                    results = record_raw_punches(device, chunk, source='zkteco_push')
+                except Exception as e:
+                    logger.error(f"Error processing push chunk from {device.name}: {str(e)}")
+                    error_count += len(chunk)
+                    continue
+                for raw_log, _created, result in results:
+                    if result == 'unmatched':
+                        logger.warning(f"Unmatched ZKTeco push punch for ID: {raw_log.device_user_id or raw_log.biometric_id}")
+                    processed_count += 1
+            
+            # Update device last sync time, at most once per interval per device
+            now = time.monotonic()
+            with self._lock:
+                flush = now - self._last_sync_flush.get(device.id, float('-inf')) >= LAST_SYNC_FLUSH_INTERVAL
+                if flush:
+                    self._last_sync_flush[device.id] = now
+            if flush:
                 device.last_sync = timezone.now()
-                device.save(update_fields=['last_sync'])
-                
-                # Update push statistics
-                if device.id in self.push_endpoints:
-                    self.push_endpoints[device.id]['last_push'] = timezone.now()
-                    self.push_endpoints[device.id]['push_count'] += 1
+                Device.objects.filter(pk=device.pk).update(last_sync=device.last_sync)
+            
+            # Update push statistics
+            with self._lock:
+                endpoint_info = self.push_endpoints.get(device.id)
+                if endpoint_info:
+                    endpoint_info['last_push'] = timezone.now()
+                    endpoint_info['push_count'] += 1
             
             result = {
                 'success': True,
@@ -107,8 +167,8 @@ class ZKTecoPushService:
                 'timestamp': timezone.now().isoformat()
             }
     
-    def _process_single_record(self, device: Device, record: Dict) -> bool:
-        """Process a single attendance record"""
+    def _build_punch(self, record: Dict) -> Optional[Dict]:
+        """Turn a pushed record into a punch for record_raw_punches, or None if it is unusable"""
         try:
             # Extract user information
             user_id = record.get('user_id') or record.get('uid') or record.get('employee_id')
@@ -116,27 +176,18 @@ class ZKTecoPushService:
             
             if not user_id and not biometric_id:
                 logger.warning("No user ID or biometric ID found in record")
-                return False
+                return None
             
             # Extract timestamp
             timestamp_str = record.get('timestamp') or record.get('punch_time') or record.get('time')
             if not timestamp_str:
                 logger.warning("No timestamp found in record")
-                return False
+                return None
             
             # Parse timestamp
             try:
                 if isinstance(timestamp_str, str):
-                    # Try different timestamp formats
-                    for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S.%f']:
-                        try:
-                            timestamp = datetime.strptime(timestamp_str, fmt)
-                            break
-                        except ValueError:
-                            continue
-                    else:
-                        # Try ISO format
-                        timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+                    timestamp = parse_push_timestamp(timestamp_str)
                 else:
                     timestamp = timestamp_str
                 
@@ -146,7 +197,7 @@ class ZKTecoPushService:
                     
             except Exception as e:
                 logger.error(f"Error parsing timestamp {timestamp_str}: {str(e)}")
-                return False
+                return None
             
             # Extract attendance type
             attendance_type = record.get('type') or record.get('punch_type') or 'check_in'
@@ -154,37 +205,34 @@ class ZKTecoPushService:
             
             # Determine check-in/check-out based on status or type
             if isinstance(status, int):
-                punch_type = 'out' if status == 1 else 'in'
+                punch_type = STATUS_TO_PUNCH.get(status, 'in')
             else:
                 punch_type = attendance_type.lower()
-                if punch_type not in ['in', 'out', 'check_in', 'check_out']:
+                if punch_type not in PUNCH_TYPES:
                     # Auto-detect based on time
                     punch_type = 'in' if timestamp.hour < 12 else 'out'
             
-            raw_log, created, result = record_raw_punch(
-                device=device,
-                biometric_id=biometric_id or user_id,
-                device_user_id=user_id or biometric_id,
-                employee_id=user_id,
-                punch_time=timestamp,
-                punch_type=punch_type,
-                source='zkteco_push',
-                raw_payload=record,
-            )
-            if result == 'unmatched':
-                logger.warning(f"Unmatched ZKTeco push punch for ID: {user_id or biometric_id}")
-            return result in ['processed', 'duplicate', 'unmatched']
+            return {
+                'biometric_id': biometric_id or user_id,
+                'device_user_id': user_id or biometric_id,
+                'employee_id': user_id,
+                'punch_time': timestamp,
+                'punch_type': punch_type,
+                'raw_payload': record,
+            }
             
         except Exception as e:
             logger.error(f"Error processing single record: {str(e)}")
-            return False
+            return None
     
     def get_device_push_status(self, device_id) -> Dict:
         """Get push status for a specific device"""
-        if device_id not in self.push_endpoints:
+        with self._lock:
+            endpoint_info = self.push_endpoints.get(device_id)
+            endpoint_info = dict(endpoint_info) if endpoint_info else None
+        if not endpoint_info:
             return {'registered': False}
         
-        endpoint_info = self.push_endpoints[device_id]
         return {
             'registered': True,
             'device_name': endpoint_info['device'].name,
@@ -195,12 +243,16 @@ class ZKTecoPushService:
     
     def get_all_push_status(self) -> Dict:
         """Get push status for all registered devices"""
+        # Snapshot under the lock so registrations can't change the dict mid-iteration
+        with self._lock:
+            endpoints = [(device_id, dict(endpoint_info)) for device_id, endpoint_info in self.push_endpoints.items()]
+        
         status = {
-            'total_devices': len(self.push_endpoints),
+            'total_devices': len(endpoints),
             'devices': {}
         }
         
-        for device_id, endpoint_info in self.push_endpoints.items():
+        for device_id, endpoint_info in endpoints:
             status['devices'][str(device_id)] = {
                 'device_name': endpoint_info['device'].name,
                 'ip_address': endpoint_info['device'].ip_address,
@@ -6,16 +6,56 @@ Handles real-time attendance data fetching from ZKTeco devices
 
 import socket
 import struct
+import threading
 import time
 import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from operator import itemgetter
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from django.utils import timezone
 from django.conf import settings
 from django.db import close_old_connections
 
 logger = logging.getLogger(__name__)
 
+ZK_MAGIC = 0x5050827D
+
+# Precompiled layouts, read with unpack_from so responses are never sliced per field
+UINT32 = struct.Struct('<I')
+# Attendance log record: user_id, timestamp, punch type, 7 padding bytes
+LOG_RECORD = struct.Struct('<IIB7x')
+# Command header: magic, size, command, checksum, session id, reply id
+COMMAND_HEADER = struct.Struct('<IIHHII')
+CHECKSUM = struct.Struct('<H')
+
+# ZKTeco punch state code -> direction: check-in, check-out, break-out,
+# break-in, overtime-in, overtime-out. Unknown codes count as check-outs.
+PUNCH_DIRECTIONS = ('in', 'out', 'out', 'in', 'in', 'out')
+
+# Kernel socket buffers sized to absorb a device's attendance dump burst
+# (Linux clamps the request to net.core.rmem_max / wmem_max)
+SOCKET_BUFFER_SIZE = 4 * 1024 * 1024
+# Largest UDP payload; recv(1024) truncated user and attendance responses
+MAX_UDP_PAYLOAD = 65507
+
+# Upper bound on devices fetched concurrently
+MAX_FETCH_WORKERS = 32
+
+# Seconds a cached device connection may sit unused before it is closed
+DEVICE_IDLE_TIMEOUT = 300
+# Most device connections kept open; the least recently used is closed beyond this
+MAX_CACHED_DEVICES = 256
+
+# Logs written per record_raw_punches call during a database sync
+SYNC_BATCH_SIZE = 500
+# Unmatched biometric IDs listed in the per-sync warning
+UNMATCHED_IDS_LOGGED = 20
+
+log_timestamp = itemgetter('timestamp')
+
 class ZKTecoDevice:
     """ZKTeco device communication class"""
     
@@ -26,17 +66,22 @@ class ZKTecoDevice:
         self.session_id = 0
         self.reply_id = 0
         self.socket = None
+        # Reused receive buffer; see _send_command
+        self._rxbuf = bytearray(MAX_UDP_PAYLOAD)
+        self._rxview = memoryview(self._rxbuf)
         
     def connect(self) -> bool:
         """Connect to ZKTeco device"""
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
             self.socket.settimeout(self.timeout)
             self.socket.connect((self.ip_address, self.port))
-            logger.info(f"Connected to ZKTeco device at {self.ip_address}:{self.port}")
+            logger.info("Connected to ZKTeco device at %s:%s", self.ip_address, self.port)
             return True
         except Exception as e:
-            logger.error(f"Failed to connect to ZKTeco device {self.ip_address}:{self.port} - {str(e)}")
+            logger.error("Failed to connect to ZKTeco device %s:%s - %s", self.ip_address, self.port, e)
             return False
     
     def disconnect(self):
@@ -44,50 +89,63 @@ class ZKTecoDevice:
         if self.socket:
             try:
                 self.socket.close()
-                logger.info(f"Disconnected from ZKTeco device {self.ip_address}:{self.port}")
+                logger.info("Disconnected from ZKTeco device %s:%s", self.ip_address, self.port)
             except:
                 pass
             finally:
                 self.socket = None
     
-    def _create_command(self, command: int, data: bytes = b'') -> bytes:
+    def _create_command(self, command: int, data: bytes = b'') -> bytearray:
         """Create ZKTeco command packet"""
-        # ZKTeco protocol header
-        header = struct.pack('<I', 0x5050827D)  # Magic number
-        command_bytes = struct.pack('<H', command)
-        checksum = struct.pack('<H', 0)
-        session_id = struct.pack('<I', self.session_id)
-        reply_id = struct.pack('<I', self.reply_id)
-        
-        # Calculate packet size
-        packet_size = len(header) + len(command_bytes) + len(checksum) + len(session_id) + len(reply_id) + len(data)
-        size_bytes = struct.pack('<I', packet_size)
+        # Header size field counts everything after itself
+        packet = bytearray(COMMAND_HEADER.size + len(data))
+        COMMAND_HEADER.pack_into(
+            packet, 0, ZK_MAGIC, COMMAND_HEADER.size - 4 + len(data),
+            command, 0, self.session_id, self.reply_id
+        )
+        packet[COMMAND_HEADER.size:] = data
         
-        # Build packet
-        packet = header + size_bytes + command_bytes + checksum + session_id + reply_id + data
-        
-        # Calculate checksum
-        checksum_value = sum(packet) & 0xFFFF
-        packet = packet[:8] + struct.pack('<H', checksum_value) + packet[10:]
+        # Checksum covers the whole packet with the checksum field zeroed
+        CHECKSUM.pack_into(packet, 8, sum(packet) & 0xFFFF)
         
         return packet
     
-    def _send_command(self, command: int, data: bytes = b'') -> Optional[bytes]:
-        """Send command to device and get response"""
+    def _exchange(self, packet: bytearray) -> int:
+        """Send a packet and receive the reply, reconnecting once if the socket has failed"""
         try:
-            packet = self._create_command(command, data)
             self.socket.send(packet)
+            return self.socket.recv_into(self._rxbuf)
+        except socket.timeout:
+            raise
+        except OSError as e:
+            # e.g. ICMP port unreachable surfacing as ConnectionRefusedError
+            logger.warning("Socket error on ZKTeco device %s:%s, reconnecting - %s", self.ip_address, self.port, e)
+            self.disconnect()
+            if not self.connect():
+                raise
+            self.socket.send(packet)
+            return self.socket.recv_into(self._rxbuf)
+    
+    def _send_command(self, command: int, data: bytes = b'') -> Optional[memoryview]:
+        """
+        Send command to device and get response.
+        
+        The response is a view into this device's receive buffer, so it is only
+        valid until the next command: parse it (or copy it) before sending again.
+        """
+        try:
+            packet = self._create_command(command, data)
             
             # Receive response
-            response = self.socket.recv(1024)
-            if len(response) >= 8:
+            size = self._exchange(packet)
+            if size >= 8:
                 # Parse response header
-                magic = struct.unpack('<I', response[:4])[0]
-                if magic == 0x5050827D:
-                    return response
+                magic = UINT32.unpack_from(self._rxbuf)[0]
+                if magic == ZK_MAGIC:
+                    return self._rxview[:size]
             return None
         except Exception as e:
-            logger.error(f"Failed to send command to device: {str(e)}")
+            logger.error("Failed to send command to device: %s", e)
             return None
     
     def get_device_info(self) -> Optional[Dict]:
@@ -105,7 +163,7 @@ class ZKTecoDevice:
                 }
             return None
         except Exception as e:
-            logger.error(f"Failed to get device info: {str(e)}")
+            logger.error("Failed to get device info: %s", e)
             return None
     
     def get_users(self) -> List[Dict]:
@@ -115,15 +173,18 @@ class ZKTecoDevice:
             # Get user count first
             response = self._send_command(0x0002)  # Get user count
             if response and len(response) >= 12:
-                user_count = struct.unpack('<I', response[8:12])[0]
-                logger.info(f"Found {user_count} users on device")
+                user_count = UINT32.unpack_from(response, 8)[0]
+                logger.info("Found %s users on device", user_count)
                 
                 # Get user data (simplified - actual implementation would iterate through users)
-                for i in range(min(user_count, 100)):  # Limit to 100 users for safety
+                for i in range(user_count):
                     user_data = self._send_command(0x0003, struct.pack('<I', i))  # Get user data
-                    if user_data and len(user_data) >= 16:
+                    if not user_data:
+                        # Device stopped answering; don't wait out a timeout per remaining user
+                        break
+                    if len(user_data) >= 16:
                         # Parse user data (simplified)
-                        user_id = struct.unpack('<I', user_data[8:12])[0]
+                        user_id = UINT32.unpack_from(user_data, 8)[0]
                         users.append({
                             'user_id': user_id,
                             'name': f"User_{user_id}",  # Simplified name
@@ -133,100 +194,141 @@ class ZKTecoDevice:
                             'fingerprint_count': 0
                         })
         except Exception as e:
-            logger.error(f"Failed to get users: {str(e)}")
+            logger.error("Failed to get users: %s", e)
         
         return users
     
     def get_attendance_logs(self, start_date: datetime = None, end_date: datetime = None) -> List[Dict]:
         """Get attendance logs from device"""
-        attendance_logs = []
-        
+        return list(self.iter_attendance_logs(start_date, end_date))
+    
+    def iter_attendance_logs(self, start_date: datetime = None, end_date: datetime = None) -> Iterator[Dict]:
+        """Yield attendance logs from device page by page, without building the full list"""
         try:
+            now = timezone.now()
             if not start_date:
-                start_date = timezone.now() - timedelta(days=7)  # Default to last 7 days
+                start_date = now - timedelta(days=7)  # Default to last 7 days
             if not end_date:
-                end_date = timezone.now()
+                end_date = now
             
             # Convert dates to device format
             start_timestamp = int(start_date.timestamp())
             end_timestamp = int(end_date.timestamp())
             
-            # Get attendance logs
-            data = struct.pack('<II', start_timestamp, end_timestamp)
-            response = self._send_command(0x0004, data)  # Get attendance logs
+            # Aware punch times in the site timezone; naive fromtimestamp used the
+            # server's OS zone, which make_aware then relabelled as TIME_ZONE
+            tz = timezone.get_current_timezone()
+            from_timestamp = datetime.fromtimestamp
+            # Pages overlap on their boundary second, so remember only the records
+            # read at that second and skip them when the next page repeats them
+            seen = set()
+            first_page = True
             
-            if response and len(response) >= 12:
-                log_count = struct.unpack('<I', response[8:12])[0]
-                logger.info(f"Found {log_count} attendance logs on device")
+            while True:
+                # Get attendance logs
+                data = struct.pack('<II', start_timestamp, end_timestamp)
+                response = self._send_command(0x0004, data)  # Get attendance logs
+                if not response or len(response) < 12:
+                    break
                 
-                # Parse attendance logs (simplified)
-                offset = 12
-                for i in range(min(log_count, 1000)):  # Limit to 1000 logs for safety
-                    if offset + 16 <= len(response):
-                        # Parse log entry (simplified structure)
-                        user_id = struct.unpack('<I', response[offset:offset+4])[0]
-                        timestamp = struct.unpack('<I', response[offset+4:offset+8])[0]
-                        punch_type = struct.unpack('<B', response[offset+8:offset+9])[0]
-                        
-                        attendance_logs.append({
-                            'user_id': user_id,
-                            'timestamp': timestamp,
-                            'punch_time': datetime.fromtimestamp(timestamp),
-                            'punch_type': 'in' if punch_type == 0 else 'out',
-                            'device_ip': self.ip_address
-                        })
-                        
-                        offset += 16
-                    else:
-                        break
+                log_count = UINT32.unpack_from(response, 8)[0]
+                if first_page:
+                    logger.info("Found %s attendance logs on device", log_count)
+                    first_page = False
+                
+                # Parse only complete records actually present in the response (simplified)
+                record_count = min(log_count, (len(response) - 12) // LOG_RECORD.size)
+                records = response[12:12 + record_count * LOG_RECORD.size]
+                last_timestamp = start_timestamp
+                for record in LOG_RECORD.iter_unpack(records):
+                    if record in seen:
+                        continue
+                    user_id, timestamp, punch_type = record
+                    last_timestamp = max(last_timestamp, timestamp)
+                    yield {
+                        'user_id': user_id,
+                        'timestamp': timestamp,
+                        'punch_time': from_timestamp(timestamp, tz),
+                        'punch_type': PUNCH_DIRECTIONS[punch_type] if punch_type < len(PUNCH_DIRECTIONS) else 'out',
+                        'device_ip': self.ip_address
+                    }
+                
+                # More logs than one datagram holds: continue from the last second received,
+                # stopping if a page made no progress so a stuck device can't loop forever
+                if record_count >= log_count or last_timestamp <= start_timestamp:
+                    break
+                start_timestamp = last_timestamp
+                seen = {
+                    record for record in LOG_RECORD.iter_unpack(records)
+                    if record[1] == last_timestamp
+                }
                         
         except Exception as e:
-            logger.error(f"Failed to get attendance logs: {str(e)}")
-        
-        return attendance_logs
+            logger.error("Failed to get attendance logs: %s", e)
 
 class ZKTecoService:
     """Service class for managing ZKTeco devices and attendance data"""
     
     def __init__(self):
-        self.devices = {}
+        # Least recently used first
+        self.devices = OrderedDict()
+        # device key -> monotonic time the connection was last handed out
+        self.device_last_used = {}
+        # Devices are fetched from worker threads; guards self.devices and device_last_used
+        self._devices_lock = threading.Lock()
+    
+    def _close_idle_devices(self, now: float):
+        """Close cached connections unused for DEVICE_IDLE_TIMEOUT; caller holds the lock"""
+        for device_key, last_used in list(self.device_last_used.items()):
+            if now - last_used > DEVICE_IDLE_TIMEOUT:
+                self.devices.pop(device_key).disconnect()
+                del self.device_last_used[device_key]
     
     def get_device(self, ip_address: str, port: int = 4370) -> Optional[ZKTecoDevice]:
         """Get or create device connection"""
         device_key = f"{ip_address}:{port}"
+        now = time.monotonic()
         
-        if device_key not in self.devices:
-            device = ZKTecoDevice(ip_address, port)
-            if device.connect():
-                self.devices[device_key] = device
+        with self._devices_lock:
+            self._close_idle_devices(now)
+            if device_key in self.devices:
+                self.devices.move_to_end(device_key)
             else:
-                return None
-        
-        return self.devices[device_key]
+                device = ZKTecoDevice(ip_address, port)
+                if not device.connect():
+                    return None
+                self.devices[device_key] = device
+                if len(self.devices) > MAX_CACHED_DEVICES:
+                    evicted_key, evicted = self.devices.popitem(last=False)
+                    del self.device_last_used[evicted_key]
+                    evicted.disconnect()
+            
+            self.device_last_used[device_key] = now
+            return self.devices[device_key]
     
     def fetch_attendance_from_device(self, device_ip: str, device_port: int = 4370, 
                                    start_date: datetime = None, end_date: datetime = None) -> List[Dict]:
         """Fetch attendance data from a specific device"""
         device = self.get_device(device_ip, device_port)
         if not device:
-            logger.error(f"Failed to connect to device {device_ip}:{device_port}")
+            logger.error("Failed to connect to device %s:%s", device_ip, device_port)
             return []
         
         try:
             # Get device info
             device_info = device.get_device_info()
             if not device_info:
-                logger.error(f"Failed to get device info from {device_ip}")
+                logger.error("Failed to get device info from %s", device_ip)
                 return []
             
             # Get attendance logs
             attendance_logs = device.get_attendance_logs(start_date, end_date)
-            logger.info(f"Fetched {len(attendance_logs)} attendance logs from {device_ip}")
+            logger.info("Fetched %s attendance logs from %s", len(attendance_logs), device_ip)
             
             return attendance_logs
             
         except Exception as e:
-            logger.error(f"Error fetching attendance from device {device_ip}: {str(e)}")
+            logger.error("Error fetching attendance from device %s: %s", device_ip, e)
             return []
         finally:
             # Don't disconnect here - keep connection for reuse
@@ -236,17 +338,28 @@ class ZKTecoService:
                                    start_date: datetime = None, end_date: datetime = None) -> Dict:
         """Fetch attendance from all devices"""
         all_attendance = {}
+        devices = [device_info for device_info in devices if device_info.get('ip_address')]
+        if not devices:
+            return all_attendance
         
-        for device_info in devices:
-            device_ip = device_info.get('ip_address')
-            device_port = device_info.get('port', 4370)
-            device_name = device_info.get('name', f"Device_{device_ip}")
+        # Devices wait on their own UDP round trips, so fetch them concurrently.
+        # One fetch per address: entries sharing it would share a socket.
+        addresses = {(d['ip_address'], d.get('port', 4370)) for d in devices}
+        with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(addresses))) as executor:
+            futures = {}
+            for device_info in devices:
+                address = (device_info['ip_address'], device_info.get('port', 4370))
+                if address not in futures:
+                    device_name = device_info.get('name', f"Device_{address[0]}")
+                    logger.info("Fetching attendance from %s (%s:%s)", device_name, address[0], address[1])
+                    futures[address] = executor.submit(
+                        self.fetch_attendance_from_device, address[0], address[1], start_date, end_date
+                    )
             
-            if device_ip:
-                logger.info(f"Fetching attendance from {device_name} ({device_ip}:{device_port})")
-                attendance_logs = self.fetch_attendance_from_device(
-                    device_ip, device_port, start_date, end_date
-                )
+            for device_info in devices:
+                device_ip = device_info['ip_address']
+                device_name = device_info.get('name', f"Device_{device_ip}")
+                attendance_logs = futures[(device_ip, device_info.get('port', 4370))].result()
                 
                 all_attendance[device_name] = {
                     'device_info': device_info,
@@ -258,24 +371,24 @@ class ZKTecoService:
     
     def process_attendance_for_user(self, user_biometric_id: str, attendance_logs: List[Dict]) -> List[Dict]:
         """Process attendance logs for a specific user"""
-        user_logs = []
-        
-        for log in attendance_logs:
-            if str(log.get('user_id')) == str(user_biometric_id):
-                user_logs.append(log)
+        biometric_id = str(user_biometric_id)
+        user_logs = [log for log in attendance_logs if str(log.get('user_id')) == biometric_id]
         
         # Sort by timestamp
-        user_logs.sort(key=lambda x: x['timestamp'])
+        user_logs.sort(key=log_timestamp)
         
         return user_logs
     
-    def sync_attendance_to_database(self, attendance_logs: List[Dict], device_info: Dict):
-        """Sync attendance logs to database"""
-        from core.attendance_processing import record_raw_punch
+    def sync_attendance_to_database(self, attendance_logs: Iterable[Dict], device_info: Dict):
+        """Sync attendance logs to database; accepts a list or a lazy iterator of logs"""
+        from core.attendance_processing import record_raw_punch, record_raw_punches
         from core.models import Device
         
         synced_count = 0
         error_count = 0
+        processed_count = 0
+        # Reported once per sync rather than once per punch
+        unmatched_ids = set()
         
         try:
             # Close old connections before database operations
@@ -287,59 +400,82 @@ class ZKTecoService:
                     ip_address=device_info['ip_address'],
                     device_type='zkteco'
                 )
-                logger.info(f"Found registered ZKTeco device: {device.name} at {device.ip_address}")
+                logger.info("Found registered ZKTeco device: %s at %s", device.name, device.ip_address)
             except Device.DoesNotExist:
-                logger.warning(f"ZKTeco device at {device_info['ip_address']} not registered in database - skipping")
+                logger.warning("ZKTeco device at %s not registered in database - skipping", device_info['ip_address'])
                 return False
             
-            # Process logs in batches to reduce memory usage
-            batch_size = 50
-            for i in range(0, len(attendance_logs), batch_size):
-                batch = attendance_logs[i:i + batch_size]
+            # Process logs in batches so each transaction and lookup set stays bounded;
+            # islice keeps only one batch of a streamed source in memory
+            logs = iter(attendance_logs)
+            while True:
+                batch = list(islice(logs, SYNC_BATCH_SIZE))
+                if not batch:
+                    break
+                processed_count += len(batch)
                 
+                punches = []
                 for log in batch:
                     try:
-                        raw_log, created, result = record_raw_punch(
-                            device=device,
-                            biometric_id=log['user_id'],
-                            device_user_id=log.get('uid') or log['user_id'],
-                            employee_id=str(log.get('employee_id') or ''),
-                            punch_time=log['punch_time'],
-                            punch_type=log.get('punch_type', 'in'),
-                            source='zkteco_fetch',
-                            raw_payload=log,
-                        )
-                        if created:
-                            synced_count += 1
-                        if result == 'unmatched':
-                            logger.warning(f"Unmatched ZKTeco punch for biometric ID {log['user_id']}")
-                            
-                    except Exception as e:
-                        logger.error(f"Error processing attendance log: {str(e)}")
+                        punches.append({
+                            'biometric_id': log['user_id'],
+                            'device_user_id': log.get('uid') or log['user_id'],
+                            'employee_id': str(log.get('employee_id') or ''),
+                            'punch_time': log['punch_time'],
+                            'punch_type': log.get('punch_type', 'in'),
+                            'raw_payload': log,
+                        })
+                    except KeyError as e:
+                        logger.error("Error processing attendance log: missing %s", e)
                         error_count += 1
                 
-                # Close connections after each batch
-                close_old_connections()
+                try:
+                    # One set of employee lookups and bulk inserts for the whole batch
+                    results = record_raw_punches(device, punches, source='zkteco_fetch')
+                except Exception as e:
+                    # Retry punch by punch so one bad log only loses itself
+                    logger.error("Error processing attendance batch, retrying per log: %s", e)
+                    results = []
+                    for punch in punches:
+                        try:
+                            results.append(record_raw_punch(device=device, source='zkteco_fetch', **punch))
+                        except Exception as e:
+                            logger.error("Error processing attendance log: %s", e)
+                            error_count += 1
+                
+                for raw_log, created, result in results:
+                    if created:
+                        synced_count += 1
+                    if result == 'unmatched':
+                        unmatched_ids.add(raw_log.biometric_id)
+            
+            if unmatched_ids:
+                logger.warning(
+                    "Unmatched ZKTeco punches for %s biometric IDs: %s",
+                    len(unmatched_ids), ', '.join(sorted(map(str, unmatched_ids))[:UNMATCHED_IDS_LOGGED])
+                )
             
-            logger.info(f"Synced {synced_count} attendance logs, {error_count} errors")
+            logger.info("Synced %s attendance logs, %s errors", synced_count, error_count)
             return synced_count, error_count
             
         except Exception as e:
-            logger.error(f"Error syncing attendance to database: {str(e)}")
-            return 0, len(attendance_logs)
+            logger.error("Error syncing attendance to database: %s", e)
+            return 0, len(attendance_logs) if isinstance(attendance_logs, list) else processed_count
         finally:
             # Always close connections
             close_old_connections()
     
     def cleanup_connections(self):
         """Clean up all device connections"""
-        for device_key, device in self.devices.items():
-            try:
-                device.disconnect()
-            except:
-                pass
-        
-        self.devices.clear()
+        with self._devices_lock:
+            for device_key, device in self.devices.items():
+                try:
+                    device.disconnect()
+                except:
+                    pass
+            
+            self.devices.clear()
+            self.device_last_used.clear()
         logger.info("Cleaned up all device connections")
 
 # Global service instance
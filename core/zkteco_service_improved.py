@@ -5,11 +5,15 @@ Handles real-time attendance data fetching from ZKTeco devices
 """
 
 import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 from django.utils import timezone
 from django.conf import settings
+from django.core.cache import cache
 
 try:
     from zk import ZK, const
@@ -20,6 +24,25 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on devices contacted concurrently
+MAX_FETCH_WORKERS = 32
+
+# Connectivity results are reused this long so status polling doesn't reconnect every time
+DEVICE_ONLINE_CACHE_KEY = 'zk:online:{ip_address}:{port}'
+DEVICE_ONLINE_CACHE_TIMEOUT = 30
+
+# Seconds a cached device connection may sit unused before it is closed
+DEVICE_IDLE_TIMEOUT = 300
+
+# Socket timeout for cached connections used for bulk pulls; devices with large
+# logs take longer than the default 10s to prepare the attendance buffer
+ATTENDANCE_FETCH_TIMEOUT = 30
+
+# Unmatched biometric IDs listed in the per-sync warning
+UNMATCHED_IDS_LOGGED = 20
+
+log_timestamp = itemgetter('timestamp')
+
 class ImprovedZKTecoDevice:
     """Improved ZKTeco device communication using pyzk library"""
     
@@ -29,6 +52,8 @@ class ImprovedZKTecoDevice:
         self.timeout = timeout
         self.zk = None
         self.connected = False
+        # (monotonic time, result) of the last is_online check
+        self._online_check = None
         
     def connect(self) -> bool:
         """Connect to ZKTeco device using pyzk"""
@@ -107,6 +132,8 @@ class ImprovedZKTecoDevice:
             logger.info(f"Retrieved {len(users)} users from device {self.ip_address}")
         except Exception as e:
             logger.error(f"Failed to get users from {self.ip_address}:{self.port} - {str(e)}")
+            # Drop the session so the service reconnects on next use
+            self.disconnect()
         
         return users
     
@@ -119,16 +146,11 @@ class ImprovedZKTecoDevice:
             # Get attendance logs from device
             attendance_logs = self.zk.get_attendance()
             
-            # Filter logs within date range
+            # Filter logs within date range. Making a naive time aware keeps its wall
+            # clock, so the device timestamp's own date is the one to compare.
             filtered_logs = []
             for log in attendance_logs:
-                log_time = log.timestamp
-                # Convert naive datetime to timezone-aware for comparison
-                if timezone.is_naive(log_time):
-                    log_time = timezone.make_aware(log_time, timezone.get_current_timezone())
-                
-                log_date = log_time.date()
-                if start_date <= log_date <= end_date:
+                if start_date <= log.timestamp.date() <= end_date:
                     filtered_logs.append({
                         'user_id': log.user_id,
                         'timestamp': log.timestamp,
@@ -154,14 +176,20 @@ class ImprovedZKTecoDevice:
             # Get all attendance logs
             logs = self.zk.get_attendance()
             
-            # Filter by date range if provided
+            # Filter by date range if provided. Device timestamps are naive local
+            # times, so convert the bounds once instead of every log.
             if start_date or end_date:
+                tz = timezone.get_current_timezone()
+                if start_date and timezone.is_aware(start_date):
+                    start_date = timezone.make_naive(start_date, tz)
+                if end_date and timezone.is_aware(end_date):
+                    end_date = timezone.make_naive(end_date, tz)
+                
                 filtered_logs = []
                 for log in logs:
                     log_time = log.timestamp
-                    # Convert naive datetime to timezone-aware for comparison
-                    if timezone.is_naive(log_time):
-                        log_time = timezone.make_aware(log_time, timezone.get_current_timezone())
+                    if timezone.is_aware(log_time):
+                        log_time = timezone.make_naive(log_time, tz)
                     
                     if start_date and log_time < start_date:
                         continue
@@ -186,52 +214,86 @@ class ImprovedZKTecoDevice:
             
         except Exception as e:
             logger.error(f"Failed to get attendance logs from {self.ip_address}:{self.port} - {str(e)}")
+            # Drop the session so the service reconnects on next use
+            self.disconnect()
         
         return attendance_logs
     
     def is_online(self) -> bool:
-        """Check if device is online"""
+        """Check if device is online, reusing a check made in the last DEVICE_ONLINE_CACHE_TIMEOUT seconds"""
         if not self.zk:
             return False
+        
+        now = time.monotonic()
+        if self._online_check and now - self._online_check[0] < DEVICE_ONLINE_CACHE_TIMEOUT:
+            return self._online_check[1]
             
         try:
             # Try to get device info as a connectivity test
             info = self.zk.get_device_info()
-            return info is not None
+            online = info is not None
         except Exception as e:
             logger.debug(f"Device {self.ip_address} connectivity test failed: {str(e)}")
-            return False
+            online = False
+        
+        self._online_check = (now, online)
+        return online
 
 class ImprovedZKTecoService:
     """Improved service class for managing ZKTeco devices and attendance data"""
     
     def __init__(self):
         self.devices = {}
+        # device key -> monotonic time the connection was last handed out
+        self.device_last_used = {}
+        # Devices are contacted from worker threads; guards self.devices and device_last_used
+        self._devices_lock = threading.Lock()
+    
+    def _close_idle_devices(self, now: float):
+        """Close cached connections unused for DEVICE_IDLE_TIMEOUT; caller holds the lock"""
+        for device_key, last_used in list(self.device_last_used.items()):
+            if now - last_used > DEVICE_IDLE_TIMEOUT:
+                self.devices.pop(device_key).disconnect()
+                del self.device_last_used[device_key]
     
     def get_device(self, ip_address: str, port: int = 4370) -> Optional[ImprovedZKTecoDevice]:
-        """Get or create device connection"""
+        """Get or create device connection, reconnecting if the cached session was dropped"""
         device_key = f"{ip_address}:{port}"
+        now = time.monotonic()
         
-        if device_key not in self.devices:
-            device = ImprovedZKTecoDevice(ip_address, port)
-            if device.connect():
+        with self._devices_lock:
+            self._close_idle_devices(now)
+            device = self.devices.get(device_key)
+            if device is None or not device.connected:
+                device = ImprovedZKTecoDevice(ip_address, port, timeout=ATTENDANCE_FETCH_TIMEOUT)
+                if not device.connect():
+                    self.devices.pop(device_key, None)
+                    self.device_last_used.pop(device_key, None)
+                    return None
                 self.devices[device_key] = device
-            else:
-                return None
-        
-        return self.devices[device_key]
+            
+            self.device_last_used[device_key] = now
+            return device
     
-    def test_device_connectivity(self, ip_address: str, port: int = 4370) -> bool:
-        """Test if a device is reachable"""
+    def test_device_connectivity(self, ip_address: str, port: int = 4370, force: bool = False) -> bool:
+        """Test if a device is reachable; force skips the cached result from a recent test"""
+        cache_key = DEVICE_ONLINE_CACHE_KEY.format(ip_address=ip_address, port=port)
+        if not force:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
             device = ImprovedZKTecoDevice(ip_address, port, timeout=5)
-            if device.connect():
+            online = device.connect()
+            if online:
                 device.disconnect()
-                return True
-            return False
         except Exception as e:
             logger.debug(f"Connectivity test failed for {ip_address}:{port} - {str(e)}")
-            return False
+            online = False
+        
+        cache.set(cache_key, online, DEVICE_ONLINE_CACHE_TIMEOUT)
+        return online
     
     def fetch_attendance_from_device(self, device_ip: str, device_port: int = 4370, 
                                    start_date: datetime = None, end_date: datetime = None) -> List[Dict]:
@@ -256,17 +318,28 @@ class ImprovedZKTecoService:
                                    start_date: datetime = None, end_date: datetime = None) -> Dict:
         """Fetch attendance from all devices"""
         all_attendance = {}
+        devices = [device_info for device_info in devices if device_info.get('ip_address')]
+        if not devices:
+            return all_attendance
         
-        for device_info in devices:
-            device_ip = device_info.get('ip_address')
-            device_port = device_info.get('port', 4370)
-            device_name = device_info.get('name', f"Device_{device_ip}")
+        # Devices wait on their own network round trips, so fetch them concurrently.
+        # One fetch per address: entries sharing it would share a connection.
+        addresses = {(d['ip_address'], d.get('port', 4370)) for d in devices}
+        with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(addresses))) as executor:
+            futures = {}
+            for device_info in devices:
+                address = (device_info['ip_address'], device_info.get('port', 4370))
+                if address not in futures:
+                    device_name = device_info.get('name', f"Device_{address[0]}")
+                    logger.info(f"Fetching attendance from {device_name} ({address[0]}:{address[1]})")
+                    futures[address] = executor.submit(
+                        self.fetch_attendance_from_device, address[0], address[1], start_date, end_date
+                    )
             
-            if device_ip:
-                logger.info(f"Fetching attendance from {device_name} ({device_ip}:{device_port})")
-                attendance_logs = self.fetch_attendance_from_device(
-                    device_ip, device_port, start_date, end_date
-                )
+            for device_info in devices:
+                device_ip = device_info['ip_address']
+                device_name = device_info.get('name', f"Device_{device_ip}")
+                attendance_logs = futures[(device_ip, device_info.get('port', 4370))].result()
                 
                 all_attendance[device_name] = {
                     'device_info': device_info,
@@ -279,25 +352,27 @@ class ImprovedZKTecoService:
     def get_device_status(self, devices: List[Dict]) -> Dict:
         """Get status of all devices"""
         device_status = []
+        devices = [device_info for device_info in devices if device_info.get('ip_address')]
         
-        for device_info in devices:
-            device_ip = device_info.get('ip_address')
-            device_port = device_info.get('port', 4370)
-            device_name = device_info.get('name', f"Device_{device_ip}")
-            
-            if device_ip:
-                # Test connectivity
-                is_online = self.test_device_connectivity(device_ip, device_port)
+        if devices:
+            # Each connectivity test opens its own connection, so run them concurrently
+            with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(devices))) as executor:
+                checks = [
+                    (device_info, executor.submit(
+                        self.test_device_connectivity, device_info['ip_address'], device_info.get('port', 4370)
+                    ))
+                    for device_info in devices
+                ]
                 
-                status_info = {
-                    'name': device_name,
-                    'ip_address': device_ip,
-                    'port': device_port,
-                    'is_online': is_online,
-                    'last_sync': None  # Will be updated from database
-                }
-                
-                device_status.append(status_info)
+                for device_info, check in checks:
+                    device_ip = device_info['ip_address']
+                    device_status.append({
+                        'name': device_info.get('name', f"Device_{device_ip}"),
+                        'ip_address': device_ip,
+                        'port': device_info.get('port', 4370),
+                        'is_online': check.result(),
+                        'last_sync': None  # Will be updated from database
+                    })
         
         return {
             'devices': device_status,
@@ -308,24 +383,23 @@ class ImprovedZKTecoService:
     
     def process_attendance_for_user(self, user_biometric_id: str, attendance_logs: List[Dict]) -> List[Dict]:
         """Process attendance logs for a specific user"""
-        user_logs = []
-        
-        for log in attendance_logs:
-            if str(log.get('user_id')) == str(user_biometric_id):
-                user_logs.append(log)
+        biometric_id = str(user_biometric_id)
+        user_logs = [log for log in attendance_logs if str(log.get('user_id')) == biometric_id]
         
         # Sort by timestamp
-        user_logs.sort(key=lambda x: x['timestamp'])
+        user_logs.sort(key=log_timestamp)
         
         return user_logs
     
     def sync_attendance_to_database(self, attendance_logs: List[Dict], device_info: Dict):
         """Sync attendance logs to database"""
-        from core.attendance_processing import record_raw_punch
+        from core.attendance_processing import record_raw_punch, record_raw_punches
         from core.models import Device
         
         synced_count = 0
         error_count = 0
+        # Reported once per sync rather than once per punch
+        unmatched_ids = set()
         
         try:
             # Get device - only process if already registered in database
@@ -339,31 +413,54 @@ class ImprovedZKTecoService:
                 logger.warning(f"ZKTeco device at {device_info['ip_address']} not registered in database - skipping")
                 return False
             
-            # Process each attendance log
-            for log in attendance_logs:
+            # Process logs in batches: one set of employee lookups and bulk inserts per batch
+            batch_size = 500
+            for i in range(0, len(attendance_logs), batch_size):
+                batch = attendance_logs[i:i + batch_size]
+                
+                punches = []
+                for log in batch:
+                    try:
+                        punches.append({
+                            'biometric_id': log['user_id'],
+                            'device_user_id': log.get('uid') or log['user_id'],
+                            'employee_id': str(log.get('employee_id') or ''),
+                            'punch_time': log['punch_time'],
+                            'punch_type': log.get('punch_type', 'in'),
+                            'raw_payload': log,
+                        })
+                    except KeyError as e:
+                        logger.error(f"Error processing attendance log: missing {str(e)}")
+                        error_count += 1
+                
                 try:
-                    raw_log, created, result = record_raw_punch(
-                        device=device,
-                        biometric_id=log['user_id'],
-                        device_user_id=log.get('uid') or log['user_id'],
-                        employee_id=str(log.get('employee_id') or ''),
-                        punch_time=log['punch_time'],
-                        punch_type=log.get('punch_type', 'in'),
-                        source='zkteco_fetch',
-                        raw_payload=log,
-                    )
+                    results = record_raw_punches(device, punches, source='zkteco_fetch')
+                except Exception as e:
+                    # Retry punch by punch so one bad log only loses itself
+                    logger.error(f"Error processing attendance batch, retrying per log: {str(e)}")
+                    results = []
+                    for punch in punches:
+                        try:
+                            results.append(record_raw_punch(device=device, source='zkteco_fetch', **punch))
+                        except Exception as e:
+                            logger.error(f"Error processing attendance log: {str(e)}")
+                            error_count += 1
+                
+                for raw_log, created, result in results:
                     if created:
                         synced_count += 1
                     if result == 'unmatched':
-                        logger.warning(f"Unmatched ZKTeco punch for biometric_id: {log['user_id']}")
-                        
-                except Exception as e:
-                    logger.error(f"Error processing attendance log: {str(e)}")
-                    error_count += 1
+                        unmatched_ids.add(raw_log.biometric_id)
+            
+            if unmatched_ids:
+                logger.warning(
+                    f"Unmatched ZKTeco punches for {len(unmatched_ids)} biometric IDs: "
+                    f"{', '.join(sorted(map(str, unmatched_ids))[:UNMATCHED_IDS_LOGGED])}"
+                )
             
             # Update device last sync time
             device.last_sync = timezone.now()
-            device.save()
+            device.save(update_fields=['last_sync'])
             
             logger.info(f"Synced {synced_count} attendance logs, {error_count} errors")
             
@@ -375,13 +472,15 @@ class ImprovedZKTecoService:
     
     def cleanup_connections(self):
         """Clean up all device connections"""
-        for device_key, device in self.devices.items():
-            try:
-                device.disconnect()
-            except Exception as e:
-                logger.warning(f"Error disconnecting device {device_key}: {str(e)}")
-        
-        self.devices.clear()
+        with self._devices_lock:
+            for device_key, device in self.devices.items():
+                try:
+                    device.disconnect()
+                except Exception as e:
+                    logger.warning(f"Error disconnecting device {device_key}: {str(e)}")
+            
+            self.devices.clear()
+            self.device_last_used.clear()
 
 # Create global service instance
 improved_zkteco_service = ImprovedZKTecoService()
@@ -70,6 +70,11 @@ class SalaryIncrementAdmin(UnfoldModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        """Optimize queryset with select_related"""
+        qs = super().get_queryset(request)
+        return qs.select_related('employee', 'approved_by')
+
     def save_model(self, request, obj, form, change):
         """
         Auto-assign approver when approving from admin
@@ -114,6 +119,11 @@ class SalaryIncrementHistoryAdmin(UnfoldModelAdmin):
         'remarks',
     )
 
+    def get_queryset(self, request):
+        """Optimize queryset with select_related"""
+        qs = super().get_queryset(request)
+        return qs.select_related('employee', 'changed_by')
+
     def has_add_permission(self, request):
         return request.user.is_superuser or request.user.role in ['admin', 'manager']
 
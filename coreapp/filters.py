@@ -1,3 +1,6 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
 from django_filters import rest_framework as django_filters
 from .models import SalaryIncrement, SalaryIncrementHistory, Holiday
 
@@ -19,13 +22,26 @@ class SalaryIncrementHistoryFilter(django_filters.FilterSet):
     office_id = django_filters.CharFilter(field_name='employee__office__id')
     department_id = django_filters.CharFilter(field_name='employee__department__id')
     employee_id = django_filters.CharFilter(field_name='employee__id')
-    from_date = django_filters.DateFilter(field_name='changed_at', lookup_expr='date__gte')
-    to_date = django_filters.DateFilter(field_name='changed_at', lookup_expr='date__lte')
+    from_date = django_filters.DateFilter(method='filter_from_date')
+    to_date = django_filters.DateFilter(method='filter_to_date')
 
     class Meta:
         model = SalaryIncrementHistory
         fields = []
 
+    # changed_at__date would wrap the column in a cast the changed_at index can't
+    # serve, so compare against the local-day boundaries instead
+
+    def filter_from_date(self, queryset, name, value):
+        """Changes on or after the start of the given local day"""
+        start = timezone.make_aware(datetime.combine(value, time.min))
+        return queryset.filter(changed_at__gte=start)
+
+    def filter_to_date(self, queryset, name, value):
+        """Changes before the start of the day after the given local day"""
+        end = timezone.make_aware(datetime.combine(value + timedelta(days=1), time.min))
+        return queryset.filter(changed_at__lt=end)
+
 class HolidayFilter(django_filters.FilterSet):
     type = django_filters.CharFilter(field_name='type')
     from_date = django_filters.DateFilter(field_name='date', lookup_expr='gte')
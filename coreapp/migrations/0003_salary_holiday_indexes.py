@@ -0,0 +1,34 @@
+# Generated by Django 4.2.28 on 2026-10-17 04:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coreapp', '0002_alter_holiday_options'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='salaryincrementhistory',
+            name='changed_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='holiday',
+            index=models.Index(fields=['type', 'date'], name='coreapp_hol_type_995111_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salaryincrement',
+            index=models.Index(fields=['-effective_from'], name='coreapp_sal_effecti_285a19_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salaryincrement',
+            index=models.Index(fields=['status', '-effective_from'], name='coreapp_sal_status_41945a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salaryincrement',
+            index=models.Index(fields=['employee', '-effective_from'], name='coreapp_sal_employe_306c40_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.28 on 2026-10-17 04:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coreapp', '0003_salary_holiday_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='salaryincrementhistory',
+            index=models.Index(fields=['employee', '-changed_at'], name='coreapp_sal_employe_40650e_idx'),
+        ),
+    ]
@@ -3,6 +3,10 @@ from django.conf import settings
 import uuid
 from decimal import Decimal
 
+HUNDRED = Decimal('100')
+CENT = Decimal('0.01')
+ZERO_SALARY = Decimal('0.00')
+
 
 class SalaryIncrement(models.Model):
     INCREMENT_TYPE_CHOICES = [
@@ -55,19 +59,24 @@ class SalaryIncrement(models.Model):
         ordering = ['-effective_from']
         verbose_name = "Salary Increment"
         verbose_name_plural = "Salary Increments"
+        indexes = [
+            models.Index(fields=['-effective_from']),
+            models.Index(fields=['status', '-effective_from']),
+            models.Index(fields=['employee', '-effective_from']),
+        ]
 
     def __str__(self):
         return f"{self.employee.get_full_name()} | +{self.increment_amount or 0}"
 
     def clean(self):
         if not self.old_salary:
-            self.old_salary = getattr(self.employee, 'salary', Decimal('0.00'))
+            self.old_salary = getattr(self.employee, 'salary', ZERO_SALARY)
 
         if self.increment_percentage and not self.increment_amount:
-            self.increment_amount = (self.old_salary * self.increment_percentage / Decimal('100')).quantize(Decimal('0.01'))
+            self.increment_amount = (self.old_salary * self.increment_percentage / HUNDRED).quantize(CENT)
 
         if self.increment_amount and not self.increment_percentage and self.old_salary:
-            self.increment_percentage = (self.increment_amount * Decimal('100') / self.old_salary).quantize(Decimal('0.01'))
+            self.increment_percentage = (self.increment_amount * HUNDRED / self.old_salary).quantize(CENT)
 
         if self.old_salary is not None and self.increment_amount is not None:
             self.new_salary = self.old_salary + self.increment_amount
@@ -108,13 +117,16 @@ class SalaryIncrementHistory(models.Model):
         db_column='changed_by_id'
     )
 
-    changed_at = models.DateTimeField(auto_now_add=True)
+    changed_at = models.DateTimeField(auto_now_add=True, db_index=True)
     remarks = models.TextField(blank=True)
 
     class Meta:
         verbose_name = "Salary Increment History"
         verbose_name_plural = "Salary Increment Histories"
         ordering = ['-changed_at']
+        indexes = [
+            models.Index(fields=['employee', '-changed_at']),
+        ]
 
     def __str__(self):
         return f"{self.employee.get_full_name()} | {self.old_salary} → {self.new_salary}"
@@ -139,6 +151,9 @@ class Holiday(models.Model):
 
     class Meta:
         ordering = ['date']
+        indexes = [
+            models.Index(fields=['type', 'date']),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.date}"
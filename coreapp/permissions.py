@@ -1,5 +1,8 @@
 from rest_framework.permissions import BasePermission
 
+INCREMENT_ADMIN_ROLES = {'admin', 'manager'}
+INCREMENT_EDITOR_ROLES = {'admin', 'manager', 'hr'}
+
 
 class IsAdminManagerOrSuperuser(BasePermission):
     """
@@ -15,7 +18,7 @@ class IsAdminManagerOrSuperuser(BasePermission):
         if user.is_superuser:
             return True
 
-        return user.role in ['admin', 'manager']
+        return user.role in INCREMENT_ADMIN_ROLES
 
 
 class IsAdminManagerHRNoDeleteOrSuperuser(BasePermission):
@@ -35,4 +38,4 @@ class IsAdminManagerHRNoDeleteOrSuperuser(BasePermission):
         if request.method == 'DELETE' and user.role == 'hr':
             return False
 
-        return user.role in ['admin', 'manager', 'hr']
+        return user.role in INCREMENT_EDITOR_ROLES
@@ -22,11 +22,27 @@ class SalaryIncrementSerializer(serializers.ModelSerializer):
         source='employee.employee_id',
         read_only=True,
     )
-    # Using SerializerMethodField for safe traversal of optional relationships
-    employee_office_name = serializers.SerializerMethodField()
-    employee_department_name = serializers.SerializerMethodField()
-    employee_designation_name = serializers.SerializerMethodField()
-    approved_by_name = serializers.SerializerMethodField()
+    # default=None renders null when an optional relationship is unset
+    employee_office_name = serializers.CharField(
+        source='employee.office.name',
+        read_only=True,
+        default=None,
+    )
+    employee_department_name = serializers.CharField(
+        source='employee.department.name',
+        read_only=True,
+        default=None,
+    )
+    employee_designation_name = serializers.CharField(
+        source='employee.designation.name',
+        read_only=True,
+        default=None,
+    )
+    approved_by_name = serializers.CharField(
+        source='approved_by.get_full_name',
+        read_only=True,
+        default=None,
+    )
 
     class Meta:
         model = SalaryIncrement
@@ -61,30 +77,6 @@ class SalaryIncrementSerializer(serializers.ModelSerializer):
             'updated_at',
         )
 
-    def get_employee_office_name(self, obj):
-        try:
-            return obj.employee.office.name if obj.employee.office else None
-        except AttributeError:
-            return None
-
-    def get_employee_department_name(self, obj):
-        try:
-            return obj.employee.department.name if obj.employee.department else None
-        except AttributeError:
-            return None
-
-    def get_employee_designation_name(self, obj):
-        try:
-            return obj.employee.designation.name if obj.employee.designation else None
-        except AttributeError:
-            return None
-
-    def get_approved_by_name(self, obj):
-        try:
-            return obj.approved_by.get_full_name() if obj.approved_by else None
-        except AttributeError:
-            return None
-
     def create(self, validated_data):
         """
         Auto set old_salary from employee at creation time.
@@ -114,8 +106,16 @@ class SalaryIncrementHistorySerializer(serializers.ModelSerializer):
         source='employee.get_full_name',
         read_only=True,
     )
-    employee_office_name = serializers.SerializerMethodField()
-    employee_department_name = serializers.SerializerMethodField()
+    employee_office_name = serializers.CharField(
+        source='employee.office.name',
+        read_only=True,
+        default=None,
+    )
+    employee_department_name = serializers.CharField(
+        source='employee.department.name',
+        read_only=True,
+        default=None,
+    )
 
     class Meta:
         model = SalaryIncrementHistory
@@ -134,18 +134,6 @@ class SalaryIncrementHistorySerializer(serializers.ModelSerializer):
         ]
         read_only_fields = fields
 
-    def get_employee_office_name(self, obj):
-        try:
-            return obj.employee.office.name if obj.employee.office else None
-        except AttributeError:
-            return None
-
-    def get_employee_department_name(self, obj):
-        try:
-            return obj.employee.department.name if obj.employee.department else None
-        except AttributeError:
-            return None
-
 
 class HolidaySerializer(serializers.ModelSerializer):
     """
@@ -1,9 +1,10 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save
+from django.db import transaction
 from django.dispatch import receiver
 from django.utils import timezone
 from decimal import Decimal
 
-from .models import SalaryIncrement, SalaryIncrementHistory, Holiday
+from .models import SalaryIncrement, SalaryIncrementHistory
 
 
 @receiver(post_save, sender=SalaryIncrement)
@@ -22,33 +23,33 @@ def apply_salary_increment(sender, instance, created, **kwargs):
         return
 
     employee = instance.employee
-
-    old_salary = employee.salary or Decimal('0.00')
-    new_salary = instance.new_salary
-
-    # Update base salary
+    applied_at = timezone.now()
+
+    with transaction.atomic():
+        # Claim the increment first so a concurrent approval of the same row
+        # cannot apply it twice; a queryset update also skips re-entering this signal
+        claimed = SalaryIncrement.objects.filter(
+            pk=instance.pk, applied_at__isnull=True
+        ).update(applied_at=applied_at)
+        if not claimed:
+            return
+
+        old_salary = employee.salary or Decimal('0.00')
+        new_salary = instance.new_salary
+
+        # Update base salary
+        type(employee).objects.filter(pk=employee.pk).update(salary=new_salary)
+
+        # Create history
+        SalaryIncrementHistory.objects.create(
+            employee=employee,
+            increment=instance,
+            old_salary=old_salary,
+            new_salary=new_salary,
+            changed_by=instance.approved_by,
+            remarks=f"{instance.increment_type} increment approved"
+        )
+
+    # Mirror the writes on the in-memory instances the caller holds
     employee.salary = new_salary
-    employee.save(update_fields=['salary'])
-
-    # Create history
-    SalaryIncrementHistory.objects.create(
-        employee=employee,
-        increment=instance,
-        old_salary=old_salary,
-        new_salary=new_salary,
-        changed_by=instance.approved_by,
-        remarks=f"{instance.increment_type} increment approved"
-    )
-
-    # Mark as applied
-    instance.applied_at = timezone.now()
-    instance.save(update_fields=['applied_at'])
-
-@receiver(pre_save, sender=Holiday)
-def update_holiday(sender, instance, **kwargs):
-    """
-    Placeholder for holiday-related pre-save logic.
-    """
-    if instance.is_paid and instance.double_pay_if_worked:
-        # Potential future logic
-        pass
\ No newline at end of file
+    instance.applied_at = applied_at
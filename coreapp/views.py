@@ -13,9 +13,18 @@ from .permissions import IsAdminManagerHRNoDeleteOrSuperuser, IsAdminManagerOrSu
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 from .filters import SalaryIncrementFilter, SalaryIncrementHistoryFilter, HolidayFilter
+from core.filters import SkipUnusedFilterSetMixin
 
+# Columns an approval writes: the status change plus the amounts clean() derives
+# on save, which the approval signal applies to the employee's salary
+APPROVE_UPDATE_FIELDS = [
+    'status', 'approved_by', 'old_salary', 'increment_percentage',
+    'increment_amount', 'new_salary', 'updated_at',
+]
+REJECT_UPDATE_FIELDS = ['status', 'updated_at']
 
-class SalaryIncrementViewSet(viewsets.ModelViewSet):
+
+class SalaryIncrementViewSet(SkipUnusedFilterSetMixin, viewsets.ModelViewSet):
     """
     Create / Update / Approve Salary Increments.
 
@@ -46,6 +55,22 @@ class SalaryIncrementViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = super().get_queryset()
         user = self.request.user
+        if self.action == 'list':
+            # Skip the wide user rows beyond what the list renders; writes and the
+            # approval signal keep full rows since they read and save employee.salary
+            queryset = queryset.only(
+                'id', 'employee', 'increment_type', 'old_salary', 'increment_percentage',
+                'increment_amount', 'new_salary', 'effective_from', 'reason', 'status',
+                'approved_by', 'applied_at', 'created_at', 'updated_at',
+                'employee__first_name', 'employee__last_name', 'employee__email',
+                'employee__employee_id', 'employee__office__name',
+                'employee__department__name', 'employee__designation__name',
+                'approved_by__first_name', 'approved_by__last_name', 'approved_by__email',
+            )
+        elif self.action in ('approve', 'reject'):
+            # Status changes render nothing; only the employee row is read, by clean()
+            # and the approval signal
+            queryset = SalaryIncrement.objects.select_related('employee')
 
         # Superuser and Admin can see all
         if user.is_superuser or getattr(user, 'role', None) == 'admin':
@@ -66,19 +91,18 @@ class SalaryIncrementViewSet(viewsets.ModelViewSet):
         immediately so the base salary is updated right away
         via the salary increment signal.
         """
-        increment = serializer.save()
-
         user = self.request.user
 
         # Auto-approve only for admin/manager/superuser
         if user.is_superuser or getattr(user, 'role', None) in ['admin', 'manager']:
-            if increment.status != 'approved':
-                increment.status = 'approved'
-                increment.approved_by = user
-                # Saving with status=approved will trigger the post_save
+            if serializer.validated_data.get('status') != 'approved':
+                # Inserting with status=approved triggers the post_save
                 # signal in coreapp.signals to update the base salary
                 # and create history, and mark applied_at.
-                increment.save()
+                serializer.save(status='approved', approved_by=user)
+                return
+
+        serializer.save()
 
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
@@ -96,7 +120,8 @@ class SalaryIncrementViewSet(viewsets.ModelViewSet):
 
         increment.status = 'approved'
         increment.approved_by = request.user
-        increment.save()
+        # The post_save signal still runs and applies the increment
+        increment.save(update_fields=APPROVE_UPDATE_FIELDS)
 
         return Response(
             {"detail": "Increment approved successfully."},
@@ -117,7 +142,7 @@ class SalaryIncrementViewSet(viewsets.ModelViewSet):
             )
 
         increment.status = 'rejected'
-        increment.save()
+        increment.save(update_fields=REJECT_UPDATE_FIELDS)
 
         return Response(
             {"detail": "Increment rejected."},
@@ -125,7 +150,7 @@ class SalaryIncrementViewSet(viewsets.ModelViewSet):
         )
 
 
-class SalaryIncrementHistoryViewSet(viewsets.ReadOnlyModelViewSet):
+class SalaryIncrementHistoryViewSet(SkipUnusedFilterSetMixin, viewsets.ReadOnlyModelViewSet):
     """
     Read-only salary increment history.
 
@@ -151,7 +176,13 @@ class SalaryIncrementHistoryViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ['changed_at']
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        # History is read-only, so every action can skip the wide user rows
+        queryset = super().get_queryset().only(
+            'id', 'employee', 'increment', 'old_salary', 'new_salary', 'changed_by',
+            'changed_at', 'remarks',
+            'employee__first_name', 'employee__last_name', 'employee__email',
+            'employee__office__name', 'employee__department__name', 'increment__id',
+        )
         user = self.request.user
 
         # Superuser and Admin can see all
@@ -168,7 +199,7 @@ class SalaryIncrementHistoryViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset.filter(employee=user)
 
 
-class HolidayViewSet(viewsets.ModelViewSet):
+class HolidayViewSet(SkipUnusedFilterSetMixin, viewsets.ModelViewSet):
     """
     Create / Update / Delete holidays.
     """
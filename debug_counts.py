@@ -5,6 +5,8 @@ import uuid
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attendance_system.settings')
 django.setup()
 
+from django.db.models import Prefetch
+
 from core.models import CustomUser, EmployeeShiftAssignment
 
 def test():
@@ -13,25 +15,30 @@ def test():
     
     print(f"Debug Counts for Office ID: {disha_id}")
     
-    total_emps = CustomUser.objects.filter(office__id=disha_id, role='employee', is_active=True).count()
+    # One read of the office's employees with their active assignments, shifts and
+    # offices; the total, the unassigned list and the deep dive all come from it
+    all_emps = list(
+        CustomUser.objects.filter(office__id=disha_id, role='employee', is_active=True).prefetch_related(
+            Prefetch(
+                'shift_assignments',
+                queryset=EmployeeShiftAssignment.objects.filter(is_active=True).select_related('shift__office'),
+                to_attr='active_assignments'
+            )
+        )
+    )
+    
+    total_emps = len(all_emps)
     print(f"Total Active Employees in Office: {total_emps}")
 
     assigned_count = EmployeeShiftAssignment.objects.filter(shift__office__id=disha_id, is_active=True).count()
     print(f"Total Active Assignments in Office: {assigned_count}")
     
-    unassigned_users = CustomUser.objects.filter(
-        office__id=disha_id, 
-        role='employee', 
-        is_active=True
-    ).exclude(
-        shift_assignments__is_active=True
-    )
-    
-    print(f"Unassigned Employees Query Count: {unassigned_users.count()}")
+    unassigned_list = [emp for emp in all_emps if not emp.active_assignments]
+    print(f"Unassigned Employees Query Count: {len(unassigned_list)}")
     
-    if unassigned_users.count() > 0:
+    if unassigned_list:
         print("Unassigned Employee Names:")
-        for u in unassigned_users:
+        for u in unassigned_list:
             print(f"- {u.get_full_name()} ({u.id})")
     else:
         print("No unassigned employees found.")
@@ -39,13 +46,9 @@ def test():
     # Check if any employees are assigned to MULTIPLE active shifts (which shouldn't happen but...)
     # or if employees are assigned to shifts in OTHER offices
     print("\nDeep Dive on 'Missing' Employees:")
-    # Get all employees
-    all_emps = CustomUser.objects.filter(office__id=disha_id, role='employee', is_active=True)
     for emp in all_emps:
-        assignments = EmployeeShiftAssignment.objects.filter(employee=emp, is_active=True)
-        if assignments.exists():
-            for a in assignments:
-                print(f"Emp {emp.get_full_name()} is assigned to {a.shift.name} (Office: {a.shift.office.name})")
+        for a in emp.active_assignments:
+            print(f"Emp {emp.get_full_name()} is assigned to {a.shift.name} (Office: {a.shift.office.name})")
 
 if __name__ == "__main__":
     test()
@@ -7,6 +7,8 @@ import os
 import sys
 import django
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from datetime import datetime, timedelta
 
 # Setup Django
@@ -14,6 +16,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attendance_system.settings')
 django.setup()
 
 from core.models import Device, CustomUser, Attendance
+from django.db import connection
 from django.utils import timezone
 
 # Configure logging without emojis to avoid encoding issues
@@ -27,6 +30,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Upper bound on devices polled concurrently
+MAX_FETCH_WORKERS = 16
+
+# Columns a punch can change on an existing record: the punch times and device,
+# plus what Attendance.save() recomputes from them
+ATTENDANCE_PUNCH_FIELDS = [
+    'check_in_time', 'check_out_time', 'device', 'total_hours',
+    'status', 'day_status', 'is_late', 'late_minutes', 'updated_at',
+]
+
+# Punches folded and written per pass, bounding the per-day and existing-record maps
+ATTENDANCE_CHUNK_SIZE = 1000
+
 try:
     from zk import ZK
     ZK_AVAILABLE = True
@@ -34,6 +50,86 @@ except ImportError:
     ZK_AVAILABLE = False
     logger.warning("pyzk library not available. Install with: pip install pyzk")
 
+def save_daily_attendance(device, punches, label=''):
+    """
+    Fold (user, timestamp) punches into one attendance record per user and day.
+
+    Punches are handled ATTENDANCE_CHUNK_SIZE at a time. Within a chunk, existing
+    records for the touched days are read in one query and each record is saved
+    once through Attendance.save(), so hours, status and the attendance signals
+    still run. Returns (new/updated records, errors).
+    """
+    new_records = 0
+    errors = 0
+    punches = iter(punches)
+    while True:
+        chunk = list(islice(punches, ATTENDANCE_CHUNK_SIZE))
+        if not chunk:
+            break
+        chunk_records, chunk_errors = _save_attendance_chunk(device, chunk, label)
+        new_records += chunk_records
+        errors += chunk_errors
+    return new_records, errors
+
+def _save_attendance_chunk(device, punches, label):
+    """Fold and save one chunk of punches for save_daily_attendance"""
+    days = {}
+    for user, timestamp in punches:
+        days.setdefault((user.pk, timestamp.date()), []).append((user, timestamp))
+    if not days:
+        return 0, 0
+    
+    existing = {
+        (attendance.user_id, attendance.date): attendance
+        for attendance in Attendance.objects.filter(
+            user_id__in={user_id for user_id, _ in days},
+            date__in={date for _, date in days},
+        )
+    }
+    
+    new_records = 0
+    errors = 0
+    for (user_id, date), day_punches in days.items():
+        try:
+            attendance = existing.get((user_id, date))
+            created = attendance is None
+            updated = False
+            for user, timestamp in day_punches:
+                if attendance is None:
+                    attendance = Attendance(
+                        user=user,
+                        date=date,
+                        check_in_time=timestamp,
+                        status='present',
+                        device=device
+                    )
+                    continue
+                # Update existing record if needed
+                if not attendance.check_in_time or timestamp < attendance.check_in_time:
+                    attendance.check_in_time = timestamp
+                    updated = True
+                if not attendance.check_out_time or timestamp > attendance.check_out_time:
+                    attendance.check_out_time = timestamp
+                    updated = True
+            
+            if not (created or updated):
+                continue
+            if created:
+                attendance.save()
+            else:
+                attendance.device = device
+                attendance.save(update_fields=ATTENDANCE_PUNCH_FIELDS)
+            new_records += 1
+            logger.info(
+                f"{'New' if created else 'Updated'} {label}attendance: {attendance.user.get_full_name()} on {date} "
+                f"({len(day_punches)} punches)"
+            )
+        except Exception as e:
+            logger.error(f"Error saving {label}attendance for user {user_id} on {date}: {str(e)}")
+            errors += 1
+    
+    return new_records, errors
+
 def fetch_zkteco_device(device):
     """Fetch attendance from ZKTeco device"""
     if not ZK_AVAILABLE:
@@ -62,14 +158,21 @@ def fetch_zkteco_device(device):
         
         logger.info(f"Found {len(attendance_logs)} attendance records on {device.name}")
         
+        # Resolve every user in one query instead of one per log
+        users = CustomUser.objects.in_bulk(
+            {str(log.user_id) for log in attendance_logs},
+            field_name='biometric_id'
+        )
+        tz = timezone.get_current_timezone()
+        
         # Process attendance records
-        new_records = 0
+        punches = []
         errors = 0
         
         for log in attendance_logs:
             try:
                 # Find user by biometric ID
-                user = CustomUser.objects.filter(biometric_id=str(log.user_id)).first()
+                user = users.get(str(log.user_id))
                 if not user:
                     logger.warning(f"User with biometric ID {log.user_id} not found")
                     errors += 1
@@ -78,42 +181,16 @@ def fetch_zkteco_device(device):
                 # Make timestamp timezone-aware
                 timestamp = log.timestamp
                 if timezone.is_naive(timestamp):
-                    timestamp = timezone.make_aware(timestamp, timezone.get_current_timezone())
-                
-                # Get or create attendance record
-                attendance, created = Attendance.objects.get_or_create(
-                    user=user,
-                    date=timestamp.date(),
-                    defaults={
-                        'check_in_time': timestamp,
-                        'status': 'present',
-                        'device': device
-                    }
-                )
-                
-                if created:
-                    logger.info(f"New attendance record: {user.get_full_name()} at {timestamp.strftime('%H:%M:%S')}")
-                    new_records += 1
-                else:
-                    # Update existing record if needed
-                    updated = False
-                    if not attendance.check_in_time or timestamp < attendance.check_in_time:
-                        attendance.check_in_time = timestamp
-                        updated = True
-                    if not attendance.check_out_time or timestamp > attendance.check_out_time:
-                        attendance.check_out_time = timestamp
-                        updated = True
-                    
-                    if updated:
-                        attendance.device = device
-                        attendance.save()
-                        logger.info(f"Updated attendance: {user.get_full_name()} at {timestamp.strftime('%H:%M:%S')}")
-                        new_records += 1
+                    timestamp = timezone.make_aware(timestamp, tz)
+                punches.append((user, timestamp))
                         
             except Exception as e:
                 logger.error(f"Error processing attendance record: {str(e)}")
                 errors += 1
         
+        new_records, save_errors = save_daily_attendance(device, punches)
+        errors += save_errors
+        
         logger.info(f"Device {device.name}: {new_records} new/updated records, {errors} errors")
         return new_records, errors
         
@@ -145,15 +222,20 @@ def fetch_essl_device(device):
         
         logger.info(f"Found {len(attendance_data)} ESSL attendance records on {device.name}")
         
-        new_records = 0
+        # Resolve every user in one query instead of one per record
+        users = CustomUser.objects.in_bulk(
+            {record.get('employee_id') for record in attendance_data if record.get('employee_id')},
+            field_name='employee_id'
+        )
+        tz = timezone.get_current_timezone()
+        
+        punches = []
         errors = 0
         
         for record in attendance_data:
             try:
                 # Find user by employee ID
-                user = CustomUser.objects.filter(
-                    employee_id=record.get('employee_id')
-                ).first()
+                user = users.get(record.get('employee_id'))
                 
                 if not user:
                     logger.warning(f"User with employee ID {record.get('employee_id')} not found")
@@ -168,46 +250,20 @@ def fetch_essl_device(device):
                 try:
                     timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
                     if timezone.is_naive(timestamp):
-                        timestamp = timezone.make_aware(timestamp, timezone.get_current_timezone())
+                        timestamp = timezone.make_aware(timestamp, tz)
                 except:
                     logger.error(f"Invalid timestamp format: {timestamp_str}")
                     errors += 1
                     continue
-                
-                # Get or create attendance record
-                attendance, created = Attendance.objects.get_or_create(
-                    user=user,
-                    date=timestamp.date(),
-                    defaults={
-                        'check_in_time': timestamp,
-                        'status': 'present',
-                        'device': device
-                    }
-                )
-                
-                if created:
-                    logger.info(f"New ESSL attendance: {user.get_full_name()} at {timestamp.strftime('%H:%M:%S')}")
-                    new_records += 1
-                else:
-                    # Update existing record if needed
-                    updated = False
-                    if not attendance.check_in_time or timestamp < attendance.check_in_time:
-                        attendance.check_in_time = timestamp
-                        updated = True
-                    if not attendance.check_out_time or timestamp > attendance.check_out_time:
-                        attendance.check_out_time = timestamp
-                        updated = True
-                    
-                    if updated:
-                        attendance.device = device
-                        attendance.save()
-                        logger.info(f"Updated ESSL attendance: {user.get_full_name()} at {timestamp.strftime('%H:%M:%S')}")
-                        new_records += 1
+                punches.append((user, timestamp))
                         
             except Exception as e:
                 logger.error(f"Error processing ESSL attendance record: {str(e)}")
                 errors += 1
         
+        new_records, save_errors = save_daily_attendance(device, punches, label='ESSL ')
+        errors += save_errors
+        
         logger.info(f"ESSL Device {device.name}: {new_records} new/updated records, {errors} errors")
         return new_records, errors
         
@@ -215,18 +271,9 @@ def fetch_essl_device(device):
         logger.error(f"Error fetching from ESSL device {device.name}: {str(e)}")
         return 0, 1
 
-def fetch_all_devices():
-    """Fetch attendance from all active devices"""
-    logger.info("Starting attendance fetch from all devices...")
-    
-    # Get all active devices
-    devices = Device.objects.filter(is_active=True)
-    logger.info(f"Found {len(devices)} active devices")
-    
-    total_new_records = 0
-    total_errors = 0
-    
-    for device in devices:
+def fetch_device(device):
+    """Fetch one device; runs on a worker thread, so it closes that thread's DB connection"""
+    try:
         logger.info(f"Processing device: {device.name} ({device.device_type})")
         
         if device.device_type == 'zkteco':
@@ -235,17 +282,39 @@ def fetch_all_devices():
             new_records, errors = fetch_essl_device(device)
         else:
             logger.warning(f"Unknown device type: {device.device_type} for device {device.name}")
-            continue
-        
-        total_new_records += new_records
-        total_errors += errors
+            return None
         
         # Update device last sync time
         device.last_sync = timezone.now()
-        device.save(update_fields=['last_sync'])
+        Device.objects.filter(pk=device.pk).update(last_sync=device.last_sync)
         
         logger.info(f"Completed device {device.name}: {new_records} records, {errors} errors")
-        logger.info("-" * 50)
+        return new_records, errors
+    finally:
+        connection.close()
+
+def fetch_all_devices():
+    """Fetch attendance from all active devices"""
+    logger.info("Starting attendance fetch from all devices...")
+    
+    # Get all active devices, with only the columns the fetchers and logs use
+    devices = list(
+        Device.objects.filter(is_active=True).only('id', 'name', 'ip_address', 'port', 'device_type')
+    )
+    logger.info(f"Found {len(devices)} active devices")
+    
+    total_new_records = 0
+    total_errors = 0
+    
+    # Devices are I/O bound on their own connect timeouts, so poll them concurrently
+    if devices:
+        with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(devices))) as executor:
+            for result in executor.map(fetch_device, devices):
+                if result is None:
+                    continue
+                new_records, errors = result
+                total_new_records += new_records
+                total_errors += errors
     
     logger.info(f"ATTENDANCE FETCH COMPLETED")
     logger.info(f"Total new/updated records: {total_new_records}")
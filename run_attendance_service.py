@@ -10,6 +10,7 @@ import django
 import time
 import signal
 import logging
+import threading
 
 # Setup Django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attendance_system.settings')
@@ -28,12 +29,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Seconds between periodic status lines
+STATUS_INTERVAL = 300
+# Longest single wait before re-checking that the service is still running
+STOP_POLL_INTERVAL = 1
+
 class ContinuousAttendanceService:
     def __init__(self, interval=30, device_timeout=60):
         self.interval = interval
         self.device_timeout = device_timeout
         self.service = AutoAttendanceService(interval=interval, device_timeout=device_timeout)
         self.running = False
+        # Set by the signal handler; the main loop sleeps on it between status lines
+        self._stop = threading.Event()
         
     def start(self):
         """Start the continuous attendance service"""
@@ -54,17 +62,22 @@ class ContinuousAttendanceService:
             logger.info("Monitoring devices for attendance data...")
             logger.info("Press Ctrl+C to stop the service")
             
-            # Keep running until interrupted
+            # Keep running until interrupted, logging status every 5 minutes. Waits
+            # are sliced so a service that stops on its own is noticed within a second
+            next_status = time.monotonic() + STATUS_INTERVAL
             while self.running and self.service.running:
-                time.sleep(1)
+                remaining = next_status - time.monotonic()
+                if remaining > 0:
+                    if self._stop.wait(min(STOP_POLL_INTERVAL, remaining)):
+                        break
+                    continue
                 
-                # Log periodic status every 5 minutes
-                if int(time.time()) % 300 == 0:
-                    stats = self.service.get_stats()
-                    logger.info(f"Service Status - Fetches: {stats['total_fetches']}, "
-                              f"Records: {stats['total_records']}, "
-                              f"Duplicates: {stats['duplicates_prevented']}, "
-                              f"Errors: {stats['errors']}")
+                stats = self.service.get_stats()
+                logger.info(f"Service Status - Fetches: {stats['total_fetches']}, "
+                          f"Records: {stats['total_records']}, "
+                          f"Duplicates: {stats['duplicates_prevented']}, "
+                          f"Errors: {stats['errors']}")
+                next_status += STATUS_INTERVAL
                 
         except KeyboardInterrupt:
             logger.info("Received interrupt signal")
@@ -84,8 +97,8 @@ class ContinuousAttendanceService:
     def signal_handler(self, signum, frame):
         """Handle shutdown signals"""
         logger.info(f"Received signal {signum}, shutting down...")
-        self.stop()
-        sys.exit(0)
+        # Wakes the main loop, which stops the service on its way out
+        self._stop.set()
 
 if __name__ == "__main__":
     # Get interval and per-device timeout from command line arguments or use defaults